@@ -0,0 +1,284 @@
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+import httpx
+
+from feed_source import FEED
+from metrics import metrics
+from monitor_core import PAGE_SIZE
+from rate_control import BLOCKED, CAPTCHA, classify_response
+
+
+class HostSlots:
+    def __init__(self, scheduler):
+        """
+        按主机的并发槽位：每次获取时按调度器当前允许的并发数判断，
+        配置了AIMD限速器时并发数随封禁和429收缩，与线程池引擎一致
+        :param scheduler: HostScheduler
+        """
+        self.scheduler = scheduler
+        self.active = {}
+        self.condition = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def hold(self, host):
+        """占用主机的一个槽位，已满时等待其他请求释放"""
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active.get(host, 0) < self.scheduler.concurrency_for(host))
+            self.active[host] = self.active.get(host, 0) + 1
+        try:
+            yield
+        finally:
+            async with self.condition:
+                self.active[host] -= 1
+                self.condition.notify_all()
+
+
+class AsyncGameSiteMonitor:
+    def __init__(self, monitor, max_in_flight=32, max_keepalive=16, timeout=30):
+        """
+        基于asyncio的监控引擎，复用长连接(包括经由HTTP代理的连接)
+        :param monitor: GameSiteMonitor实例，提供网站列表、URL构建、结果解析和保存；
+                        它配置的代理池、响应缓存和解析进程池同样生效
+        :param max_in_flight: 同时进行的最大请求数
+        :param max_keepalive: 连接池中保持的最大空闲长连接数
+        :param timeout: 请求超时时间(秒)
+        """
+        self.monitor = monitor
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_keepalive = max(1, int(max_keepalive))
+        self.timeout = timeout
+        self.log = monitor.log_message
+        # 代理池中每个代理一个客户端，各自保持长连接
+        self.proxy_clients = {}
+
+    def _proxy_url(self):
+        """获取监控器配置的代理地址"""
+        proxies = getattr(self.monitor, 'proxies', None) or {}
+        return proxies.get('https') or proxies.get('http')
+
+    def create_client(self, proxy=None):
+        """
+        创建共享连接池的异步HTTP客户端
+        :param proxy: 代理地址，默认使用监控器配置的代理
+        """
+        return httpx.AsyncClient(
+            headers=self.monitor.headers,
+            proxy=proxy or self._proxy_url(),
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_in_flight,
+                                max_keepalive_connections=self.max_keepalive),
+            follow_redirects=True,
+        )
+
+    async def _get(self, client, url, host, extra_headers=None):
+        """
+        发送一次请求；配置了代理池时按健康度选择代理，被封禁、遇到验证码或连接失败时换一个代理重试
+        :param client: 不使用代理池时的共享客户端
+        :param extra_headers: 附加请求头，例如缓存的条件请求头
+        :return: httpx.Response
+        """
+        pool = self.monitor.proxy_pool
+        if pool is None:
+            t0 = time.perf_counter()
+            # trace回调分别记录连接、首字节和下载时间
+            response = await client.get(url, headers=extra_headers, extensions={'trace': metrics.httpx_trace(host)})
+            metrics.observe('http_fetch', time.perf_counter() - t0, host=host)
+            return response
+
+        attempts = max(1, min(3, len(pool)))
+        for attempt in range(attempts):
+            # 没有可用代理时acquire会阻塞等待，放到线程中
+            with metrics.timer('proxy_wait'):
+                proxy = await asyncio.to_thread(pool.acquire)
+            if proxy not in self.proxy_clients:
+                self.proxy_clients[proxy] = self.create_client(proxy)
+            t0 = time.monotonic()
+            try:
+                response = await self.proxy_clients[proxy].get(url, headers=extra_headers)
+            except httpx.HTTPError:
+                pool.release(proxy, BLOCKED, latency=time.monotonic() - t0)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            metrics.observe('http_fetch', time.monotonic() - t0, host=host)
+            outcome = classify_response(response.status_code, response.text)
+            metrics.inc('proxy_responses', proxy=proxy, outcome=outcome)
+            pool.release(proxy, outcome, latency=time.monotonic() - t0)
+            if outcome not in (BLOCKED, CAPTCHA) or attempt == attempts - 1:
+                return response
+
+    def _parse(self, site, search_url, status_code, body, encoding, from_cache, time_range):
+        """在执行器线程中解码并解析响应，配置了解析进程池时直接传递原始字节"""
+        if isinstance(body, bytes) and self.monitor.parse_pool is None:
+            body = body.decode(encoding or 'utf-8', errors='replace')
+        return self.monitor.handle_response(site, search_url, status_code, body, from_cache, time_range, encoding)
+
+    async def monitor_site(self, client, site, time_range, start=0):
+        """
+        异步监控单个网站的一页结果
+        :param client: 共享的httpx.AsyncClient
+        :param site: 网站域名
+        :param time_range: 时间范围
+        :param start: 结果偏移量
+        :return: 搜索结果列表
+        """
+        search_url = self.monitor.build_google_search_url(site, time_range, start)
+        page = f" (page {start // PAGE_SIZE + 1})" if start else ""
+        self.log(f"Monitoring {site} for {time_range} timeframe{page}")
+
+        host = self.monitor.scheduler.host_of_url(search_url)
+        loop = asyncio.get_running_loop()
+        cache = self.monitor.response_cache
+        try:
+            cached, entry, extra_headers = None, None, None
+            if cache is not None:
+                cached, entry, extra_headers = cache.prepare(search_url, self.monitor.cache_proxy())
+            if cached is None:
+                response = await self._get(client, search_url, host, extra_headers)
+                metrics.inc('http_bytes', len(response.content), host=host)
+                metrics.inc('http_responses', host=host, status=response.status_code)
+                if cache is not None:
+                    # 写入缓存需要解码和压缩，放到执行器中
+                    cached = await loop.run_in_executor(None, cache.complete, search_url,
+                                                        self.monitor.cache_proxy(), entry, response)
+            if cached is not None:
+                page = (cached.status_code, cached.text, None, cached.from_cache)
+            else:
+                page = (response.status_code, response.content, response.encoding, False)
+            # 解析在执行器中进行，事件循环继续处理其他请求
+            return await loop.run_in_executor(None, self._parse, site, search_url, *page, time_range)
+        except Exception as e:
+            self.monitor.failed_queries.add((site, time_range))
+            self.log(f"Error monitoring {site}: {str(e)}", logging.ERROR)
+            return []
+
+    async def _run_unit(self, client, in_flight, host_slots, site, time_range):
+        """
+        在主机槽位内逐页执行单个任务，每页请求后等待礼貌延时；
+        翻页期间让出槽位，其他查询的请求可以插入进来
+        """
+        scheduler = self.monitor.scheduler
+        if time_range == FEED:
+            # sitemap/RSS按流读取，放到线程中执行
+            results = await asyncio.to_thread(self.monitor.monitor_feeds, site)
+            return site, time_range, self.monitor.annotate_results(results, site, time_range)
+        host = scheduler.host_of_url(self.monitor.build_google_search_url(site, time_range))
+        all_results = []
+        seen_urls = set()
+        start = 0
+        while start is not None:
+            async with host_slots.hold(host):
+                # 全局并发上限，避免排队请求占满连接池而超时
+                async with in_flight:
+                    results = await self.monitor_site(client, site, time_range, start)
+                # 配置了限速器时等待时间随响应情况调整
+                delay = scheduler.delay_for(host)
+                if delay > 0:
+                    metrics.observe('polite_delay', delay, host=host)
+                    await asyncio.sleep(delay)
+            new_results, start = self.monitor.next_page(start, results, seen_urls)
+            all_results.extend(new_results)
+        return site, time_range, self.monitor.annotate_results(all_results, site, time_range)
+
+    async def _produce(self, units, emit):
+        """
+        并发执行全部任务，每个任务完成后调用emit(site, time_range, results)
+        :param units: (site, time_range) 列表
+        :param emit: 结果回调
+        """
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        host_slots = HostSlots(self.monitor.scheduler)
+        try:
+            async with self.create_client() as client:
+                tasks = [self._run_unit(client, in_flight, host_slots, *unit) for unit in units]
+                for next_done in asyncio.as_completed(tasks):
+                    emit(*await next_done)
+        finally:
+            for proxy_client in self.proxy_clients.values():
+                await proxy_client.aclose()
+            self.proxy_clients = {}
+
+    def iter_results(self, units):
+        """
+        与GameSiteMonitor.iter_results相同的同步接口：事件循环在后台线程中运行，
+        按完成顺序产出(site, time_range, results)，守护进程和流水线可以直接使用
+        :param units: (site, time_range) 列表
+        """
+        finished = queue.Queue()
+        done = object()
+
+        def run():
+            try:
+                asyncio.run(self._produce(units, lambda *item: finished.put(item)))
+                finished.put(done)
+            except BaseException as e:
+                finished.put(e)
+
+        threading.Thread(target=run, name='async-monitor', daemon=True).start()
+        while True:
+            item = finished.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    async def collect_all_sites(self, time_ranges=None, store=None, units=None):
+        """
+        并发监控所有网站
+        :param time_ranges: 时间范围列表
+        :param store: 可选的ResultStore；提供时跳过已完成任务，并在每个任务完成后立即写入
+        :param units: 可选的(site, time_range)任务列表，默认由监控器按time_ranges生成
+        :return: 与串行版本顺序一致的结果字典列表(提供store时为空列表，结果在store中)
+        """
+        if time_ranges is None:
+            time_ranges = ['24h', '1w']
+
+        if units is None:
+            units = self.monitor.plan_units(time_ranges)
+        if store is not None:
+            done = store.completed_units()
+            units = [unit for unit in units if unit not in done]
+
+        batches = {}
+
+        def collect(site, time_range, results):
+            if store is not None:
+                store.append(site, time_range, results)
+            else:
+                batches[(site, time_range)] = results
+
+        await self._produce(units, collect)
+
+        all_results = []
+        for unit in units:
+            all_results.extend(batches.get(unit, []))
+        return all_results
+
+    async def monitor_all_sites_async(self, time_ranges=None, lazy=False, resume=True):
+        """
+        并发监控所有网站，结果流式写入当天的结果文件后导出
+        :param time_ranges: 时间范围列表
+        :param lazy: 为True时返回ResultSet
+        :param resume: 是否跳过当天已完成的任务
+        :return: 包含所有结果的DataFrame(lazy为True时为ResultSet)
+        """
+        if time_ranges is None:
+            time_ranges = ['24h', '1w']
+        units = self.monitor.plan_units(time_ranges)
+        store = self.monitor.open_result_store(resume)
+        try:
+            pending = [unit for unit in units if unit not in store.completed_units()]
+            await self.collect_all_sites(time_ranges, store, pending)
+            return self.monitor.save_results(store, units, lazy, polled=pending)
+        finally:
+            store.close()
+
+    def monitor_all_sites(self, time_ranges=None, lazy=False, resume=True):
+        """同步调用入口，供CLI和GUI线程使用"""
+        return asyncio.run(self.monitor_all_sites_async(time_ranges, lazy, resume))
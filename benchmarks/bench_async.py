@@ -0,0 +1,80 @@
+"""
+对比线程调度(每次请求新建连接)与asyncio长连接引擎的吞吐量和建连次数；
+asyncio引擎在执行器中解析，--parse-workers大于0时再加一组使用解析进程池的结果
+
+用法: python benchmarks/bench_async.py [--sites 100] [--latency 0.05] [--concurrency 16] [--parse-workers 0]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeServer
+from async_monitor import AsyncGameSiteMonitor
+from fetch_scheduler import HostScheduler, HostPolicy
+from parse_pool import ParsePool
+from step1_game_monitor import GameSiteMonitor
+
+
+def make_monitor(sites_file, base_url, concurrency, parse_pool=None):
+    scheduler = HostScheduler(
+        max_workers=concurrency,
+        default_policy=HostPolicy(max_concurrency=concurrency, delay_range=(0, 0))
+    )
+    return GameSiteMonitor(sites_file, search_base_url=base_url + '/search', scheduler=scheduler,
+                           parse_pool=parse_pool)
+
+
+def bench_threaded(monitor, units):
+    return monitor.scheduler.run(units, monitor._monitor_unit, monitor._unit_host)
+
+
+def bench_async(monitor, units, concurrency):
+    engine = AsyncGameSiteMonitor(monitor, max_in_flight=concurrency, max_keepalive=concurrency)
+    time_ranges = sorted({tr for _, tr in units})
+    return [asyncio.run(engine.collect_all_sites(time_ranges))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='模拟服务器单请求延迟(秒)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--parse-workers', type=int, default=0, help='解析进程池的工作进程数，0表示不测')
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False, encoding='utf-8') as f:
+        for i in range(args.sites):
+            f.write(f'https://site{i}.example.com\n')
+        sites_file = f.name
+
+    labels = ['threaded', 'async'] + (['async+pool'] if args.parse_workers > 0 else [])
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+    try:
+        for label in labels:
+            with FakeServer(latency=args.latency) as server:
+                monitor = make_monitor(sites_file, server.base_url, args.concurrency,
+                                       parse_pool if label == 'async+pool' else None)
+                units = [(site, tr) for site in monitor.sites for tr in ('24h', '1w')]
+                start = time.perf_counter()
+                if label == 'threaded':
+                    batches = bench_threaded(monitor, units)
+                else:
+                    batches = bench_async(monitor, units, args.concurrency)
+                elapsed = time.perf_counter() - start
+                rows = sum(len(b) for b in batches)
+                print(f'{label:>10}: {server.request_count} requests, {rows} rows, '
+                      f'{server.connection_count} connections, {elapsed:.2f}s '
+                      f'({server.request_count / elapsed:.1f} req/s)')
+    finally:
+        os.unlink(sites_file)
+        if parse_pool is not None:
+            parse_pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,234 @@
+"""
+守护进程基准：
+1. 每轮单独启动进程(解释器启动 + 导入 + 新建连接)与常驻守护进程复用连接的一轮耗时和新建连接数
+2. 用模拟时钟运行数天：热门网站每小时发布一个游戏，冷门网站每一天半一个，
+   比较固定1小时间隔与按新结果自适应间隔的请求数和发现延迟
+   并用默认12小时有效期的响应缓存再运行一次，确认守护进程把有效期降到最短间隔以下、不会拿到过期页面
+3. 通过本地控制接口触发一轮、获取结果、暂停和停止
+
+用法: python benchmarks/bench_daemon.py [--sites 20] [--days 3]
+"""
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from daemon import DaemonClient, MonitorDaemon
+from fake_server import FakeServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from response_cache import ResponseCache
+from seen_index import SeenIndex
+from step1_game_monitor import GameSiteMonitor
+
+COLD_PASS = '''
+import logging, sys
+sys.path.insert(0, {root!r})
+from fetch_scheduler import HostPolicy, HostScheduler
+from step1_game_monitor import GameSiteMonitor
+logging.disable(logging.ERROR)
+monitor = GameSiteMonitor({sites_file!r}, search_base_url={url!r}, max_pages=1,
+                          scheduler=HostScheduler(default_policy=HostPolicy(8, (0, 0))))
+print(sum(len(results) for _, _, results in monitor.iter_results([(site, '24h') for site in monitor.sites])))
+'''
+
+
+def make_scheduler():
+    """模拟服务器在127.0.0.1上，去掉礼貌延时"""
+    return HostScheduler(default_policy=HostPolicy(8, (0, 0)))
+
+
+def write_sites(path, sites):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(sites) + '\n')
+
+
+def warm_vs_cold(directory, sites, cycles=3):
+    """比较每轮新进程与常驻守护进程的一轮耗时"""
+    sites_file = os.path.join(directory, 'sites.txt')
+    write_sites(sites_file, [f'https://site{i}.example' for i in range(sites)])
+    with FakeServer(latency=0.02) as server:
+        url = f'{server.base_url}/search'
+        script = COLD_PASS.format(root=ROOT, sites_file=sites_file, url=url)
+        cold = []
+        for _ in range(cycles):
+            connections = server.connection_count
+            start = time.perf_counter()
+            output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+            cold.append((time.perf_counter() - start, server.connection_count - connections, int(output.stdout)))
+
+        session = requests.Session()
+        monitor = GameSiteMonitor(sites_file, search_base_url=url, max_pages=1, scheduler=make_scheduler(),
+                                  session=session)
+        daemon = MonitorDaemon(monitor)
+        warm = []
+        for _ in range(cycles):
+            connections = server.connection_count
+            start = time.perf_counter()
+            found = daemon.run_cycle(list(daemon.sites))
+            warm.append((time.perf_counter() - start, server.connection_count - connections, found))
+        session.close()
+
+    for label, runs in (('new process per pass', cold), ('daemon cycle', warm)):
+        for i, (seconds, connections, rows) in enumerate(runs, 1):
+            print(f'{label:>22} #{i}: {seconds:6.3f}s, {connections:>3} new connections, {rows} results')
+    cold_time = sum(run[0] for run in cold[1:]) / max(1, len(cold) - 1)
+    warm_time = sum(run[0] for run in warm[1:]) / max(1, len(warm) - 1)
+    print(f'steady state: {cold_time:.3f}s per pass vs {warm_time:.3f}s per cycle ({cold_time / warm_time:.1f}x)')
+    return all(run[2] == cold[0][2] for run in cold + warm)
+
+
+class SimulatedSites:
+    def __init__(self, t0, periods, initial=5):
+        """
+        按模拟时钟发布游戏的网站：每个网站按固定间隔发布，各网站的发布时刻错开
+        :param periods: {网站: 发布间隔(秒)}
+        :param initial: 开始前已有的游戏数
+        """
+        self.t0 = t0
+        self.now = t0
+        self.periods = periods
+        self.initial = initial
+        # 第一个新游戏在t0之后(1 - phase) * period发布
+        self.phases = {site: (i * 0.37) % 1 * period for i, (site, period) in enumerate(periods.items())}
+
+    def __call__(self):
+        return self.now
+
+    def published(self, site, now=None):
+        now = self.now if now is None else now
+        return self.initial + int((now - self.t0 + self.phases[site]) // self.periods[site])
+
+    def published_at(self, site, index):
+        return self.t0 + (index - self.initial + 1) * self.periods[site] - self.phases[site]
+
+
+def simulate(directory, label, hot, slow, days, cache=False, **intervals):
+    """
+    用模拟时钟运行守护进程days天，打印每类网站的请求数和发现延迟
+    :param cache: 是否配置默认有效期的响应缓存
+    :return: 每次轮询报告的新结果数是否都与新发布的游戏数一致
+    """
+    periods = {f'hot{i}.example': 3600 for i in range(hot)}
+    periods.update({f'slow{i}.example': 36 * 3600 for i in range(slow)})
+    clock = SimulatedSites(time.time(), periods)
+    sites_file = os.path.join(directory, f'{label}.txt')
+    write_sites(sites_file, list(periods))
+    seen_index = SeenIndex(os.path.join(directory, f'{label}.sqlite'))
+    response_cache = ResponseCache(os.path.join(directory, f'{label}.cache.sqlite'), clock=clock) if cache else None
+    stats = {kind: {'polls': 0, 'found': 0, 'latency': 0.0} for kind in ('hot', 'slow')}
+    ok = True
+
+    with FakeServer(latency=0, total_results=clock.published) as server:
+        monitor = GameSiteMonitor(sites_file, search_base_url=f'{server.base_url}/search', max_pages=1,
+                                  scheduler=make_scheduler(), seen_index=seen_index, response_cache=response_cache)
+        daemon = MonitorDaemon(monitor, clock=clock, **intervals)
+        observed = {site: clock.initial for site in periods}
+        polled = set()
+        end = clock.t0 + days * 86400
+        while clock.now < end:
+            due = daemon.due_sites()
+            if not due:
+                clock.now += daemon.seconds_until_due()
+                continue
+            daemon.run_cycle(due)
+            for site in due:
+                kind = 'hot' if site.startswith('hot') else 'slow'
+                total = clock.published(site)
+                stats[kind]['polls'] += 1
+                for index in range(observed[site], total):
+                    if index >= clock.initial:
+                        stats[kind]['found'] += 1
+                        stats[kind]['latency'] += clock.now - clock.published_at(site, index)
+                # 守护进程报告的新结果数应与这次轮询新发布的游戏数一致(首次轮询包括已有游戏)
+                expected = total - observed[site] if site in polled else total
+                ok &= daemon.sites[site]['last_new'] == expected
+                polled.add(site)
+                observed[site] = total
+        requests_made = server.request_count
+    seen_index.close()
+    if response_cache is not None:
+        response_cache.close()
+
+    parts = []
+    for kind, stat in stats.items():
+        latency = stat['latency'] / stat['found'] / 60 if stat['found'] else 0
+        parts.append(f'{kind}: {stat["polls"]:>4} polls, {stat["found"]:>3} games, mean delay {latency:5.1f} min')
+    print(f'{label:>24}: {requests_made:>5} requests; ' + '; '.join(parts))
+    return ok
+
+
+def control_api(directory, sites):
+    """通过控制接口触发一轮并取回结果"""
+    sites_file = os.path.join(directory, 'api_sites.txt')
+    write_sites(sites_file, [f'https://api{i}.example' for i in range(sites)])
+    with FakeServer(latency=0.01) as server:
+        monitor = GameSiteMonitor(sites_file, search_base_url=f'{server.base_url}/search', max_pages=1,
+                                  scheduler=make_scheduler(),
+                                  seen_index=SeenIndex(os.path.join(directory, 'api.sqlite')))
+        daemon = MonitorDaemon(monitor, default_interval=3600)
+        http = daemon.serve(0)
+        loop = threading.Thread(target=daemon.run_forever, daemon=True)
+        loop.start()
+        client = DaemonClient(f'http://127.0.0.1:{http.server_address[1]}')
+
+        def wait_for(cycle):
+            deadline = time.time() + 30
+            while client.status()['cycles'] < cycle and time.time() < deadline:
+                time.sleep(0.05)
+
+        start = time.perf_counter()
+        wait_for(1)
+        first = client.results(0, limit=10000)
+        ticket = client.run_now()
+        wait_for(ticket['cycle'])
+        second = client.results(first[-1]['seq'] if first else 0)
+        client.pause()
+        paused = client.status()['state']
+        client.stop()
+        loop.join(10)
+        http.shutdown()
+        http.server_close()
+        monitor.seen_index.close()
+    print(f'control API: first cycle {len(first)} results, run-now cycle {ticket["cycle"]} '
+          f'{len(second)} new results, state after pause {paused!r}, stopped {not loop.is_alive()} '
+          f'({time.perf_counter() - start:.2f}s)')
+    return len(first) == sites * 10 and not second and paused == 'paused' and not loop.is_alive()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=20)
+    parser.add_argument('--days', type=int, default=3)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # 守护进程把结果追加到当前目录的当天CSV
+        os.chdir(directory)
+        try:
+            ok = warm_vs_cold(directory, args.sites)
+            hot, slow = args.sites // 4, args.sites - args.sites // 4
+            ok &= simulate(directory, 'fixed 1h interval', hot, slow, args.days,
+                           default_interval=3600, min_interval=3600, max_interval=3600)
+            ok &= simulate(directory, 'adaptive 10min-6h', hot, slow, args.days,
+                           default_interval=3600, min_interval=600, max_interval=6 * 3600)
+            ok &= simulate(directory, 'adaptive + response cache', hot, slow, args.days, cache=True,
+                           default_interval=3600, min_interval=600, max_interval=6 * 3600)
+            ok &= control_api(directory, args.sites)
+        finally:
+            os.chdir(cwd)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+sitemap/RSS来源基准：在模拟网站上比较每次全量下载所有sitemap与增量读取
+(条件请求 + 跳过lastmod未变的子sitemap)的请求数、下载量和耗时，
+并比较流式解析与整体解析一个5万条URL的gzip sitemap的内存峰值
+
+用法: python benchmarks/bench_feeds.py [--sites 10] [--history-days 365] [--games-per-day 20]
+"""
+import argparse
+import gzip
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeSitemapServer
+from feed_source import FEED, FeedSource, iter_entries
+from fetch_scheduler import HostPolicy, HostScheduler
+from step1_game_monitor import GameSiteMonitor
+
+
+def make_scheduler():
+    """模拟网站都在127.0.0.1上，去掉礼貌延时"""
+    return HostScheduler(default_policy=HostPolicy(8, (0, 0)))
+
+
+def run_day(label, monitor, feed_source, server):
+    before = feed_source.stats()
+    server_before = server.request_count
+    start = time.perf_counter()
+    rows = [row for _, _, results in monitor.iter_results([(site, FEED) for site in monitor.sites]) for row in results]
+    elapsed = time.perf_counter() - start
+    feed_source.commit()
+    after = feed_source.stats()
+    delta = {key: after[key] - before[key] for key in after}
+    print(f'{label:>31}: {len(rows):>6} new games, {server.request_count - server_before:>4} requests '
+          f'({delta["not_modified"]} not modified, {delta["skipped"]} sitemaps skipped), '
+          f'{delta["bytes"] / 1024:>8.0f} KB, {delta["entries"]:>6} entries parsed, {elapsed:.2f}s')
+    return rows
+
+
+def parse_memory(entries=50000):
+    """流式解析与ET.fromstring整体解析同一个gzip sitemap的内存峰值(MB)"""
+    xml = ('<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+           + ''.join(f'<url><loc>https://example.com/games/game-{i}</loc><lastmod>2026-10-01</lastmod></url>'
+                     for i in range(entries)) + '</urlset>')
+    data = gzip.compress(xml.encode('utf-8'))
+    del xml
+
+    tracemalloc.start()
+    chunks = (data[i:i + 64 * 1024] for i in range(0, len(data), 64 * 1024))
+    count = sum(1 for _ in iter_entries(chunks))
+    streaming = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    root = ET.fromstring(gzip.decompress(data))
+    whole = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+    assert count == len(root) == entries
+    return len(data) / 1e6, streaming, whole
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=10)
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--games-per-day', type=int, default=20)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory, \
+            FakeSitemapServer(history_days=args.history_days, games_per_day=args.games_per_day) as server:
+        sites_file = os.path.join(directory, 'sites.txt')
+        with open(sites_file, 'w', encoding='utf-8') as f:
+            for i in range(args.sites):
+                f.write(f'{server.base_url}/site{i}\n')
+
+        incremental = FeedSource(os.path.join(directory, 'feeds.sqlite'))
+        monitor = GameSiteMonitor(sites_file, feed_source=incremental, scheduler=make_scheduler())
+        first = run_day('day 1 (first run)', monitor, incremental, server)
+        again = run_day('day 1 (rerun)', monitor, incremental, server)
+        server.advance(1)
+        second = run_day('day 2 incremental', monitor, incremental, server)
+
+        state_path = os.path.join(directory, 'full.sqlite')
+        full = FeedSource(state_path, initial_days=2)
+        full_rows = run_day('day 2 full download (no state)', GameSiteMonitor(sites_file, feed_source=full, scheduler=make_scheduler()), full, server)
+
+        expected_day1 = args.sites * args.games_per_day * 7
+        expected_day2 = args.sites * args.games_per_day
+        print(f'expected about {expected_day1} games on day 1 and {expected_day2} on day 2')
+        ok = abs(len(first) - expected_day1) <= args.sites and not again and \
+            abs(len(second) - expected_day2) <= args.sites and len(full_rows) >= len(second)
+        if second:
+            print(f'sample row: {second[0]["title"]!r} {second[0]["game_name"]!r}')
+
+    size, streaming, whole = parse_memory()
+    print(f'50k-URL gzip sitemap ({size:.1f} MB compressed): streaming parse peak {streaming:.1f} MB, '
+          f'whole-document parse peak {whole:.1f} MB')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
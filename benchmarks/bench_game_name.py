@@ -0,0 +1,107 @@
+"""
+游戏名称提取微基准：对比旧的逐条re.search实现与预编译的GameNameExtractor，
+并校验两者在全部合成标题上的输出完全一致
+
+用法: python benchmarks/bench_game_name.py [--count 1000000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from game_name import GameNameExtractor
+
+
+def legacy_extract_game_name(title):
+    """GameSiteMonitor.extract_game_name 的原始实现，作为一致性基准"""
+    patterns = [
+        r'《(.+?)》',  # 中文书名号
+        r'"(.+?)"',    # 英文引号
+        r'【(.+?)】',  # 中文方括号
+        r'\[(.+?)\]'   # 英文方括号
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, title)
+        if match:
+            return match.group(1)
+
+    cleaned_title = re.sub(r'(攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏)', '', title)
+    return cleaned_title.strip()
+
+
+TEMPLATES = [
+    'Play {name} Online Free | CrazyGames',
+    '{name} - Play on itch.io',
+    '《{name}》攻略合集',
+    '"{name}" - Free Online Game',
+    '【{name}】手游下载',
+    '[{name}] Coolmath Games',
+    '{name} 官网 单机游戏下载',
+    '{name}：评测与资讯',
+]
+EDGE_ALPHABET = list('ab 《》"【】[]\n攻略官网手游')
+
+
+def synthetic_titles(count, seed=42):
+    """生成合成标题：大部分按真实模板，小部分为包含各种标记组合的随机串"""
+    rng = random.Random(seed)
+    titles = []
+    for i in range(count):
+        if i % 10 == 0:
+            titles.append(''.join(rng.choice(EDGE_ALPHABET) for _ in range(rng.randint(0, 14))))
+        else:
+            name = f'Game {rng.randint(0, count // 4)}'
+            titles.append(rng.choice(TEMPLATES).format(name=name))
+    return titles
+
+
+def timed(label, fn, count):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print(f'{label:>28}: {elapsed:6.2f}s ({count / elapsed / 1e6:5.2f} M titles/s)')
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--count', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    titles = synthetic_titles(args.count)
+    extractor = GameNameExtractor()
+
+    expected = timed('legacy re.search', lambda: [legacy_extract_game_name(t) for t in titles], args.count)
+    single = timed('GameNameExtractor.extract', lambda: [extractor.extract(t) for t in titles], args.count)
+    batch = timed('extract_many(list)', lambda: extractor.extract_many(titles), args.count)
+
+    series_result = None
+    try:
+        import pandas as pd
+        series = pd.Series(titles)
+        series_result = timed('extract_many(Series)', lambda: extractor.extract_many(series), args.count).tolist()
+    except ImportError:
+        pass
+
+    failed = False
+    for label, output in (('extract', single), ('extract_many(list)', batch), ('extract_many(Series)', series_result)):
+        if output is None:
+            continue
+        mismatches = [i for i, (a, b) in enumerate(zip(expected, output)) if a != b]
+        if mismatches or len(output) != len(expected):
+            failed = True
+            i = mismatches[0] if mismatches else len(output)
+            print(f'MISMATCH in {label} at {i}: {titles[i]!r}')
+
+    if failed:
+        sys.exit(1)
+    print(f'outputs identical to legacy implementation on {args.count} titles')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+GUI结果视图基准：工作线程以并发扫描的速度产出数万条结果，比较
+1. 工作线程直接对Text逐条insert/see(原来的update_progress)
+2. 经UIBridge队列由Tk主循环批量处理，写入RingLog和VirtualTable
+报告全部结果显示完成的耗时、主循环的最大停顿(心跳定时器的最大延迟)以及结束时控件中的行数
+需要图形环境，没有显示器时跳过
+
+用法: python benchmarks/bench_gui.py [--results 30000] [--batch 10] [--log-lines 5000]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tkinter as tk
+
+from gui_widgets import RingLog, UIBridge, VirtualTable
+
+
+def make_batches(results, batch):
+    """模拟查询结果：每个查询返回batch条"""
+    rows = [(f'https://site{i % 50}.example', '24h', f'Game {i}', f'https://site{i % 50}.example/games/game-{i}')
+            for i in range(results)]
+    return [rows[i:i + batch] for i in range(0, results, batch)]
+
+
+class Heartbeat:
+    def __init__(self, root, interval=20):
+        """每interval毫秒触发一次的定时器，记录实际间隔超出预期的最大值，衡量主循环是否卡顿"""
+        self.root = root
+        self.interval = interval
+        self.last = time.perf_counter()
+        self.max_stall = 0.0
+        self.root.after(interval, self.tick)
+
+    def tick(self):
+        now = time.perf_counter()
+        self.max_stall = max(self.max_stall, now - self.last - self.interval / 1000)
+        self.last = now
+        self.root.after(self.interval, self.tick)
+
+
+def run_direct(batches):
+    """原来的方式：工作线程对每条消息调用Text.insert和see"""
+    root = tk.Tk()
+    text = tk.Text(root, height=20, width=70)
+    text.pack()
+    heartbeat = Heartbeat(root)
+    done = threading.Event()
+
+    def worker():
+        for rows in batches:
+            for site, _, game_name, url in rows:
+                text.insert(tk.END, f"[{site}] {game_name} - {url}\n")
+                text.see(tk.END)
+        done.set()
+
+    def check():
+        if done.is_set():
+            root.quit()
+        else:
+            root.after(10, check)
+
+    start = time.perf_counter()
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(10, check)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    lines = int(text.index('end-1c').split('.')[0])
+    root.destroy()
+    return elapsed, heartbeat.max_stall, lines, lines
+
+
+def run_bridge(batches, log_lines):
+    """队列桥接：工作线程只post，主循环批量写入有上限的日志和虚拟化结果表"""
+    root = tk.Tk()
+    text = tk.Text(root, height=20, width=70)
+    text.pack()
+    log = RingLog(text, max_lines=log_lines)
+    table = VirtualTable(root, [('site', 'site'), ('time_range', 'range'), ('game_name', 'game'), ('url', 'url')])
+    table.pack(fill=tk.BOTH, expand=True)
+    bridge = UIBridge(root)
+    total = sum(len(rows) for rows in batches)
+    shown = []
+
+    def show_results(items):
+        rows = [row for rows in items for row in rows]
+        table.extend(rows)
+        shown.extend(rows)
+
+    bridge.on('log', log.extend)
+    bridge.on('results', show_results)
+    heartbeat = Heartbeat(root)
+
+    def worker():
+        for rows in batches:
+            bridge.post('results', rows)
+            bridge.post('log', f"Found {len(rows)} results for {rows[0][0]}")
+
+    def check():
+        if len(shown) >= total:
+            root.quit()
+        else:
+            root.after(10, check)
+
+    start = time.perf_counter()
+    bridge.start()
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(10, check)
+    root.mainloop()
+    elapsed = time.perf_counter() - start
+    lines = int(text.index('end-1c').split('.')[0])
+    items = len(table.tree.get_children())
+    bridge.stop()
+    root.destroy()
+    return elapsed, heartbeat.max_stall, lines, items
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--results', type=int, default=30000)
+    parser.add_argument('--batch', type=int, default=10, help="每个查询的结果数")
+    parser.add_argument('--log-lines', type=int, default=5000)
+    args = parser.parse_args()
+
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        print(f'skipped: no display ({e})')
+        return
+
+    batches = make_batches(args.results, args.batch)
+    direct = run_direct(batches)
+    bridge = run_bridge(batches, args.log_lines)
+    for label, (elapsed, stall, lines, items) in (('direct Text.insert', direct), ('queue bridge', bridge)):
+        print(f'{label:>20}: {args.results} results in {elapsed:6.2f}s, max main-loop stall {stall * 1000:7.1f} ms, '
+              f'{lines} log lines, {items} widget rows')
+    ok = bridge[2] <= args.log_lines + 1 and bridge[3] < 1000
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
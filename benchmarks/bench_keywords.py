@@ -0,0 +1,42 @@
+"""
+关键词提取吞吐量基准：逐条串行请求 vs 批量并发请求(使用本地模拟OpenAI兼容服务)
+
+用法: python benchmarks/bench_keywords.py [--rows 200] [--latency 0.1] [--batch-size 10] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeOpenAIServer
+from step2_key_extract import KeywordExtractor
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=0.1, help='模拟服务单次补全延迟(秒)')
+    parser.add_argument('--batch-size', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate-limit-every', type=int, default=25, help='每N个请求返回一次429')
+    args = parser.parse_args()
+
+    texts = [f'Game{i} Play Game{i} Online Free | CrazyGames' for i in range(args.rows)]
+    expected = [f'kw game{i}' for i in range(args.rows)]
+
+    for label, batch_size, workers in (('per-row', 1, 1), ('batched', args.batch_size, args.workers)):
+        with FakeOpenAIServer(latency=args.latency, rate_limit_every=args.rate_limit_every) as server:
+            extractor = KeywordExtractor(api_key='test', base_url=server.base_url + '/v1',
+                                         batch_size=batch_size, max_workers=workers)
+            start = time.perf_counter()
+            keywords = extractor.extract_all(texts)
+            elapsed = time.perf_counter() - start
+            status = 'ok' if keywords == expected else 'MISMATCH'
+            print(f'{label:>8}: {args.rows} rows, {server.request_count} requests in {elapsed:.2f}s '
+                  f'({args.rows / elapsed:.1f} rows/s) [{status}]')
+
+
+if __name__ == '__main__':
+    main()
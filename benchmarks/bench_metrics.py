@@ -0,0 +1,113 @@
+"""
+指标与性能分析基准：用模拟服务跑一遍流水线，输出各阶段耗时报告，
+检查Prometheus文本格式的/metrics，测量记录指标本身的开销，并验证cProfile能覆盖工作线程
+
+用法: python benchmarks/bench_metrics.py [--sites 20] [--serp-latency 0.1] [--llm-latency 0.1]
+"""
+import argparse
+import json
+import logging
+import os
+import pstats
+import re
+import sys
+import tempfile
+import time
+import urllib.request
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pipeline import build
+from fake_server import FakeOpenAIServer, FakeServer
+from metrics import Metrics, metrics, profiled
+from pipeline import GamePipeline
+
+PROMETHEUS_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[^}]*\})? -?[0-9.e+-]+$')
+
+
+def overhead(calls=200000):
+    """单次observe和inc的平均耗时(微秒)"""
+    registry = Metrics()
+    start = time.perf_counter()
+    for i in range(calls):
+        registry.observe('http_fetch', 0.01, host='www.google.com')
+    observe = (time.perf_counter() - start) / calls * 1e6
+    start = time.perf_counter()
+    for i in range(calls):
+        registry.inc('results', 10, site='https://itch.io')
+    inc = (time.perf_counter() - start) / calls * 1e6
+    return observe, inc
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=20)
+    parser.add_argument('--serp-latency', type=float, default=0.1)
+    parser.add_argument('--llm-latency', type=float, default=0.1)
+    parser.add_argument('--trends-latency', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        sites_file = os.path.join(directory, 'sites.txt')
+        with open(sites_file, 'w', encoding='utf-8') as f:
+            for i in range(args.sites):
+                f.write(f'https://site{i}.example.com\n')
+
+        with FakeServer(latency=args.serp_latency) as serp, FakeOpenAIServer(latency=args.llm_latency) as llm:
+            metrics.reset()
+            server = metrics.serve(port=0)
+            profile_path = os.path.join(directory, 'run.prof')
+            try:
+                pipeline = GamePipeline(*build(sites_file, serp.base_url, llm.base_url,
+                                               os.path.join(directory, 'store'), args.trends_latency),
+                                        checkpoint=False)
+                with profiled(profile_path, top=0):
+                    pipeline.run()
+                with urllib.request.urlopen(f'http://127.0.0.1:{server.server_address[1]}/metrics') as response:
+                    text = response.read().decode('utf-8')
+            finally:
+                server.shutdown()
+                server.server_close()
+
+            report = metrics.report()
+            report_path = os.path.join(directory, 'report.json')
+            metrics.write_report(report_path)
+            with open(report_path, encoding='utf-8') as f:
+                json.load(f)
+
+        print(f"run took {report['elapsed']:.2f}s; time by stage (summed across threads):")
+        for name, seconds in report['stages'].items():
+            timers = [t for t in report['timers'] if t['name'] == name]
+            count = sum(t['count'] for t in timers)
+            p95 = max(t['p95'] for t in timers)
+            print(f'  {name:>18}: {seconds:8.2f}s over {count:>5} calls (worst p95 {p95 * 1000:.1f} ms)')
+        counters = {}
+        for counter in report['counters']:
+            counters[counter['name']] = counters.get(counter['name'], 0) + counter['value']
+        print('counters: ' + ', '.join(f'{name}={value}' for name, value in sorted(counters.items())))
+
+        samples = [line for line in text.splitlines() if line and not line.startswith('#')]
+        bad = [line for line in samples if not PROMETHEUS_LINE.match(line)]
+        print(f'/metrics: {len(samples)} samples, {len(bad)} malformed')
+        failures += len(bad)
+        for name in ('http_ttfb', 'serp_parse', 'llm_request', 'trends_request', 'pipeline_stage'):
+            if name not in report['stages']:
+                print(f'MISSING: no {name} timings recorded')
+                failures += 1
+
+        stats = pstats.Stats(profile_path)
+        functions = {func[2] for func in stats.stats}
+        threaded = {'_monitor_unit', 'extract_batch', 'fetch_batch'} & functions
+        print(f'profile: {len(stats.stats)} functions, worker-thread functions seen: {sorted(threaded)}')
+        if len(threaded) < 3:
+            failures += 1
+
+    observe, inc = overhead()
+    print(f'overhead: observe {observe:.2f} us/call, inc {inc:.2f} us/call')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+搜索结果页解析吞吐量基准，并校验所有解析后端输出完全一致
+
+用法: python benchmarks/bench_parse.py [--rounds 20]
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serp_parser import BACKENDS
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serp_corpus')
+
+
+def load_corpus(corpus_dir=CORPUS_DIR):
+    """加载保存的搜索结果页"""
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(corpus_dir, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    pages = load_corpus()
+    backends = {name: cls() for name, cls in BACKENDS.items()}
+
+    # 以html.parser为基准校验输出
+    reference = {name: backends['html.parser'].parse(html) for name, html in pages.items()}
+    mismatches = 0
+    for backend_name, backend in backends.items():
+        for page_name, html in pages.items():
+            if backend.parse(html) != reference[page_name]:
+                mismatches += 1
+                print(f'MISMATCH: {backend_name} on {page_name}')
+
+    total_bytes = sum(len(html.encode('utf-8')) for html in pages.values())
+    for backend_name, backend in backends.items():
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for html in pages.values():
+                backend.parse(html)
+        elapsed = time.perf_counter() - start
+        page_count = args.rounds * len(pages)
+        print(f'{backend_name:>12}: {page_count / elapsed:8.1f} pages/s, '
+              f'{args.rounds * total_bytes / elapsed / 1e6:6.2f} MB/s')
+
+    if mismatches:
+        sys.exit(1)
+    print(f'all {len(backends)} backends agree on {len(pages)} pages')
+
+
+if __name__ == '__main__':
+    main()
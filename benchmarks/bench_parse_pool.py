@@ -0,0 +1,89 @@
+"""
+多进程解析基准：把serp_corpus中保存的搜索结果页重复成数千页原始字节，比较
+1. 单线程在进程内解析(原来的方式)
+2. 多个线程在进程内解析(受GIL限制)
+3. ParsePool使用1..N个工作进程(单核机器上ParsePool在进程内解析)
+报告每秒解析页数、相对单线程的加速比和在途页数峰值，并校验所有方式的结果完全一致
+
+用法: python benchmarks/bench_parse_pool.py [--pages 2000] [--workers 1,2,4] [--backend auto]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parse_pool
+from bench_parse import load_corpus
+from parse_pool import ParsePool
+
+
+def default_workers():
+    """1、2、4……直到CPU核数"""
+    cores = os.cpu_count() or 1
+    workers = [1]
+    while workers[-1] * 2 < cores:
+        workers.append(workers[-1] * 2)
+    if workers[-1] != cores:
+        workers.append(cores)
+    return workers
+
+
+def report(label, pages, elapsed, baseline=None, extra=''):
+    rate = len(pages) / elapsed
+    speedup = f', {rate / baseline:4.2f}x' if baseline else ''
+    print(f'{label:>22}: {rate:8.1f} pages/s{speedup}{extra}')
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--workers', help="逗号分隔的工作进程数，默认1、2、4……直到CPU核数")
+    parser.add_argument('--threads', type=int, default=4, help="进程内多线程解析的线程数")
+    parser.add_argument('--backend', default='auto')
+    parser.add_argument('--max-in-flight', type=int)
+    args = parser.parse_args()
+
+    corpus = [html.encode('utf-8') for html in load_corpus().values()]
+    pages = [(200, corpus[i % len(corpus)], 'utf-8') for i in range(args.pages)]
+    print(f'{len(pages)} pages, {sum(len(page[1]) for page in pages) / 1e6:.1f} MB, '
+          f'{os.cpu_count()} CPU cores, backend {args.backend}')
+
+    # 单线程基准与工作进程执行同一个函数
+    parse_pool._init_worker(args.backend)
+    start = time.perf_counter()
+    reference = [parse_pool.parse_page(*page) for page in pages]
+    baseline = report('in-process, 1 thread', pages, time.perf_counter() - start)
+    ok = True
+
+    with ThreadPoolExecutor(args.threads) as executor:
+        start = time.perf_counter()
+        threaded = list(executor.map(lambda page: parse_pool.parse_page(*page), pages))
+        report(f'in-process, {args.threads} threads', pages, time.perf_counter() - start, baseline)
+    ok &= threaded == reference
+
+    workers = [int(n) for n in args.workers.split(',')] if args.workers else default_workers()
+    for n in workers:
+        with ParsePool(n, backend=args.backend, max_in_flight=args.max_in_flight) as pool:
+            # 先让工作进程启动并完成导入，不计入吞吐量
+            list(pool.imap(pages[:max(n * 2, pool.min_batch)]))
+            start = time.perf_counter()
+            parsed = list(pool.imap(pages))
+            elapsed = time.perf_counter() - start
+            stats = pool.stats()
+        # 单核机器上ParsePool退回进程内解析
+        mode = ', inline (single core)' if stats['inline'] else \
+            f', peak {stats["peak_in_flight"]}/{stats["max_in_flight"]} pages in flight'
+        report(f'ParsePool, {n} workers', pages, elapsed, baseline, mode)
+        ok &= parsed == reference and stats['peak_in_flight'] <= stats['max_in_flight']
+
+    if not ok:
+        print('MISMATCH: parallel results differ from the single-threaded parse')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
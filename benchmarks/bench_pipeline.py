@@ -0,0 +1,93 @@
+"""
+端到端流水线基准：三个步骤依次运行 vs GamePipeline流式串联
+(模拟搜索服务器、模拟OpenAI兼容服务和FakeTrendReq)
+
+用法: python benchmarks/bench_pipeline.py [--sites 30] [--serp-latency 0.2] [--llm-latency 0.2] [--trends-latency 0.05]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeOpenAIServer, FakeServer
+from fake_trends import FakeTrendReq
+from fetch_scheduler import HostPolicy, HostScheduler
+from pipeline import GamePipeline
+from step1_game_monitor import GameSiteMonitor
+from step2_key_extract import KeywordExtractor, build_keyword_input
+from title_clustering import cluster_results
+from trends_scheduler import TrendsScheduler
+from trends_store import TrendsStore
+from trends_warehouse import TrendsWarehouse
+
+
+def build(sites_file, serp_url, llm_url, store_dir, trends_latency):
+    scheduler = HostScheduler(max_workers=8, default_policy=HostPolicy(max_concurrency=8, delay_range=(0, 0)))
+    monitor = GameSiteMonitor(sites_file, search_base_url=serp_url + '/search', scheduler=scheduler)
+    extractor = KeywordExtractor(api_key='test', base_url=llm_url + '/v1')
+    trends = TrendsScheduler(delay_range=(0, 0),
+                             trendreq_factory=lambda: FakeTrendReq(latency=trends_latency, today=time.strftime('%Y-%m-%d')))
+    return monitor, extractor, TrendsWarehouse(TrendsStore(store_dir), trends)
+
+
+def run_sequential(monitor, extractor, warehouse):
+    """与分别运行三个脚本相同的顺序：上一步全部完成后下一步才开始"""
+    timings = {}
+    start = time.perf_counter()
+    rows = []
+    units = [(site, tr) for site in monitor.sites for tr in ('24h', '1w')]
+    for _, _, results in monitor.iter_results(units):
+        rows.extend(results)
+    timings['monitor'] = time.perf_counter() - start
+
+    stage_start = time.perf_counter()
+    representatives = cluster_results(rows)
+    texts = [build_keyword_input(row['game_name'], row['title']) for row in representatives]
+    keyword_by_cluster = dict(zip((row['cluster_id'] for row in representatives), extractor.extract_all(texts)))
+    keywords = list(dict.fromkeys(keyword_by_cluster[row['cluster_id']] for row in rows))
+    timings['keywords'] = time.perf_counter() - stage_start
+
+    stage_start = time.perf_counter()
+    warehouse.update(keywords)
+    timings['trends'] = time.perf_counter() - stage_start
+    return time.perf_counter() - start, timings, len(keywords)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=30)
+    parser.add_argument('--serp-latency', type=float, default=0.2)
+    parser.add_argument('--llm-latency', type=float, default=0.2)
+    parser.add_argument('--trends-latency', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sites_file = os.path.join(directory, 'sites.txt')
+        with open(sites_file, 'w', encoding='utf-8') as f:
+            for i in range(args.sites):
+                f.write(f'https://site{i}.example.com\n')
+
+        with FakeServer(latency=args.serp_latency) as serp, FakeOpenAIServer(latency=args.llm_latency) as llm:
+            components = build(sites_file, serp.base_url, llm.base_url, os.path.join(directory, 'seq'),
+                               args.trends_latency)
+            elapsed, timings, keyword_count = run_sequential(*components)
+            stages = ', '.join(f'{name} {seconds:.1f}s' for name, seconds in timings.items())
+            print(f'sequential: {elapsed:.2f}s ({stages}), {keyword_count} keywords')
+
+            pipeline = GamePipeline(*build(sites_file, serp.base_url, llm.base_url, os.path.join(directory, 'pipe'),
+                                           args.trends_latency), checkpoint=False)
+            start = time.perf_counter()
+            output = pipeline.run()
+            elapsed = time.perf_counter() - start
+            stages = ', '.join(f'{name} {seconds:.1f}s' for name, seconds in pipeline.timings.items())
+            print(f'  pipeline: {elapsed:.2f}s ({stages}), {len(pipeline.urls)} keywords, '
+                  f'{len(output["increases"])} trend rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+自适应轮询基准：用模拟时钟运行数周，网站按不同速率(泊松过程)发布新页面，
+比较每次运行都查询全部网站的'24h'和'1w'与PollPlanner按历史到达速度安排查询的请求数和召回率
+召回率只统计最后一周之前发布的页面：安静的网站最多隔6天才查一次，最后几天的页面要到下次查询才能发现
+
+用法: python benchmarks/bench_polling.py [--days 28] [--run-hours 24,6] [--busy 4] [--medium 8] [--quiet 28]
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeTimelineServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from poll_planner import PollPlanner
+from seen_index import SeenIndex
+from step1_game_monitor import GameSiteMonitor
+
+
+class VirtualClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def make_rates(busy, medium, quiet):
+    """每天的新页面数：少数网站很活跃，多数网站很少更新"""
+    rates = {f'busy{i}.example': 60.0 for i in range(busy)}
+    rates.update({f'medium{i}.example': 3.0 for i in range(medium)})
+    rates.update({f'quiet{i}.example': 0.05 + 0.25 * i / max(1, quiet - 1) for i in range(quiet)})
+    return rates
+
+
+def simulate(directory, label, rates, days, run_hours, adaptive):
+    """每run_hours小时运行一次监控，返回请求数和召回率"""
+    t0 = 1_700_000_000.0
+    clock = VirtualClock(t0)
+    sites_file = os.path.join(directory, 'sites.txt')
+    with open(sites_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(rates) + '\n')
+    seen_index = SeenIndex(os.path.join(directory, f'{label}.sqlite'))
+    planner = PollPlanner(seen_index, clock=clock) if adaptive else None
+    found = set()
+    queries = {'24h': 0, '1w': 0}
+    start = time.perf_counter()
+
+    with FakeTimelineServer(rates, clock, t0, days) as server:
+        monitor = GameSiteMonitor(sites_file, search_base_url=f'{server.base_url}/search',
+                                  scheduler=HostScheduler(default_policy=HostPolicy(8, (0, 0))),
+                                  seen_index=seen_index, planner=planner)
+        runs = int(days * 24 / run_hours)
+        for run in range(runs + 1):
+            clock.now = t0 + run * run_hours * 3600
+            units = monitor.plan_units(['24h', '1w'])
+            for _, time_range in units:
+                queries[time_range] += 1
+            for site, time_range, results in monitor.iter_results(units):
+                found.update(result['url'] for result in monitor.filter_new(site, time_range, results))
+            seen_index.commit()
+        published = set()
+        settled = clock.now - 7 * 86400
+        for site in rates:
+            published |= server.published_urls(site, t0, settled)
+        requests_made = server.request_count
+    seen_index.close()
+
+    recall = len(found & published) / len(published)
+    print(f'{label:>28}: {requests_made:>6} requests ({queries["24h"]:>5} x 24h, {queries["1w"]:>5} x 1w), '
+          f'recall {recall:.2%} of {len(published)} pages, {time.perf_counter() - start:.1f}s')
+    return requests_made, recall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=28)
+    parser.add_argument('--run-hours', default='24,6', help="运行间隔(小时)，逗号分隔")
+    parser.add_argument('--busy', type=int, default=4)
+    parser.add_argument('--medium', type=int, default=8)
+    parser.add_argument('--quiet', type=int, default=28)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    rates = make_rates(args.busy, args.medium, args.quiet)
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        for run_hours in [float(hours) for hours in args.run_hours.split(',')]:
+            every = f'every {run_hours:g}h'
+            base_requests, base_recall = simulate(directory, f'{every}, 24h + 1w', rates, args.days, run_hours, False)
+            requests_made, recall = simulate(directory, f'{every}, adaptive', rates, args.days, run_hours, True)
+            print(f'{every}: {base_requests / requests_made:.1f}x fewer requests, '
+                  f'recall {recall - base_recall:+.2%}')
+            ok &= recall >= base_recall
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
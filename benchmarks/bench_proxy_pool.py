@@ -0,0 +1,71 @@
+"""
+代理池基准：单个代理 vs 健康评分的轮换代理池(本地代理桩：快、慢、周期性429、无法连接各一个)
+
+用法: python benchmarks/bench_proxy_pool.py [--sites 40] [--concurrency 8]
+"""
+import argparse
+import logging
+import os
+import socket
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import FakeProxyServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from proxy_pool import ProxyPool
+from step1_game_monitor import GameSiteMonitor
+
+
+def unused_port():
+    """返回一个当前没有监听的端口，模拟已经失效的代理"""
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_once(sites_file, pool, concurrency):
+    scheduler = HostScheduler(max_workers=concurrency,
+                              default_policy=HostPolicy(max_concurrency=concurrency, delay_range=(0, 0)))
+    # 目标地址不需要可达，请求由代理桩直接应答
+    monitor = GameSiteMonitor(sites_file, search_base_url='http://search.invalid/search', scheduler=scheduler,
+                              proxy_pool=pool)
+    units = [(site, tr) for site in monitor.sites for tr in ('24h', '1w')]
+    start = time.perf_counter()
+    batches = scheduler.run(units, monitor._monitor_unit, monitor._unit_host)
+    elapsed = time.perf_counter() - start
+    return len(units), sum(1 for b in batches if b), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=40)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sites_file = os.path.join(directory, 'sites.txt')
+        with open(sites_file, 'w', encoding='utf-8') as f:
+            for i in range(args.sites):
+                f.write(f'https://site{i}.example.com\n')
+
+        with FakeProxyServer(latency=0.05) as fast, FakeProxyServer(latency=0.4) as slow, \
+                FakeProxyServer(latency=0.05, block_every=3) as blocky:
+            dead = f'127.0.0.1:{unused_port()}'
+            runs = (
+                ('single proxy', ProxyPool([blocky.base_url], cooldown=0.2)),
+                ('proxy pool', ProxyPool([fast.base_url, slow.base_url, blocky.base_url, dead], cooldown=1)),
+            )
+            for label, pool in runs:
+                units, ok, elapsed = run_once(sites_file, pool, args.concurrency)
+                print(f'{label:>12}: {ok}/{units} queries returned results in {elapsed:.2f}s')
+                for state in pool.stats():
+                    print(f'{"":>14}{state["proxy"]:<26} score {state["score"]:.2f}, latency {state["latency"]}, '
+                          f'{state["successes"]} ok, {state["failures"]} failed, {state["blocks"]} blocked')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+自适应限速基准：固定激进节奏、固定保守节奏(原来的2-5秒随机等待)与AIMD限速
+在有速率上限的模拟搜索服务上的有效吞吐量和被封禁次数；并检查响应分类
+
+用法: python benchmarks/bench_rate_control.py [--sites 60] [--capacity 8] [--block-mode captcha]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_server import CAPTCHA_PAGE, CONSENT_PAGE, FakeRateLimitedServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from rate_control import AIMDController, BLOCKED, CAPTCHA, CONSENT, EMPTY, OK, classify_response
+from step1_game_monitor import GameSiteMonitor
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serp_corpus')
+
+
+def check_classification(monitor):
+    """结果页应为ok，验证码、同意页面、429和空页面应被识别"""
+    expected = [(200, CAPTCHA_PAGE, CAPTCHA), (200, CONSENT_PAGE, CONSENT), (429, '', BLOCKED),
+                (200, '<html><body></body></html>', EMPTY)]
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.html'))):
+        with open(path, encoding='utf-8') as f:
+            expected.append((200, f.read(), OK))
+    failures = 0
+    for status, text, outcome in expected:
+        results = monitor.extract_search_results(text) if status == 200 else []
+        actual = classify_response(status, text, len(results))
+        if actual != outcome and not (outcome == OK and actual == EMPTY and not results):
+            failures += 1
+            print(f'MISCLASSIFIED: expected {outcome}, got {actual}')
+    return failures
+
+
+def run_once(sites_file, base_url, scheduler):
+    monitor = GameSiteMonitor(sites_file, search_base_url=base_url + '/search', scheduler=scheduler)
+    units = [(site, tr) for site in monitor.sites for tr in ('24h', '1w')]
+    start = time.perf_counter()
+    batches = scheduler.run(units, monitor._monitor_unit, monitor._unit_host)
+    return sum(1 for batch in batches if batch), len(units), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sites', type=int, default=60)
+    parser.add_argument('--capacity', type=int, default=8, help='模拟服务每秒允许的请求数')
+    parser.add_argument('--block-mode', choices=('429', 'captcha'), default='captcha')
+    parser.add_argument('--skip-conservative', action='store_true', help='跳过耗时较长的2-5秒固定等待')
+    args = parser.parse_args()
+    logging.disable(logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as directory:
+        sites_file = os.path.join(directory, 'sites.txt')
+        with open(sites_file, 'w', encoding='utf-8') as f:
+            for i in range(args.sites):
+                f.write(f'https://site{i}.example.com\n')
+
+        failures = check_classification(GameSiteMonitor(sites_file))
+        print(f'classification: {"ok" if not failures else f"{failures} mismatches"}')
+
+        configs = [
+            ('fixed 0s x8', lambda: HostScheduler(default_policy=HostPolicy(8, (0, 0)))),
+            ('AIMD', lambda: HostScheduler(default_policy=HostPolicy(8, (0, 0)), rate_controller=AIMDController(
+                initial_delay=1.0, min_delay=0.1, delay_step=0.1, max_delay=10))),
+        ]
+        if not args.skip_conservative:
+            configs.insert(1, ('fixed 2-5s x4', lambda: HostScheduler(default_policy=HostPolicy(4, (2, 5)))))
+        for label, make_scheduler in configs:
+            with FakeRateLimitedServer(capacity=args.capacity, block_mode=args.block_mode) as server:
+                scheduler = make_scheduler()
+                ok, units, elapsed = run_once(sites_file, server.base_url, scheduler)
+                print(f'{label:>14}: {ok}/{units} queries ok, {server.blocked_count} blocked responses, '
+                      f'{elapsed:.1f}s ({ok / elapsed:.1f} ok/s)')
+                if scheduler.rate_controller is not None:
+                    for host, state in scheduler.rate_controller.stats().items():
+                        print(f'{"":>16}{host}: final delay {state["delay"]}s, window {state["window"]}')
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+启动时间基准：用python -X importtime检查CLI、GUI、step2和守护进程导入时加载的模块，
+较重的库(requests、pandas、bs4、httpx、openai、pytrends、numpy)只能在真正用到时导入；
+同时测量各脚本--help的耗时，以及(有图形环境时)GUI窗口第一次绘制前的耗时
+
+用法: python benchmarks/bench_startup.py [--repeat 5] [--budget-ms 60]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ['step1_game_monitor', 'step1_game_monitor_gui', 'step2_key_extract', 'daemon', 'monitor_core']
+SCRIPTS = ['step1_game_monitor.py', 'step2_key_extract.py', 'daemon.py']
+HEAVY = {'requests', 'pandas', 'bs4', 'lxml', 'httpx', 'openai', 'pytrends', 'numpy'}
+# 单个模块累计导入耗时的默认上限(毫秒)，tests/test_startup.py使用同一个值
+BUDGET_MS = 60
+
+FIRST_WINDOW = '''
+import sys, time
+start = time.perf_counter()
+sys.path.insert(0, {root!r})
+import tkinter as tk
+from step1_game_monitor_gui import GameMonitorGUI
+root = tk.Tk()
+app = GameMonitorGUI(root)
+root.update()
+print(time.perf_counter() - start)
+root.destroy()
+'''
+
+
+def import_profile(module):
+    """
+    在新进程中导入模块，解析-X importtime的输出
+    :return: (模块自身及其依赖的累计导入耗时(毫秒), 导入的顶层包集合)
+    """
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stderr
+    cumulative = 0.0
+    loaded = set()
+    for line in output.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, total, name = line.split('|')
+        if not total.strip().isdigit():
+            continue
+        name = name.strip()
+        loaded.add(name.split('.')[0])
+        if name == module:
+            cumulative = int(total) / 1000
+    return cumulative, loaded
+
+
+def wall_time(command, repeat):
+    """多次运行命令，返回耗时中位数(毫秒)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, capture_output=True, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=BUDGET_MS, help="单个模块的累计导入耗时上限(毫秒)")
+    args = parser.parse_args()
+
+    ok = True
+    for module in MODULES:
+        # 取多次中最快的一次，排除磁盘缓存等干扰
+        profiles = [import_profile(module) for _ in range(args.repeat)]
+        cumulative = min(profile[0] for profile in profiles)
+        heavy = sorted(HEAVY & set().union(*(profile[1] for profile in profiles)))
+        passed = not heavy and cumulative <= args.budget_ms
+        ok &= passed
+        print(f'{"import " + module:>30}: {cumulative:6.1f} ms, heavy modules: {", ".join(heavy) or "none"}'
+              f'{"" if passed else "  FAIL"}')
+
+    baseline = wall_time([sys.executable, '-c', 'pass'], args.repeat)
+    print(f'{"python -c pass":>30}: {baseline:6.1f} ms')
+    for script in SCRIPTS:
+        elapsed = wall_time([sys.executable, script, '--help'], args.repeat)
+        print(f'{script + " --help":>30}: {elapsed:6.1f} ms ({elapsed - baseline:+.1f} ms over bare interpreter)')
+
+    window = subprocess.run([sys.executable, '-c', FIRST_WINDOW.format(root=ROOT)],
+                            cwd=ROOT, capture_output=True, text=True)
+    if window.returncode == 0:
+        print(f'{"GUI first window":>30}: {float(window.stdout) * 1000:6.1f} ms')
+    else:
+        print(f'{"GUI first window":>30}: skipped (no display)')
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Trends抓取调度基准：统计每1000个关键词的请求数和耗时，
+对比旧的每请求2个词与新的4个词+锚点打包方式(使用FakeTrendReq)
+
+用法: python benchmarks/bench_trends.py [--keywords 1000] [--latency 0.01] [--workers 4]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from fake_trends import FakeTrendReq
+from trends_scheduler import TrendsScheduler
+
+
+def legacy_fetch(keywords, factory):
+    """step3原来的做法：每个请求2个词，不做跨批次缩放"""
+    client = factory()
+    for i in range(0, len(keywords), 2):
+        client.build_payload(keywords[i:i + 2], timeframe='today 1-m')
+        client.interest_over_time()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keywords', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.01, help='模拟单次请求延迟(秒)')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate-limit-every', type=int, default=40)
+    args = parser.parse_args()
+
+    keywords = [f'game keyword {i}' for i in range(args.keywords)]
+    per_thousand = 1000 / args.keywords
+
+    FakeTrendReq.reset()
+    start = time.perf_counter()
+    legacy_fetch(keywords, lambda: FakeTrendReq(latency=args.latency))
+    elapsed = time.perf_counter() - start
+    print(f'  legacy (2/payload): {FakeTrendReq.request_count * per_thousand:.0f} requests, '
+          f'{elapsed * per_thousand:.2f}s per 1000 keywords')
+
+    FakeTrendReq.reset()
+    scheduler = TrendsScheduler(
+        max_workers=args.workers, delay_range=(0, 0), base_backoff=0.01, max_backoff=0.1,
+        trendreq_factory=lambda: FakeTrendReq(latency=args.latency, rate_limit_every=args.rate_limit_every)
+    )
+    start = time.perf_counter()
+    trends = scheduler.fetch(keywords)
+    elapsed = time.perf_counter() - start
+    print(f'anchored (4+anchor): {FakeTrendReq.request_count * per_thousand:.0f} requests '
+          f'({scheduler.rate_limited_count} rate limited), {elapsed * per_thousand:.2f}s per 1000 keywords')
+
+    # 缩放后各关键词之间的比例应与真实热度之比一致(允许取整误差)
+    truth = np.array([FakeTrendReq.true_series(k, 30).mean() for k in keywords])
+    measured = trends[keywords].mean().to_numpy()
+    ratio = measured / truth
+    spread = np.nanstd(ratio) / np.nanmean(ratio)
+    print(f'cross-batch scale consistency: relative spread {spread:.3f} (0 means perfectly comparable)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Trends数据存储基准：逐批pd.concat vs 一次性拼接的耗时，宽格式float64 vs 长格式列式仓库的体积，
+并校验从内存映射读回的数据与抓取结果一致
+
+用法: python benchmarks/bench_trends_store.py [--keywords 10000] [--days 30]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trends_store import TrendsStore
+
+
+def synthetic_batches(keywords, days, per_batch=4, seed=5):
+    """生成 (原始值DataFrame, 缩放系数) 批次列表，模拟TrendsScheduler.scale_factors的输出"""
+    rng = np.random.RandomState(seed)
+    index = pd.date_range(end='2026-10-17', periods=days, freq='D', name='date')
+    batches = []
+    for i in range(0, keywords, per_batch):
+        columns = [f'game keyword {j}' for j in range(i, min(i + per_batch, keywords))]
+        frame = pd.DataFrame(rng.randint(0, 101, size=(days, len(columns))), index=index, columns=columns)
+        batches.append((frame, float(rng.uniform(0.2, 5))))
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keywords', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=30)
+    args = parser.parse_args()
+
+    batches = synthetic_batches(args.keywords, args.days)
+
+    start = time.perf_counter()
+    all_trends = pd.DataFrame()
+    for frame, factor in batches:
+        all_trends = pd.concat([all_trends, frame * factor], axis=1)
+    print(f'    repeated concat: {time.perf_counter() - start:.2f}s')
+
+    start = time.perf_counter()
+    raw = pd.concat([frame for frame, _ in batches], axis=1)
+    factors = {column: factor for frame, factor in batches for column in frame.columns}
+    scaled = raw.mul(pd.Series(factors), axis=1)
+    print(f'      single concat: {time.perf_counter() - start:.2f}s')
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TrendsStore(directory)
+        start = time.perf_counter()
+        store.append(raw, factors)
+        write_elapsed = time.perf_counter() - start
+        on_disk = store.nbytes()
+
+        start = time.perf_counter()
+        loaded = TrendsStore(directory).load()
+        load_elapsed = time.perf_counter() - start
+
+        print(f'  wide float64 frame: {all_trends.memory_usage(index=False).sum() / 1e6:.1f} MB in memory')
+        print(f'   columnar store: {on_disk / 1e6:.1f} MB on disk, '
+              f'write {write_elapsed:.2f}s, memmap load {load_elapsed:.2f}s')
+
+        loaded = loaded[scaled.columns]
+        if not (loaded.index.equals(scaled.index) and np.allclose(loaded.to_numpy(), scaled.to_numpy(), rtol=1e-6)):
+            print('MISMATCH: stored series differ from fetched series')
+            sys.exit(1)
+        print('stored series identical (float32 precision)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Trends历史仓库基准：模拟连续多天的每日运行，对比每天全量抓取'today 1-m'与增量更新
+(每天更新，以及每--refresh-days天更新一次)的请求数和抓取的数据量，
+并校验拼接后的长期历史与真实热度的比例是否一致(使用FakeTrendReq)
+
+用法: python benchmarks/bench_trends_warehouse.py [--keywords 200] [--days 120] [--refresh-days 7]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_trends import FakeTrendReq
+from trends_scheduler import TrendsScheduler
+from trends_store import TrendsStore
+from trends_warehouse import TrendsWarehouse
+
+
+def make_scheduler(today):
+    return TrendsScheduler(max_workers=4, delay_range=(0, 0),
+                           trendreq_factory=lambda: FakeTrendReq(latency=0, today=today))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--keywords', type=int, default=200)
+    parser.add_argument('--days', type=int, default=120, help='模拟的每日运行次数')
+    parser.add_argument('--refresh-days', type=int, default=7, help='低频更新时两次更新之间的天数')
+    args = parser.parse_args()
+
+    keywords = [f'game keyword {i}' for i in range(args.keywords)]
+    # 后半段才出现的新关键词
+    late_keywords = [f'new game keyword {i}' for i in range(args.keywords // 4)]
+    first_day = pd.Timestamp('2026-10-17') - pd.Timedelta(days=args.days - 1)
+    run_days = pd.date_range(first_day, periods=args.days, freq='D')
+
+    def keywords_on(day_number):
+        return keywords + late_keywords if day_number >= args.days // 2 else keywords
+
+    FakeTrendReq.reset()
+    full_days = 0
+    start = time.perf_counter()
+    for i, today in enumerate(run_days):
+        raw, _ = make_scheduler(today).fetch_raw(keywords_on(i), 'today 1-m')
+        full_days += raw.size
+    full_elapsed = time.perf_counter() - start
+    full_requests = FakeTrendReq.request_count
+    print(f'{"full refetch":>26}: {full_requests} requests, {full_days} keyword-days fetched, {full_elapsed:.2f}s')
+
+    def run_incremental(store, label, refresh_days=1):
+        FakeTrendReq.reset()
+        incremental_days = 0
+        start = time.perf_counter()
+        for i, today in enumerate(run_days):
+            warehouse = TrendsWarehouse(store, make_scheduler(today), refresh_days=refresh_days)
+            incremental_days += warehouse.update(keywords_on(i), today=today)['days']
+        elapsed = time.perf_counter() - start
+        print(f'{label:>26}: {FakeTrendReq.request_count} requests '
+              f'({1 - FakeTrendReq.request_count / full_requests:.0%} fewer), {incremental_days} keyword-days '
+              f'fetched, {elapsed:.2f}s, {store.nbytes() / 1e3:.0f} KB stored')
+
+    with tempfile.TemporaryDirectory() as directory:
+        run_incremental(TrendsStore(directory), f'incremental, every {args.refresh_days} days', args.refresh_days)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = TrendsStore(directory)
+        run_incremental(store, 'incremental, daily')
+
+        FakeTrendReq.reset()
+        TrendsWarehouse(store, make_scheduler(run_days[-1])).update(keywords_on(args.days), today=run_days[-1])
+        print(f'{"same-day rerun":>26}: {FakeTrendReq.request_count} requests')
+
+        # 拼接后的历史与真实热度之比：同一关键词随时间应保持不变，不同关键词之间也应一致
+        history = store.load()
+        ratios = pd.DataFrame({k: history[k] / FakeTrendReq.true_values(k, history.index) for k in history.columns})
+        drift = (ratios.std() / ratios.mean()).median()
+        spread = ratios.mean().std() / ratios.mean().mean()
+        print(f'history: {len(history)} days x {history.shape[1]} keywords, '
+              f'median drift over time {drift:.3f}, cross-keyword spread {spread:.3f}')
+
+        growth = TrendsWarehouse(store, make_scheduler(run_days[-1])).growth(horizons=(90,), today=run_days[-1])
+        true_growth = {}
+        for keyword in growth.index:
+            current = FakeTrendReq.true_values(keyword, pd.date_range(end=run_days[-1], periods=7)).mean()
+            past = FakeTrendReq.true_values(
+                keyword, pd.date_range(end=run_days[-1] - pd.Timedelta(days=90), periods=7)).mean()
+            true_growth[keyword] = (current - past) / past * 100
+        error = (growth['growth_90d'] - pd.Series(true_growth)).abs().dropna()
+        if len(error):
+            print(f'growth_90d: median absolute error {np.median(error):.2f} percentage points '
+                  f'over {len(error)} keywords')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,490 @@
+"""
+本地模拟服务器，用于离线测试和基准测试
+"""
+import bisect
+import gzip
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+TITLE_TEMPLATES = [
+    'Play {name} Online Free | CrazyGames',
+    '{name} - Play on itch.io',
+    '《{name}》攻略合集',
+    '"{name}" - Free Online Game',
+    '【{name}】手游下载',
+    '[{name}] Coolmath Games',
+]
+
+
+def render_serp(site, tbs, start=0, results_per_page=10):
+    """
+    生成一个结构与Google结果页相近的HTML页面
+    :param site: 查询的网站
+    :param tbs: 时间范围参数
+    :param start: 结果偏移量
+    :param results_per_page: 每页结果数
+    :return: HTML字符串
+    """
+    blocks = [render_result(site, f'{site}|{tbs}|{i}', i) for i in range(start, start + results_per_page)]
+    return render_page(site, blocks)
+
+
+def render_result(site, key, i):
+    """
+    生成一条搜索结果，URL和游戏名由key决定
+    :param site: 结果所属网站
+    :param key: 结果的唯一标识
+    :param i: 序号，决定标题模板
+    """
+    digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+    name = f'Game{digest[:6]}'
+    title = TITLE_TEMPLATES[i % len(TITLE_TEMPLATES)].format(name=name)
+    url = f'{site.rstrip("/")}/games/{digest[:10]}'
+    return (
+        '<div class="g"><div class="tF2Cxc"><div class="yuRUbf">'
+        f'<a href="{url}" data-ved="{digest}"><br><h3 class="LC20lb">{title}</h3>'
+        f'<div class="TbwUpd"><cite>{url}</cite></div></a></div>'
+        f'<div class="VwiC3b"><span>Snippet for {name} &amp; more.</span></div></div></div>'
+    )
+
+
+def render_page(site, blocks):
+    """把结果块拼成结构与Google结果页相近的HTML页面"""
+    return (
+        '<!doctype html><html><head><title>site:' + site + ' - Google Search</title>'
+        '<style>.g{margin:0}</style><script>var x = "<div class=\\"g\\">";</script></head>'
+        '<body><div id="search"><div id="rso">' + ''.join(blocks) + '</div></div>'
+        '<div id="foot"><a href="/search?start=10">Next</a></div></body></html>'
+    )
+
+
+class FakeSearchHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        query = parse_qs(urlparse(self.path).query)
+        site = query.get('q', ['site:unknown'])[0].replace('site:', '', 1)
+        tbs = query.get('tbs', [''])[0]
+        start = int(query.get('start', ['0'])[0])
+        per_page = server.results_per_page
+        total = server.total_for(site)
+        if total is not None:
+            # 有限结果集按num分页，超出总数时像Google一样重复最后一页
+            per_page = int(query.get('num', [per_page])[0])
+            if start >= total:
+                start = max(0, (total - 1) // per_page * per_page)
+            per_page = min(per_page, total - start)
+        body = render_serp(site, tbs, start, per_page).encode('utf-8')
+        self.send_body(body, 'text/html; charset=UTF-8')
+
+    def send_body(self, body, content_type, status=200):
+        """发送响应体，支持ETag条件请求"""
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, handler_class=FakeSearchHandler, latency=0.05, results_per_page=10, port=0,
+                 total_results=None):
+        """
+        :param handler_class: 请求处理类
+        :param latency: 每个请求的模拟延迟(秒)
+        :param results_per_page: 每页返回的结果数
+        :param port: 监听端口，0表示自动分配
+        :param total_results: 每个查询的结果总数(整数或 site -> 整数 的函数)；
+                              None表示每页固定返回results_per_page条，配置后按请求中的num分页
+        """
+        super().__init__(('127.0.0.1', port), handler_class)
+        self.latency = latency
+        self.results_per_page = results_per_page
+        self.total_results = total_results
+        self.request_count = 0
+        self.connection_count = 0
+        self.lock = threading.Lock()
+        self._thread = None
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connection_count += 1
+        super().process_request(request, client_address)
+
+    def total_for(self, site):
+        """查询的结果总数，未配置时为None"""
+        if callable(self.total_results):
+            return self.total_results(site)
+        return self.total_results
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self):
+        """在后台线程中启动服务器"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止服务器"""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeProxyHandler(FakeSearchHandler):
+    """充当HTTP代理的模拟搜索服务：直接处理绝对URL请求，并按设置周期性返回429"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.proxied_count += 1
+            blocked = server.block_every and server.proxied_count % server.block_every == 0
+        if blocked:
+            if server.latency:
+                time.sleep(server.latency)
+            self.send_body(b'Too Many Requests', 'text/plain', status=429)
+            return
+        super().do_GET()
+
+
+class FakeProxyServer(FakeServer):
+    def __init__(self, latency=0.05, block_every=0, results_per_page=10, port=0):
+        """
+        本地代理桩：以代理身份接收请求并直接返回模拟结果页
+        :param latency: 每个请求的模拟延迟(秒)
+        :param block_every: 每N个请求返回一次429，0表示从不
+        :param results_per_page: 每页返回的结果数
+        :param port: 监听端口，0表示自动分配
+        """
+        super().__init__(FakeProxyHandler, latency=latency, results_per_page=results_per_page, port=port)
+        self.block_every = block_every
+        self.proxied_count = 0
+
+
+CAPTCHA_PAGE = (
+    '<html><head><title>https://www.google.com/search</title></head><body>'
+    '<div id="captcha-form"><div class="g-recaptcha" data-sitekey="x"></div></div>'
+    '<div>Our systems have detected unusual traffic from your computer network.</div></body></html>'
+)
+CONSENT_PAGE = (
+    '<html><head><title>Before you continue to Google</title></head><body>'
+    '<form action="https://consent.google.com/save" method="POST"><button>Accept all</button></form>'
+    '</body></html>'
+)
+
+
+class FakeRateLimitedHandler(FakeSearchHandler):
+    """超过每秒请求容量时返回429或验证码页面"""
+
+    def do_GET(self):
+        server = self.server
+        now = time.monotonic()
+        with server.lock:
+            while server.recent and server.recent[0] <= now - 1:
+                server.recent.popleft()
+            over_capacity = len(server.recent) >= server.capacity
+            server.recent.append(now)
+            if over_capacity:
+                server.blocked_count += 1
+        if not over_capacity:
+            super().do_GET()
+            return
+        if server.latency:
+            time.sleep(server.latency)
+        if server.block_mode == 'captcha':
+            self.send_body(CAPTCHA_PAGE.encode('utf-8'), 'text/html; charset=UTF-8')
+        else:
+            self.send_body(b'Too Many Requests', 'text/plain', status=429)
+
+
+class FakeRateLimitedServer(FakeServer):
+    def __init__(self, capacity=10, block_mode='429', latency=0.05, results_per_page=10, port=0):
+        """
+        有速率上限的模拟搜索服务
+        :param capacity: 每秒允许的请求数
+        :param block_mode: 超限时的响应：'429'或'captcha'(状态码200的验证码页面)
+        :param latency: 每个请求的模拟延迟(秒)
+        :param results_per_page: 每页返回的结果数
+        :param port: 监听端口，0表示自动分配
+        """
+        super().__init__(FakeRateLimitedHandler, latency=latency, results_per_page=results_per_page, port=port)
+        self.capacity = capacity
+        self.block_mode = block_mode
+        self.recent = deque()
+        self.blocked_count = 0
+
+
+# 搜索时间范围参数对应的时长(秒)
+TBS_WINDOWS = {'qdr:d': 86400, 'qdr:w': 7 * 86400}
+
+
+class FakeTimelineHandler(FakeSearchHandler):
+    """按模拟时钟只返回查询时间范围内发布的页面，最新的在前，按num分页"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        query = parse_qs(urlparse(self.path).query)
+        site = query.get('q', ['site:unknown'])[0].replace('site:', '', 1)
+        window = TBS_WINDOWS.get(query.get('tbs', [''])[0], 365 * 86400)
+        start = int(query.get('start', ['0'])[0])
+        per_page = int(query.get('num', [server.results_per_page])[0])
+        now = server.clock()
+        indices = server.published_between(site, now - window, now)
+        if indices and start >= len(indices):
+            # 超出结果总数时像Google一样重复最后一页
+            start = (len(indices) - 1) // per_page * per_page
+        blocks = [render_result(site, f'{site}|{index}', index) for index in indices[start:start + per_page]]
+        self.send_body(render_page(site, blocks).encode('utf-8'), 'text/html; charset=UTF-8')
+
+
+class FakeTimelineServer(FakeServer):
+    def __init__(self, rates, clock, start, days, seed=0, latency=0, port=0):
+        """
+        按模拟时钟发布页面的搜索服务：每个网站的发布时刻是给定速率的泊松过程
+        :param rates: {网站: 每天发布的页面数}
+        :param clock: 返回模拟当前时间戳的函数
+        :param start: 模拟开始时间戳，之前一周的页面已经存在
+        :param days: 生成多少天的发布时刻
+        :param seed: 随机种子
+        :param latency: 每个请求的模拟延迟(秒)
+        :param port: 监听端口，0表示自动分配
+        """
+        super().__init__(FakeTimelineHandler, latency=latency, port=port)
+        self.clock = clock
+        self.timelines = {}
+        for site, rate in rates.items():
+            rng = random.Random(f'{seed}|{site}')
+            moments = []
+            moment = start - 7 * 86400
+            while rate > 0:
+                moment += rng.expovariate(rate / 86400)
+                if moment > start + days * 86400:
+                    break
+                moments.append(moment)
+            self.timelines[site] = moments
+
+    def published_between(self, site, low, high):
+        """在[low, high]内发布的页面序号，最新的在前"""
+        moments = self.timelines.get(site, [])
+        return list(range(bisect.bisect_right(moments, high) - 1, bisect.bisect_left(moments, low) - 1, -1))
+
+    def published_urls(self, site, low, high):
+        """在[low, high]内发布的页面URL集合，用于计算召回率"""
+        urls = set()
+        for index in self.published_between(site, low, high):
+            digest = hashlib.md5(f'{site}|{index}'.encode('utf-8')).hexdigest()
+            urls.add(f'{site.rstrip("/")}/games/{digest[:10]}')
+        return urls
+
+
+GAME_WORDS = ['space', 'pixel', 'zombie', 'racing', 'merge', 'tower', 'idle', 'puzzle', 'ninja', 'farm',
+              'drift', 'block', 'candy', 'castle', 'robot', 'ocean', 'sniper', 'jelly', 'dragon', 'sky']
+
+
+class FakeSitemapHandler(BaseHTTPRequestHandler):
+    """
+    模拟游戏网站的robots.txt、sitemap索引、gzip压缩的子sitemap和RSS
+    路径形式为/{site}/...，每个site每天按固定节奏上架新游戏
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = urlparse(self.path).path.strip('/').split('/')
+        site, name = parts[0], '/'.join(parts[1:])
+        base = f'{server.base_url}/{site}'
+        count = server.game_count()
+        if name == 'robots.txt':
+            body = f'User-agent: *\nDisallow: /search\nSitemap: {base}/sitemap_index.xml\n'.encode('utf-8')
+            self.send_body(body, 'text/plain')
+        elif name == 'sitemap_index.xml':
+            chunks = []
+            for k in range(0, count, server.chunk_size):
+                lastmod = server.lastmod(min(count, k + server.chunk_size) - 1)
+                chunks.append(f'<sitemap><loc>{base}/sitemap-{k // server.chunk_size}.xml.gz</loc>'
+                              f'<lastmod>{lastmod}</lastmod></sitemap>')
+            body = ('<?xml version="1.0" encoding="UTF-8"?>'
+                    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    + ''.join(chunks) + '</sitemapindex>').encode('utf-8')
+            self.send_body(body, 'application/xml')
+        elif re.fullmatch(r'sitemap-\d+\.xml\.gz', name):
+            k = int(name.split('-')[1].split('.')[0])
+            entries = [
+                f'<url><loc>{base}/games/{server.slug(site, i)}</loc><lastmod>{server.lastmod(i)}</lastmod></url>'
+                for i in range(k * server.chunk_size, min(count, (k + 1) * server.chunk_size))
+            ]
+            xml = ('<?xml version="1.0" encoding="UTF-8"?>'
+                   '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">' + ''.join(entries) + '</urlset>')
+            self.send_body(gzip.compress(xml.encode('utf-8'), mtime=0), 'application/x-gzip')
+        elif name == 'feed.xml':
+            items = []
+            for i in range(count - 1, max(-1, count - 21), -1):
+                title = server.slug(site, i).replace('-', ' ').title()
+                items.append(f'<item><title>Play {title} Online</title><link>{base}/games/{server.slug(site, i)}</link>'
+                             f'<pubDate>{server.lastmod(i, rfc822=True)}</pubDate></item>')
+            body = ('<?xml version="1.0"?><rss version="2.0"><channel><title>' + site + '</title>'
+                    + ''.join(items) + '</channel></rss>').encode('utf-8')
+            self.send_body(body, 'application/rss+xml')
+        else:
+            self.send_body(b'Not Found', 'text/plain', status=404)
+
+    send_body = FakeSearchHandler.send_body
+
+
+class FakeSitemapServer(FakeServer):
+    def __init__(self, history_days=365, games_per_day=20, chunk_size=1000, latency=0.02, port=0):
+        """
+        模拟公开sitemap和RSS的游戏网站
+        :param history_days: 开始时已有多少天的游戏
+        :param games_per_day: 每天上架的游戏数
+        :param chunk_size: 每个子sitemap包含的URL数
+        :param latency: 每个请求的模拟延迟(秒)
+        :param port: 监听端口，0表示自动分配
+        """
+        super().__init__(FakeSitemapHandler, latency=latency, port=port)
+        self.games_per_day = games_per_day
+        self.chunk_size = chunk_size
+        # 最早的游戏在history_days天前上架，advance()把时钟往后拨
+        self.epoch = time.time() - history_days * 86400
+        self.clock_offset = 0.0
+
+    def now(self):
+        return time.time() + self.clock_offset
+
+    def advance(self, days=1):
+        """时钟前进若干天，期间上架的游戏出现在sitemap中"""
+        self.clock_offset += days * 86400
+
+    def game_count(self):
+        return int((self.now() - self.epoch) / 86400 * self.games_per_day)
+
+    def lastmod(self, index, rfc822=False):
+        """第index个游戏的上架时间(按分钟取整，同一时刻内容不变)"""
+        moment = int(self.epoch + index * 86400 / self.games_per_day) // 60 * 60
+        if rfc822:
+            return time.strftime('%a, %d %b %Y %H:%M:%S GMT', time.gmtime(moment))
+        return time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(moment))
+
+    @staticmethod
+    def slug(site, index):
+        digest = hashlib.md5(f'{site}|{index}'.encode('utf-8')).digest()
+        return f'{GAME_WORDS[digest[0] % 20]}-{GAME_WORDS[digest[1] % 20]}-{digest[2:4].hex()}'
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """兼容OpenAI chat.completions接口的模拟服务，按编号逐行返回关键词"""
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        with server.lock:
+            server.request_count += 1
+            rate_limited = server.rate_limit_every and server.request_count % server.rate_limit_every == 0
+        if server.latency:
+            time.sleep(server.latency)
+
+        if rate_limited:
+            body = json.dumps({'error': {'message': 'Rate limit exceeded', 'type': 'rate_limit'}}).encode('utf-8')
+            self.send_response(429)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        user_content = payload['messages'][-1]['content']
+        with server.lock:
+            server.item_count += max(1, len(NUMBERED_LINE.findall(user_content)))
+        body = json.dumps({
+            'id': 'chatcmpl-fake',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': payload.get('model', 'fake'),
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': fake_keywords(user_content)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        }).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+NUMBERED_LINE = re.compile(r'^\s*(\d+)[.)]\s*(.+)$', re.M)
+
+
+def fake_keywords(user_content):
+    """对编号输入逐行返回关键词，否则返回单个关键词"""
+    items = NUMBERED_LINE.findall(user_content)
+    if not items:
+        return 'kw ' + user_content.split()[0].lower() if user_content.split() else ''
+    return '\n'.join(f'{n}. kw {text.split()[0].lower()}' for n, text in items)
+
+
+class FakeOpenAIServer(FakeServer):
+    def __init__(self, latency=0.2, rate_limit_every=0, port=0):
+        """
+        :param latency: 每次补全的模拟延迟(秒)
+        :param rate_limit_every: 每N个请求返回一次429，0表示不限流
+        :param port: 监听端口，0表示自动分配
+        """
+        super().__init__(FakeOpenAIHandler, latency=latency, port=port)
+        self.rate_limit_every = rate_limit_every
+        self.item_count = 0
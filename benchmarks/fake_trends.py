@@ -0,0 +1,81 @@
+"""
+TrendReq的本地替身：按关键词生成确定的热度曲线，并像真实Trends一样把每个请求内的最大值归一为100
+"""
+import hashlib
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+
+class TooManyRequestsError(Exception):
+    """模拟pytrends.exceptions.TooManyRequestsError"""
+
+
+class FakeTrendReq:
+    lock = threading.Lock()
+    request_count = 0
+
+    def __init__(self, latency=0.05, rate_limit_every=0, days=30, today='2026-10-17'):
+        """
+        :param latency: 每次interest_over_time的模拟延迟(秒)
+        :param rate_limit_every: 每N个请求抛出一次429，0表示不限流
+        :param days: 'today ...'形式的时间范围返回的天数
+        :param today: 'today ...'形式的时间范围的截止日期
+        """
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.days = days
+        self.today = pd.Timestamp(today)
+        self.kw_list = []
+        self.timeframe = 'today 1-m'
+
+    @classmethod
+    def reset(cls):
+        with cls.lock:
+            cls.request_count = 0
+
+    @staticmethod
+    def true_values(keyword, index):
+        """关键词在给定日期上的真实(未归一)热度：基准水平 × 每30天固定比例的复合增长"""
+        seed = int(hashlib.md5(keyword.encode('utf-8')).hexdigest()[:8], 16)
+        level = 5 + seed % 500
+        growth = ((seed >> 9) % 21 - 10) / 100
+        days = (pd.DatetimeIndex(index) - pd.Timestamp('2026-09-18')).days.to_numpy()
+        return level * (1 + growth) ** (days / 30)
+
+    @staticmethod
+    def true_series(keyword, days, today='2026-10-17'):
+        """截止today的最近days天的真实热度"""
+        return FakeTrendReq.true_values(keyword, pd.date_range(end=today, periods=days, freq='D'))
+
+    def build_payload(self, kw_list, cat=0, timeframe='today 1-m', geo='', gprop=''):
+        if len(kw_list) > 5:
+            raise ValueError("Trends accepts at most 5 keywords per payload")
+        self.kw_list = list(kw_list)
+        self.timeframe = timeframe
+
+    def _index(self):
+        """解析'YYYY-MM-DD YYYY-MM-DD'形式的时间范围，其他形式按today和days处理"""
+        parts = self.timeframe.split()
+        if len(parts) == 2 and not parts[0].startswith('today'):
+            return pd.date_range(parts[0], parts[1], freq='D', name='date')
+        return pd.date_range(end=self.today, periods=self.days, freq='D', name='date')
+
+    def interest_over_time(self):
+        with FakeTrendReq.lock:
+            FakeTrendReq.request_count += 1
+            rate_limited = self.rate_limit_every and FakeTrendReq.request_count % self.rate_limit_every == 0
+        if self.latency:
+            time.sleep(self.latency)
+        if rate_limited:
+            raise TooManyRequestsError('The request failed: Google returned a response with code 429')
+
+        index = self._index()
+        raw = {kw: self.true_values(kw, index) for kw in self.kw_list}
+        peak = max(series.max() for series in raw.values())
+        frame = pd.DataFrame({kw: np.rint(series / peak * 100).astype(int) for kw, series in raw.items()},
+                             index=index)
+        frame['isPartial'] = False
+        return frame
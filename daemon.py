@@ -0,0 +1,469 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from urllib.parse import parse_qs, urlparse
+
+from feed_source import FEED
+from metrics import add_arguments, instrumented, metrics
+from result_store import append_csv
+
+# 控制接口默认端口
+DEFAULT_PORT = 8765
+
+
+class MonitorDaemon:
+    def __init__(self, monitor, time_ranges=None, default_interval=3600, site_intervals=None,
+                 min_interval=600, max_interval=6 * 3600, max_recent=1000, clock=time.time):
+        """
+        常驻的监控守护进程：每个网站按各自的刷新间隔轮询，监控器、连接、解析器、缓存和限速状态在各轮之间保持
+        找到新页面的网站缩短间隔(热门网站轮询更频繁)，没有新页面的网站逐步放宽，间隔限制在[min_interval, max_interval]内；
+        监控器配置了PollPlanner时改由它按历史到达速度决定间隔，并为每个网站选择能覆盖间隔的时间范围
+        :param monitor: GameSiteMonitor实例
+        :param time_ranges: 每次轮询一个网站时执行的时间范围，默认只查'24h'
+        :param default_interval: 未单独配置的网站的初始刷新间隔(秒)
+        :param site_intervals: {网站: 初始刷新间隔(秒)} 的单独配置
+        :param min_interval: 最短刷新间隔(秒)
+        :param max_interval: 最长刷新间隔(秒)
+        :param max_recent: 内存中保留供控制接口查询的最近结果条数
+        :param clock: 返回当前时间戳的函数，基准测试中可替换为模拟时钟
+        """
+        self.monitor = monitor
+        self.time_ranges = list(time_ranges or ['24h'])
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        site_intervals = site_intervals or {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.paused = False
+        self.clock = clock
+        self.logger = logging
+        self.started_at = clock()
+        self.cycles = 0
+        self.current_cycle = None
+        self.last_cycle = None
+        # 每个网站的调度状态，启动后所有网站立即到期；有轮询计划时从上次成功查询起算
+        self.sites = {}
+        planner = monitor.planner
+        for site in monitor.sites:
+            interval = site_intervals.get(site, default_interval)
+            next_due = self.started_at
+            if planner is not None:
+                interval = planner.interval_for(site)
+                last = planner.last_success(site)
+                if last is not None:
+                    next_due = min(next_due, last + interval)
+            self.sites[site] = {
+                'interval': self._clamp(interval),
+                'next_due': next_due,
+                'last_run': None,
+                'last_new': None,
+                'total_new': 0,
+            }
+        # 响应缓存的有效期必须短于最短刷新间隔，否则到期的轮询拿到的是上次的缓存页面，
+        # 看不到新结果，间隔会被一直放宽
+        cache = monitor.response_cache
+        if cache is not None and cache.ttl >= min_interval:
+            cache.ttl = min_interval / 2
+            self.logger.info(f"Response cache TTL lowered to {cache.ttl:.0f}s, below the minimum interval")
+        # 最近的新结果，带递增序号，客户端按序号增量获取
+        self.recent = deque(maxlen=max_recent)
+        self.result_seq = 0
+
+    @classmethod
+    def from_config_file(cls, monitor, config_file='config.json', **kwargs):
+        """
+        读取config.json中的'site_intervals'({网站: 初始刷新间隔秒数})创建守护进程
+        :param monitor: GameSiteMonitor实例
+        :param config_file: 配置文件
+        """
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                kwargs.setdefault('site_intervals', json.load(f).get('site_intervals'))
+        return cls(monitor, **kwargs)
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def output_file(self):
+        """当天的结果CSV，与单次运行的文件相同，后续步骤可直接读取"""
+        return f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}.csv'
+
+    def due_sites(self, now=None):
+        """返回已到期的网站，暂停时为空"""
+        now = self.clock() if now is None else now
+        with self.lock:
+            if self.paused:
+                return []
+            return [site for site, state in self.sites.items() if state['next_due'] <= now]
+
+    def seconds_until_due(self):
+        """距离下一个网站到期的秒数；暂停时返回None(一直等到被唤醒)"""
+        with self.lock:
+            if self.paused or not self.sites:
+                return None
+            return max(0.0, min(state['next_due'] for state in self.sites.values()) - self.clock())
+
+    def reschedule(self, site, new_count, now=None):
+        """
+        根据本轮的新结果数调整网站的刷新间隔并安排下一次轮询
+        有新页面时间隔减半，没有时放宽到1.5倍；有轮询计划时使用它按历史估计的间隔
+        """
+        now = self.clock() if now is None else now
+        planner = self.monitor.planner
+        interval = planner.interval_for(site) if planner is not None else None
+        with self.lock:
+            state = self.sites[site]
+            if interval is None:
+                interval = state['interval'] * (0.5 if new_count else 1.5)
+            state['interval'] = self._clamp(interval)
+            state['next_due'] = now + state['interval']
+            state['last_run'] = now
+            state['last_new'] = new_count
+            state['total_new'] += new_count
+
+    def _publish(self, results):
+        """把新结果加入最近结果队列"""
+        with self.lock:
+            for result in results:
+                self.result_seq += 1
+                self.recent.append(dict(result, seq=self.result_seq))
+
+    def run_cycle(self, sites):
+        """
+        执行一轮：并发轮询到期的网站，新结果追加到当天的CSV后提交已见索引
+        :param sites: 本轮轮询的网站列表
+        :return: 本轮的新结果数
+        """
+        planner = self.monitor.planner
+        units = []
+        for site in sites:
+            time_ranges = planner.choose_ranges(site, self.time_ranges) if planner is not None else self.time_ranges
+            if FEED in self.time_ranges and FEED not in time_ranges:
+                time_ranges = time_ranges + [FEED]
+            units.extend((site, time_range) for time_range in time_ranges)
+        cycle = {
+            'number': self.cycles + 1,
+            'started_at': datetime.now().isoformat(timespec='seconds'),
+            'sites': len(sites),
+            'new_results': 0,
+        }
+        with self.lock:
+            self.current_cycle = cycle
+        new_counts = dict.fromkeys(sites, 0)
+        seen_index = self.monitor.seen_index
+        feed_source = self.monitor.feed_source
+        output_file = self.output_file()
+        start = time.perf_counter()
+        try:
+            for site, time_range, results in self.monitor.iter_results(units):
+                results = self.monitor.filter_new(site, time_range, results)
+                append_csv(output_file, results)
+                self._publish(results)
+                new_counts[site] += len(results)
+            # 结果落盘后再提交索引和sitemap状态
+            if seen_index is not None:
+                seen_index.commit()
+            if feed_source is not None:
+                feed_source.commit()
+        except Exception as e:
+            self.logger.error(f"Cycle {cycle['number']} failed: {str(e)}")
+            cycle['error'] = str(e)
+            if seen_index is not None:
+                seen_index.rollback()
+            if feed_source is not None:
+                feed_source.rollback()
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.observe('daemon_cycle', elapsed)
+            now = self.clock()
+            for site in sites:
+                self.reschedule(site, new_counts[site], now)
+            cycle.update(new_results=sum(new_counts.values()), seconds=round(elapsed, 3))
+            with self.lock:
+                self.cycles += 1
+                self.current_cycle = None
+                self.last_cycle = cycle
+        metrics.inc('daemon_new_results', cycle['new_results'])
+        self.logger.info(f"Cycle {cycle['number']}: polled {len(sites)} sites in {elapsed:.1f}s, "
+                         f"{cycle['new_results']} new results")
+        return cycle['new_results']
+
+    def run_forever(self):
+        """调度循环：等待下一个网站到期或被控制接口唤醒，直到stop()"""
+        self.logger.info(f"Daemon started with {len(self.sites)} sites, time ranges {self.time_ranges}")
+        while not self.stopping.is_set():
+            sites = self.due_sites()
+            if not sites:
+                self.wakeup.wait(self.seconds_until_due())
+                self.wakeup.clear()
+                continue
+            self.run_cycle(sites)
+        self.logger.info("Daemon stopped")
+
+    def run_now(self, sites=None):
+        """
+        让指定网站(默认全部)立即到期，并返回它们将在第几轮执行
+        :param sites: 网站列表
+        :return: {'queued': 网站数, 'cycle': 轮次}
+        """
+        with self.lock:
+            queued = [site for site in (sites or self.sites) if site in self.sites]
+            for site in queued:
+                self.sites[site]['next_due'] = 0
+            # 正在执行的一轮不会包含这些网站
+            cycle = self.cycles + (2 if self.current_cycle else 1)
+        self.wakeup.set()
+        return {'queued': len(queued), 'cycle': cycle}
+
+    def pause(self):
+        """暂停调度，正在执行的一轮会继续完成"""
+        with self.lock:
+            self.paused = True
+        self.wakeup.set()
+
+    def resume(self):
+        """恢复调度"""
+        with self.lock:
+            self.paused = False
+        self.wakeup.set()
+
+    def stop(self):
+        """当前一轮完成后退出调度循环"""
+        self.stopping.set()
+        self.wakeup.set()
+
+    def status(self):
+        """
+        守护进程状态
+        :return: 包含运行状态、轮次、各网站调度信息和最新结果序号的字典
+        """
+        def timestamp(value):
+            return datetime.fromtimestamp(value).isoformat(timespec='seconds') if value else None
+
+        with self.lock:
+            if self.stopping.is_set():
+                state = 'stopping'
+            elif self.current_cycle is not None:
+                state = 'running'
+            else:
+                state = 'paused' if self.paused else 'idle'
+            return {
+                'state': state,
+                'started_at': timestamp(self.started_at),
+                'cycles': self.cycles,
+                'current_cycle': dict(self.current_cycle) if self.current_cycle else None,
+                'last_cycle': dict(self.last_cycle) if self.last_cycle else None,
+                'result_seq': self.result_seq,
+                'output_file': os.path.abspath(self.output_file()),
+                'sites': [{
+                    'site': site,
+                    'interval': round(info['interval']),
+                    'next_due': timestamp(info['next_due']),
+                    'last_run': timestamp(info['last_run']),
+                    'last_new': info['last_new'],
+                    'total_new': info['total_new'],
+                } for site, info in self.sites.items()],
+            }
+
+    def results_since(self, seq=0, limit=500):
+        """
+        序号大于seq的最近结果
+        :param seq: 客户端已收到的最大序号
+        :param limit: 最多返回的条数
+        :return: 结果字典列表，按序号递增
+        """
+        with self.lock:
+            return [result for result in self.recent if result['seq'] > seq][:limit]
+
+    def serve(self, port=DEFAULT_PORT, host='127.0.0.1'):
+        """
+        在后台线程中提供本地控制/状态接口(JSON)：
+        GET /status、/results?since=序号、/metrics、/report；POST /run-now、/pause、/resume、/stop
+        :return: HTTP服务器，结束时调用shutdown()和server_close()
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, body, content_type='application/json'):
+                if content_type == 'application/json':
+                    body = json.dumps(body, ensure_ascii=False)
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                if url.path == '/status':
+                    self._send(daemon.status())
+                elif url.path == '/results':
+                    since = int(query.get('since', ['0'])[0])
+                    limit = int(query.get('limit', ['500'])[0])
+                    self._send({'results': daemon.results_since(since, limit)})
+                elif url.path == '/metrics':
+                    self._send(metrics.prometheus_text(), 'text/plain; version=0.0.4')
+                elif url.path == '/report':
+                    self._send(metrics.report())
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    self.send_error(400)
+                    return
+                path = urlparse(self.path).path
+                if path == '/run-now':
+                    self._send(daemon.run_now(payload.get('sites')))
+                elif path == '/pause':
+                    daemon.pause()
+                    self._send({'state': 'paused'})
+                elif path == '/resume':
+                    daemon.resume()
+                    self._send({'state': 'idle'})
+                elif path == '/stop':
+                    daemon.stop()
+                    self._send({'state': 'stopping'})
+                else:
+                    self.send_error(404)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='daemon-http', daemon=True).start()
+        self.logger.info(f"Control API listening on http://{host}:{server.server_address[1]}")
+        return server
+
+
+class DaemonClient:
+    def __init__(self, url=f'http://127.0.0.1:{DEFAULT_PORT}', timeout=5):
+        """
+        守护进程控制接口的客户端，GUI用它连接已运行的守护进程
+        :param url: 守护进程地址
+        :param timeout: 请求超时时间(秒)
+        """
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _request(self, path, payload=None):
+        # GUI启动时不导入urllib.request，点击开始时才需要
+        from urllib.request import Request, urlopen
+        data = None if payload is None else json.dumps(payload).encode('utf-8')
+        request = Request(self.url + path, data=data, headers={'Content-Type': 'application/json'},
+                          method='GET' if data is None else 'POST')
+        with urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read())
+
+    def available(self):
+        """守护进程是否在运行"""
+        try:
+            self._request('/status')
+            return True
+        except Exception:
+            return False
+
+    def status(self):
+        return self._request('/status')
+
+    def results(self, since=0, limit=500):
+        return self._request(f'/results?since={int(since)}&limit={int(limit)}')['results']
+
+    def run_now(self, sites=None):
+        return self._request('/run-now', {'sites': sites})
+
+    def pause(self):
+        return self._request('/pause', {})
+
+    def resume(self):
+        return self._request('/resume', {})
+
+    def stop(self):
+        return self._request('/stop', {})
+
+
+def main():
+    """主函数"""
+    # 只在作为脚本运行时导入，GUI导入DaemonClient时不加载监控器
+    from monitor_core import add_fetch_arguments
+    parser = argparse.ArgumentParser(description="常驻运行的游戏网站监控守护进程")
+    parser.add_argument('--sites-file', default="game_sites.txt", help="游戏网站列表文件")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="本地控制/状态接口端口")
+    parser.add_argument('--interval', type=int, default=3600,
+                        help="网站的初始刷新间隔(秒)，config.json中的site_intervals可单独配置")
+    parser.add_argument('--min-interval', type=int, default=600, help="热门网站的最短刷新间隔(秒)")
+    parser.add_argument('--max-interval', type=int, default=6 * 3600, help="没有新页面的网站的最长刷新间隔(秒)")
+    parser.add_argument('--time-ranges', default='24h', help="每次轮询执行的时间范围，逗号分隔")
+    parser.add_argument('--source', choices=['search', 'feed', 'both'], default='search',
+                        help="新页面来源：site:搜索、网站的sitemap/RSS，或两者都用")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地响应缓存")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="按各网站历史上的新页面速度决定刷新间隔，并在'24h'覆盖不了间隔时改用'1w'")
+    add_fetch_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """按命令行参数启动守护进程，直到收到/stop或Ctrl+C"""
+    # 只在真正启动守护进程时导入监控器，GUI导入DaemonClient时不加载这些模块
+    from feed_source import FeedSource
+    from monitor_core import GameSiteMonitor, create_rate_control
+    from poll_planner import PollPlanner
+    from response_cache import ResponseCache
+    from seen_index import SeenIndex
+    # 缓存有效期短于最短刷新间隔，到期的轮询总能拿到新页面
+    response_cache = None if args.no_cache else ResponseCache(ttl=args.min_interval / 2)
+    seen_index = SeenIndex()
+    planner = None
+    if args.adaptive:
+        planner = PollPlanner(seen_index, min_interval=args.min_interval, max_interval=args.max_interval)
+    _, scheduler, proxy_pool = create_rate_control(args.proxies)
+    feed_source = None
+    time_ranges = [time_range.strip() for time_range in args.time_ranges.split(',') if time_range.strip()]
+    if planner is not None and '1w' not in time_ranges:
+        # 只在间隔超出'24h'的覆盖范围时(例如守护进程停过一段时间)才会用到
+        time_ranges.append('1w')
+    if args.source != 'search':
+        feed_source = FeedSource.from_config_file()
+        time_ranges = [FEED] if args.source == 'feed' else time_ranges + [FEED]
+    import requests
+    # 同一个Session在各轮之间复用长连接
+    session = requests.Session()
+    monitor = GameSiteMonitor(args.sites_file, scheduler=scheduler,
+                              response_cache=response_cache, seen_index=seen_index, proxy_pool=proxy_pool,
+                              max_pages=args.max_pages, feed_source=feed_source, session=session,
+                              planner=planner, engine=args.engine)
+    daemon = MonitorDaemon.from_config_file(monitor, time_ranges=time_ranges, default_interval=args.interval,
+                                            min_interval=args.min_interval, max_interval=args.max_interval)
+    server = daemon.serve(args.port)
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        daemon.logger.info("Interrupted, shutting down")
+    finally:
+        server.shutdown()
+        server.server_close()
+        session.close()
+        for resource in (response_cache, seen_index, feed_source):
+            if resource is not None:
+                resource.close()
+
+
+if __name__ == "__main__":
+    main()
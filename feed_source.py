@@ -0,0 +1,356 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import xml.etree.ElementTree as ET
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import unquote, urljoin, urlparse
+
+from metrics import metrics
+
+# 任务的时间范围标记：通过sitemap/RSS而不是搜索获取新页面
+FEED = 'feed'
+
+# 明显不是游戏详情页的路径
+DEFAULT_SKIP_PATTERN = r'/(?:tags?|categor(?:y|ies)|authors?|page|blog|search|collections?)(?:/|$)'
+
+# 条目元素和其中各字段可能使用的标签(不含命名空间)
+ENTRY_TAGS = {'url', 'sitemap', 'item', 'entry'}
+DATE_TAGS = ('lastmod', 'publication_date', 'pubDate', 'updated', 'published')
+TITLE_TAGS = ('title',)
+
+# 每次解压输出的最大字节数
+INFLATE_LIMIT = 256 * 1024
+
+
+def parse_date(value):
+    """
+    解析sitemap的W3C日期或RSS的RFC 822日期
+    :param value: 日期字符串
+    :return: UTC时间戳(秒)，无法解析时为None
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def title_from_url(url):
+    """
+    sitemap条目没有标题时用URL最后一段路径生成标题，例如 /games/super-bike-race → Super Bike Race
+    :param url: 页面URL
+    :return: 标题，无法生成时为空字符串
+    """
+    segments = [s for s in urlparse(url).path.split('/') if s]
+    if not segments:
+        return ''
+    slug = re.sub(r'\.(?:html?|php|aspx?)$', '', unquote(segments[-1]), flags=re.IGNORECASE)
+    words = re.split(r'[-_+\s]+', slug)
+    return ' '.join(w[:1].upper() + w[1:] for w in words if w)
+
+
+def _local(tag):
+    """去掉'{namespace}'前缀的标签名"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_entries(chunks):
+    """
+    流式解析sitemap、sitemap索引、RSS或Atom，逐条产出条目，处理完的元素立即释放
+    gzip压缩的内容(.xml.gz)按魔数识别并边解压边解析
+    :param chunks: 字节块的可迭代对象，例如response.iter_content()
+    :return: (类型, URL, 日期时间戳, 标题) 生成器；类型为'sitemap'(子sitemap)或'page'
+    """
+    parser = ET.XMLPullParser(events=('start', 'end'))
+    decompressor = None
+    stack = []
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decompressor is None:
+            decompressor = zlib.decompressobj(wbits=31) if chunk[:2] == b'\x1f\x8b' else False
+        if not decompressor:
+            parser.feed(chunk)
+            yield from _read_entries(parser, stack)
+            continue
+        # 压缩率很高，限制每次解压的输出大小，避免一块压缩数据展开成大量未释放的元素
+        while chunk:
+            parser.feed(decompressor.decompress(chunk, INFLATE_LIMIT))
+            yield from _read_entries(parser, stack)
+            chunk = decompressor.unconsumed_tail
+    parser.close()
+    yield from _read_entries(parser, stack)
+
+
+def _read_entries(parser, stack):
+    """取出解析器中已完成的条目元素"""
+    for event, elem in parser.read_events():
+        if event == 'start':
+            stack.append(elem)
+            continue
+        stack.pop()
+        tag = _local(elem.tag)
+        if tag not in ENTRY_TAGS:
+            continue
+
+        loc = date = title = None
+        for child in elem.iter():
+            # 图片扩展中的loc和title描述的是图片，不是页面
+            if child is elem or 'sitemap-image' in child.tag:
+                continue
+            name = _local(child.tag)
+            text = (child.text or '').strip()
+            if name == 'loc' and loc is None:
+                loc = text
+            elif name == 'link' and loc is None:
+                # RSS为<link>文本，Atom为<link href=... rel="alternate">
+                href = child.get('href')
+                if href is None:
+                    loc = text
+                elif child.get('rel', 'alternate') == 'alternate':
+                    loc = href
+            elif name in DATE_TAGS and date is None:
+                date = parse_date(text)
+            elif name in TITLE_TAGS and title is None and text:
+                title = text
+        if loc:
+            yield ('sitemap' if tag == 'sitemap' else 'page'), loc, date, title
+        if stack:
+            # 从父元素上摘掉，解析超大文件时内存不随条目数增长
+            stack[-1].remove(elem)
+
+
+class FeedSource:
+    def __init__(self, path='feed_state.sqlite', feed_urls=None, initial_days=7, rediscover_days=7,
+                 headers=None, proxies=None, timeout=30, skip_pattern=DEFAULT_SKIP_PATTERN):
+        """
+        直接读取网站sitemap和RSS/Atom的新页面来源，替代site:搜索
+        通过条件请求(ETag/Last-Modified)跳过未变化的文件，sitemap索引中lastmod未变的子sitemap不再下载，
+        大文件(包括.gz)边下载边解析
+        :param path: 记录各文件抓取状态的数据库文件
+        :param feed_urls: 可选的 {网站: [sitemap或RSS地址]}，未配置的网站从robots.txt发现，找不到时使用/sitemap.xml
+        :param initial_days: 第一次读取某个文件时只输出最近多少天更新的页面
+        :param rediscover_days: 每隔多少天重新从robots.txt发现sitemap地址
+        :param headers: 请求头
+        :param proxies: requests格式的代理配置
+        :param timeout: 请求超时时间(秒)
+        :param skip_pattern: URL路径匹配此正则时跳过(标签页、分类页等)，None表示不过滤
+        """
+        self.path = path
+        self.feed_urls = {self._site_key(site): list(urls) for site, urls in (feed_urls or {}).items()}
+        self.initial_days = initial_days
+        self.rediscover_days = rediscover_days
+        self.headers = dict(headers or {})
+        self.proxies = proxies
+        self.timeout = timeout
+        self.skip = re.compile(skip_pattern).search if skip_pattern else None
+        self.counters = {'requests': 0, 'not_modified': 0, 'skipped': 0, 'bytes': 0, 'entries': 0, 'new': 0}
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS feeds (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                newest REAL,
+                listed_lastmod REAL,
+                checked_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS sources (
+                site TEXT PRIMARY KEY,
+                urls TEXT NOT NULL,
+                discovered_at REAL NOT NULL
+            )
+        ''')
+        self.conn.commit()
+
+    @classmethod
+    def from_config_file(cls, config_file='config.json', **kwargs):
+        """
+        读取config.json中的'feed_urls'({网站: [sitemap或RSS地址]})创建FeedSource，文件不存在时使用自动发现
+        :param config_file: 配置文件
+        """
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                kwargs.setdefault('feed_urls', json.load(f).get('feed_urls'))
+        return cls(**kwargs)
+
+    @staticmethod
+    def _site_key(site):
+        """网站地址统一为不带结尾斜杠的形式"""
+        site = site.strip().rstrip('/')
+        return site if '://' in site else f'https://{site}'
+
+    def _session(self):
+        """每个线程一个requests.Session，同一网站的多个文件复用连接"""
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            import requests
+            session = self.local.session = requests.Session()
+            session.headers.update(self.headers)
+            if self.proxies:
+                session.proxies.update(self.proxies)
+        return session
+
+    def _count(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.counters[key] += value
+
+    def discover(self, site):
+        """
+        获取网站的sitemap/RSS地址：优先使用配置，其次robots.txt中的Sitemap行，最后是/sitemap.xml
+        :param site: 网站地址
+        :return: 地址列表
+        """
+        site = self._site_key(site)
+        if site in self.feed_urls:
+            return self.feed_urls[site]
+        with self.lock:
+            row = self.conn.execute('SELECT urls, discovered_at FROM sources WHERE site = ?', (site,)).fetchone()
+        if row is not None and time.time() - row[1] < self.rediscover_days * 86400:
+            return row[0].split('\n')
+
+        import requests
+        urls = []
+        try:
+            response = self._session().get(f'{site}/robots.txt', timeout=self.timeout)
+            self._count(requests=1, bytes=len(response.content))
+            if response.status_code == 200:
+                for line in response.text.splitlines():
+                    key, _, value = line.partition(':')
+                    if key.strip().lower() == 'sitemap' and value.strip():
+                        urls.append(urljoin(site + '/', value.strip()))
+        except requests.RequestException as e:
+            logging.warning(f"Could not read robots.txt of {site}: {str(e)}")
+        urls = list(dict.fromkeys(urls)) or [f'{site}/sitemap.xml']
+        with self.lock:
+            self.conn.execute('INSERT OR REPLACE INTO sources (site, urls, discovered_at) VALUES (?, ?, ?)',
+                              (site, '\n'.join(urls), time.time()))
+        return urls
+
+    def _state(self, url):
+        with self.lock:
+            return self.conn.execute(
+                'SELECT etag, last_modified, newest, listed_lastmod FROM feeds WHERE url = ?', (url,)
+            ).fetchone()
+
+    def _save_state(self, url, etag, last_modified, newest, listed_lastmod):
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO feeds (url, etag, last_modified, newest, listed_lastmod, checked_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, newest, listed_lastmod, time.time())
+            )
+
+    def iter_new(self, site):
+        """
+        产出网站自上次运行以来新出现或更新的页面
+        :param site: 网站地址
+        :return: (标题, URL) 生成器
+        """
+        for url in self.discover(site):
+            yield from self._iter_feed(url)
+
+    def _iter_feed(self, url, listed_lastmod=None, depth=0):
+        """
+        读取单个sitemap/RSS文件，递归进入有更新的子sitemap
+        :param url: 文件地址
+        :param listed_lastmod: sitemap索引中给出的该文件lastmod
+        :param depth: 索引嵌套深度
+        """
+        state = self._state(url)
+        etag, last_modified, newest, previous_listed = state if state else (None, None, None, None)
+        if listed_lastmod is not None and previous_listed is not None and listed_lastmod <= previous_listed:
+            self._count(skipped=1)
+            return
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        start = time.perf_counter()
+        response = self._session().get(url, headers=headers, timeout=self.timeout, stream=True)
+        self._count(requests=1)
+        with response:
+            if response.status_code == 304:
+                self._count(not_modified=1)
+                metrics.record_http(urlparse(url).hostname, response, time.perf_counter() - start, nbytes=0)
+                self._save_state(url, etag, last_modified, newest, listed_lastmod)
+                return
+            if response.status_code != 200:
+                metrics.record_http(urlparse(url).hostname, response, time.perf_counter() - start, nbytes=0)
+                logging.warning(f"Fetching {url} returned status code {response.status_code}")
+                return
+
+            # 第一次读取的文件只输出最近initial_days天的页面
+            cutoff = newest if newest is not None else \
+                (datetime.now(timezone.utc) - timedelta(days=self.initial_days)).timestamp()
+            latest = newest
+            children = []
+            entries = new = 0
+            for kind, loc, date, title in iter_entries(response.iter_content(64 * 1024)):
+                if kind == 'sitemap':
+                    children.append((loc, date))
+                    continue
+                entries += 1
+                if date is not None:
+                    latest = date if latest is None else max(latest, date)
+                    if date <= cutoff:
+                        continue
+                if self.skip is not None and self.skip(urlparse(loc).path):
+                    continue
+                title = title or title_from_url(loc)
+                if title:
+                    new += 1
+                    yield title, loc
+            self._count(bytes=response.raw.tell(), entries=entries, new=new)
+            # 流式读取，耗时包含边下载边解析的时间
+            metrics.record_http(urlparse(url).hostname, response, time.perf_counter() - start,
+                                nbytes=response.raw.tell())
+
+        if depth < 2:
+            for child_url, child_lastmod in children:
+                yield from self._iter_feed(child_url, child_lastmod, depth + 1)
+        # 子文件处理完后再记录状态，中途出错时下次仍会重新读取
+        self._save_state(url, response.headers.get('ETag'), response.headers.get('Last-Modified'), latest,
+                         listed_lastmod)
+
+    def commit(self):
+        """结果落盘后提交抓取状态"""
+        with self.lock:
+            self.conn.commit()
+
+    def rollback(self):
+        """放弃本次运行的抓取状态，下次运行重新输出这些页面"""
+        with self.lock:
+            self.conn.rollback()
+
+    def stats(self):
+        """请求数、304次数、跳过的子sitemap数、下载字节数、解析条目数和新页面数"""
+        with self.lock:
+            return dict(self.counters)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+        logging.info(f"Feed source stats: {self.stats()}")
@@ -0,0 +1,141 @@
+import logging
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+
+from metrics import metrics
+
+
+class HostPolicy:
+    def __init__(self, max_concurrency=4, delay_range=(2, 5)):
+        """
+        单个目标主机的礼貌策略
+        :param max_concurrency: 同一主机同时进行的最大请求数
+        :param delay_range: 每个请求槽位完成后的随机等待区间(秒)
+        """
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.delay_range = delay_range
+
+    def next_delay(self):
+        """返回本次请求完成后的等待时间"""
+        low, high = self.delay_range
+        return random.uniform(low, high) if high > 0 else 0
+
+
+class HostScheduler:
+    def __init__(self, max_workers=16, default_policy=None, host_policies=None, rate_controller=None):
+        """
+        按目标主机限流的并发请求调度器
+        :param max_workers: 全局最大并发数
+        :param default_policy: 未单独配置主机时使用的HostPolicy
+        :param host_policies: {主机名: HostPolicy} 的单独配置
+        :param rate_controller: 可选的AIMDController；配置后每个主机的并发数和等待时间由它按响应情况调整，
+                                HostPolicy.max_concurrency作为并发上限
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.default_policy = default_policy or HostPolicy()
+        self.host_policies = dict(host_policies or {})
+        self.rate_controller = rate_controller
+        self.logger = logging
+
+    def policy_for(self, host):
+        """获取主机对应的策略"""
+        return self.host_policies.get(host, self.default_policy)
+
+    @staticmethod
+    def host_of_url(url):
+        """从URL中提取主机名"""
+        return urlparse(url).hostname or ''
+
+    def concurrency_for(self, host):
+        """主机当前允许的并发数"""
+        limit = self.policy_for(host).max_concurrency
+        if self.rate_controller is not None:
+            limit = min(limit, self.rate_controller.window(host))
+        return max(1, limit)
+
+    def delay_for(self, host):
+        """主机上一个请求完成后的等待时间"""
+        if self.rate_controller is not None:
+            return self.rate_controller.next_delay(host)
+        return self.policy_for(host).next_delay()
+
+    def _run_unit(self, fn, unit, host):
+        """执行单个任务，完成后在占用的主机槽位上等待礼貌延时(按完成时的限速状态计算)"""
+        try:
+            return fn(*unit)
+        finally:
+            delay = self.delay_for(host)
+            if delay > 0:
+                metrics.observe('polite_delay', delay, host=host)
+                time.sleep(delay)
+
+    def iter_run(self, units, fn, host_of, follow_up=None):
+        """
+        并发执行任务，按完成顺序产出结果
+        :param units: 任务参数元组列表，例如 [(site, time_range), ...]
+        :param fn: 处理单个任务的函数，调用方式 fn(*unit)
+        :param host_of: 根据任务返回目标主机名的函数
+        :param follow_up: 可选函数 follow_up(unit, result)，返回任务完成后需要追加的任务(例如下一页)；
+                          追加的任务排在同一主机队列的最前面，尽快完成已开始的查询
+        :return: (任务序号, 任务, 结果) 的生成器，追加任务的序号接在units之后
+        """
+        pending = {}
+        active = {}
+        next_index = 0
+        for next_index, unit in enumerate(units, 1):
+            host = host_of(*unit)
+            pending.setdefault(host, deque()).append((next_index - 1, unit))
+            active.setdefault(host, 0)
+
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='fetch') as executor:
+            while pending or running:
+                # 为每个仍有空闲槽位的主机派发任务
+                for host in list(pending):
+                    limit = self.concurrency_for(host)
+                    queue = pending[host]
+                    while queue and active[host] < limit and len(running) < self.max_workers:
+                        index, unit = queue.popleft()
+                        future = executor.submit(self._run_unit, fn, unit, host)
+                        running[future] = (index, unit, host)
+                        active[host] += 1
+                    if not queue:
+                        del pending[host]
+
+                if not running:
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, unit, host = running.pop(future)
+                    active[host] -= 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        self.logger.error(f"Error running {unit}: {str(e)}")
+                        result = []
+                    if follow_up is not None:
+                        extras = list(enumerate(follow_up(unit, result), next_index))
+                        next_index += len(extras)
+                        for extra in reversed(extras):
+                            extra_host = host_of(*extra[1])
+                            pending.setdefault(extra_host, deque()).appendleft(extra)
+                            active.setdefault(extra_host, 0)
+                    yield index, unit, result
+
+    def run(self, units, fn, host_of):
+        """
+        并发执行任务，按提交顺序返回结果列表
+        :param units: 任务参数元组列表
+        :param fn: 处理单个任务的函数
+        :param host_of: 根据任务返回目标主机名的函数
+        :return: 与units顺序一致的结果列表
+        """
+        units = list(units)
+        results = [None] * len(units)
+        for index, _, result in self.iter_run(units, fn, host_of):
+            results[index] = result
+        return results
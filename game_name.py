@@ -0,0 +1,68 @@
+import re
+
+
+class GameNameExtractor:
+    # 按优先级排列的标记：先找书名号，其次英文引号、中文方括号、英文方括号
+    MARKERS = [
+        ('《', '》'),  # 中文书名号
+        ('"', '"'),    # 英文引号
+        ('【', '】'),  # 中文方括号
+        ('[', ']'),    # 英文方括号
+    ]
+    KEYWORDS = ['攻略', '评测', '资讯', '下载', '官网', '专区', '合集', '手游', '网游', '页游', '主机游戏', '单机游戏']
+
+    def __init__(self):
+        """
+        预编译所有规则的游戏名称提取器
+        与逐条re.search的旧实现结果完全一致：按标记优先级返回第一个命中的内容，
+        否则返回去掉常见后缀词后的标题
+        """
+        # 所有标记合成一个正则，只消耗开始符号，内容和结束符号放在前瞻中捕获：
+        # 从左到右扫描一遍标题，不同标记相互重叠时(例如 [a"b]c")每个开始位置仍会被尝试
+        markers = re.compile('|'.join(
+            rf'{re.escape(open_)}(?=(.+?){re.escape(close)})' for open_, close in self.MARKERS
+        ))
+        self._marker_search = markers.search
+        self._marker_iter = markers.finditer
+        self._strip_keywords = re.compile('(' + '|'.join(self.KEYWORDS) + ')').sub
+
+    def extract(self, title):
+        """
+        从标题中提取可能的游戏名称
+        :param title: 页面标题
+        :return: 提取的游戏名称
+        """
+        match = self._marker_search(title)
+        if match:
+            # 每种标记只取第一次出现；从上一个开始符号之后继续扫描，只记录优先级更高的标记
+            priority = match.lastindex
+            name = match.group(priority)
+            if priority > 1:
+                for match in self._marker_iter(title, match.end()):
+                    if match.lastindex < priority:
+                        priority = match.lastindex
+                        name = match.group(priority)
+                        if priority == 1:
+                            break
+            return name
+
+        # 关键词都是中文，纯ASCII标题无需替换
+        if title.isascii():
+            return title.strip()
+        return self._strip_keywords('', title).strip()
+
+    __call__ = extract
+
+    def extract_many(self, titles):
+        """
+        批量提取游戏名称
+        :param titles: 标题列表或pandas Series
+        :return: 与输入类型一致的结果(列表或同索引的Series)
+        """
+        # 标题大多互不相同，按唯一值去重的开销比省下的提取更大
+        if hasattr(titles, 'map'):
+            return titles.map(self.extract)
+        return list(map(self.extract, titles))
+
+
+default_extractor = GameNameExtractor()
@@ -0,0 +1,207 @@
+import queue
+import tkinter as tk
+from tkinter import ttk
+
+
+class UIBridge:
+    def __init__(self, root, interval=100, max_batch=5000):
+        """
+        工作线程与Tk主循环之间的消息队列：任何线程都可以post，Tk主循环按定时器批量取出并交给处理函数
+        Tk控件只能在主线程中操作，工作线程不再直接调用insert/see
+        :param root: Tk根窗口
+        :param interval: 队列为空时两次取消息之间的间隔(毫秒)
+        :param max_batch: 每次最多处理的消息数，积压时分多次处理，保证界面能响应其他事件
+        """
+        self.root = root
+        self.interval = interval
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.handlers = {}
+        self.running = False
+
+    def on(self, kind, handler):
+        """
+        注册消息处理函数
+        :param kind: 消息类型
+        :param handler: 处理函数，参数为同类型的连续消息列表
+        """
+        self.handlers[kind] = handler
+
+    def post(self, kind, item=None):
+        """在任意线程中发送一条消息"""
+        self.queue.put((kind, item))
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self.root.after(self.interval, self._drain)
+
+    def stop(self):
+        self.running = False
+
+    def drain(self):
+        """
+        取出最多max_batch条消息，同类型的连续消息合并后交给处理函数一次，消息之间的先后顺序不变
+        :return: 处理的消息数
+        """
+        groups = []
+        count = 0
+        while count < self.max_batch:
+            try:
+                kind, item = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            if groups and groups[-1][0] == kind:
+                groups[-1][1].append(item)
+            else:
+                groups.append((kind, [item]))
+        for kind, items in groups:
+            self.handlers[kind](items)
+        return count
+
+    def _drain(self):
+        if not self.running:
+            return
+        count = self.drain()
+        # 还有积压时尽快继续，中间让Tk处理重绘和输入事件
+        self.root.after(1 if count >= self.max_batch else self.interval, self._drain)
+
+
+class RingLog:
+    def __init__(self, text, max_lines=5000):
+        """
+        只保留最后max_lines行的日志视图，超出的行从头部删除，内存和重绘开销不随运行时间增长
+        :param text: tk.Text控件
+        :param max_lines: 最多保留的行数
+        """
+        self.text = text
+        self.max_lines = max_lines
+        self.lines = 0
+
+    def extend(self, messages):
+        """
+        一次插入一批消息；视图停在末尾时才自动滚动，用户向上翻看时不打断
+        :param messages: 消息列表，单条消息可以包含多行
+        """
+        if not messages:
+            return
+        chunk = '\n'.join(messages) + '\n'
+        lines = chunk.count('\n')
+        if lines > self.max_lines:
+            chunk = '\n'.join(chunk.split('\n')[-self.max_lines - 1:])
+            lines = self.max_lines
+        at_end = self.text.yview()[1] >= 0.999
+        self.text.insert(tk.END, chunk)
+        self.lines += lines
+        excess = self.lines - self.max_lines
+        if excess > 0:
+            self.text.delete('1.0', f'{excess + 1}.0')
+            self.lines -= excess
+        if at_end:
+            self.text.see(tk.END)
+
+    def clear(self):
+        self.text.delete('1.0', tk.END)
+        self.lines = 0
+
+
+class VirtualTable:
+    def __init__(self, parent, columns, widths=None, max_rows=200000, row_height=20):
+        """
+        虚拟化的结果表：数据保存在列表中，Treeview只保留可见的行，滚动时改写这些行的内容
+        几万行结果也只有一屏的控件项，插入和滚动的开销与总行数无关
+        :param parent: 父控件
+        :param columns: (列名, 标题) 列表
+        :param widths: 各列宽度(像素)
+        :param max_rows: 最多保留的行数，超出时丢弃最早的行
+        :param row_height: 行高(像素)，用于由控件高度计算可见行数
+        """
+        self.columns = [name for name, _ in columns]
+        self.max_rows = max_rows
+        self.row_height = row_height
+        self.rows = []
+        self.offset = 0
+        self.visible = 20
+        # 视图停在末尾时新行到达后自动跟随
+        self.follow = True
+
+        self.frame = ttk.Frame(parent)
+        self.tree = ttk.Treeview(self.frame, columns=self.columns, show='headings', selectmode='browse')
+        for i, (name, heading) in enumerate(columns):
+            self.tree.heading(name, text=heading)
+            if widths:
+                self.tree.column(name, width=widths[i], stretch=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient=tk.VERTICAL, command=self.yview)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.tree.bind('<Configure>', self._on_resize)
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll(-1 if event.delta > 0 else 1, 'units', 3))
+        self.tree.bind('<Button-4>', lambda event: self.scroll(-1, 'units', 3))
+        self.tree.bind('<Button-5>', lambda event: self.scroll(1, 'units', 3))
+
+    def pack(self, **kwargs):
+        self.frame.pack(**kwargs)
+
+    def extend(self, rows):
+        """
+        追加一批行，只重绘可见部分
+        :param rows: 行列表，每行是与columns对应的值序列
+        """
+        self.rows.extend(rows)
+        excess = len(self.rows) - self.max_rows
+        if excess > 0:
+            del self.rows[:excess]
+            self.offset = max(0, self.offset - excess)
+        if self.follow:
+            self.offset = max(0, len(self.rows) - self.visible)
+        self.render()
+
+    def clear(self):
+        self.rows = []
+        self.offset = 0
+        self.follow = True
+        self.render()
+
+    def yview(self, action, value, unit=None):
+        """滚动条的回调：moveto拖动到比例位置，scroll按行或按页滚动"""
+        if action == 'moveto':
+            self.scroll_to(int(float(value) * len(self.rows)))
+        else:
+            self.scroll(int(value), unit)
+
+    def scroll(self, amount, unit='units', step=1):
+        amount *= self.visible if unit == 'pages' else step
+        self.scroll_to(self.offset + amount)
+        return 'break'
+
+    def scroll_to(self, offset):
+        last = max(0, len(self.rows) - self.visible)
+        self.offset = min(max(0, offset), last)
+        self.follow = self.offset >= last
+        self.render()
+
+    def _on_resize(self, event):
+        # 表头约占一行
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.scroll_to(len(self.rows) if self.follow else self.offset)
+
+    def render(self):
+        """把rows[offset:offset + visible]写入Treeview中固定的几个控件项"""
+        window = self.rows[self.offset:self.offset + self.visible]
+        items = self.tree.get_children()
+        for item in items[len(window):]:
+            self.tree.delete(item)
+        for i, values in enumerate(window):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert('', tk.END, values=values)
+        total = len(self.rows)
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(window)) / total)
+        else:
+            self.scrollbar.set(0, 1)
@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+def normalize_text(text):
+    """规范化输入文本：Unicode兼容归一、忽略大小写并合并空白"""
+    return ' '.join(unicodedata.normalize('NFKC', text).casefold().split())
+
+
+class KeywordCache:
+    def __init__(self, path='keyword_cache.sqlite', max_entries=200000):
+        """
+        按内容寻址的LLM关键词缓存
+        缓存键由规范化后的输入文本、模型名称和系统提示共同决定，任一变化都不会命中旧结果
+        :param path: 缓存数据库文件
+        :param max_entries: 最大条目数，超出时按最近最少使用淘汰
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS keywords (
+                key TEXT PRIMARY KEY,
+                keyword TEXT NOT NULL,
+                model TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_keywords_accessed ON keywords(accessed_at)')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text, model_name, sys_prompt):
+        """计算缓存键"""
+        material = '\0'.join([model_name, sys_prompt, normalize_text(text)])
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def get_many(self, keys):
+        """
+        批量查询缓存
+        :param keys: 缓存键列表
+        :return: {缓存键: 关键词}，只包含命中的键
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self.lock:
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i:i + 500]
+                placeholders = ','.join('?' * len(chunk))
+                found.update(self.conn.execute(
+                    f'SELECT key, keyword FROM keywords WHERE key IN ({placeholders})', chunk
+                ).fetchall())
+            now = time.time()
+            self.conn.executemany('UPDATE keywords SET accessed_at = ? WHERE key = ?',
+                                  [(now, key) for key in found])
+            self.conn.commit()
+        hit_count = sum(1 for key in keys if key in found)
+        self.hits += hit_count
+        self.misses += len(keys) - hit_count
+        return found
+
+    def put_many(self, items, model_name):
+        """
+        批量写入缓存，空关键词(提取失败)不缓存
+        :param items: (缓存键, 关键词) 列表
+        :param model_name: 模型名称
+        """
+        now = time.time()
+        rows = [(key, keyword, model_name, now, now) for key, keyword in items if keyword]
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO keywords (key, keyword, model, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """按最近最少使用淘汰超出上限的条目"""
+        count = self.conn.execute('SELECT COUNT(*) FROM keywords').fetchone()[0]
+        if count > self.max_entries:
+            self.conn.execute(
+                'DELETE FROM keywords WHERE key IN (SELECT key FROM keywords ORDER BY accessed_at LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def report(self):
+        """输出命中统计"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0
+        logging.info(f"关键词缓存: 命中 {self.hits}, 未命中 {self.misses}, 命中率 {rate:.1f}%")
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
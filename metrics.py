@@ -0,0 +1,309 @@
+import io
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Prometheus指标名前缀
+PREFIX = 'game_monitor'
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _quantile(samples, q):
+    """样本的q分位数(最近秩法)"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    def __init__(self, max_samples=10000):
+        """
+        线程安全的运行指标：计数器和耗时统计，按名称和标签(主机、网站、阶段等)分别累计
+        :param max_samples: 每个耗时序列保留的最大样本数(超出后蓄水池抽样)，用于计算分位数
+        """
+        self.max_samples = max_samples
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """清空所有指标，重新开始计时"""
+        with self.lock:
+            self.started_at = time.time()
+            self.counters = {}
+            self.timers = {}
+
+    def inc(self, name, value=1, **labels):
+        """
+        计数器加value
+        :param name: 指标名，例如'http_bytes'
+        :param labels: 标签，例如host='www.google.com'
+        """
+        key = _key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """
+        记录一次耗时
+        :param name: 指标名，例如'http_ttfb'
+        :param seconds: 耗时(秒)
+        """
+        key = _key(name, labels)
+        with self.lock:
+            timer = self.timers.get(key)
+            if timer is None:
+                timer = self.timers[key] = {'count': 0, 'sum': 0.0, 'max': 0.0, 'samples': []}
+            timer['count'] += 1
+            timer['sum'] += seconds
+            timer['max'] = max(timer['max'], seconds)
+            if len(timer['samples']) < self.max_samples:
+                timer['samples'].append(seconds)
+            else:
+                slot = random.randrange(timer['count'])
+                if slot < self.max_samples:
+                    timer['samples'][slot] = seconds
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """计时上下文，退出时(包括异常)记录耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def record_http(self, host, response, seconds, nbytes=None):
+        """
+        记录一次requests请求：总耗时、首字节时间(含建立连接)、下载时间、字节数和状态码
+        :param host: 目标主机
+        :param response: requests.Response
+        :param seconds: 请求总耗时(秒)
+        :param nbytes: 响应字节数，默认取len(response.content)；流式读取时由调用方传入
+        """
+        self.observe('http_fetch', seconds, host=host)
+        elapsed = getattr(response, 'elapsed', None)
+        if elapsed is not None:
+            ttfb = elapsed.total_seconds()
+            self.observe('http_ttfb', ttfb, host=host)
+            self.observe('http_download', max(0.0, seconds - ttfb), host=host)
+        if nbytes is None:
+            nbytes = len(response.content or b'')
+        self.inc('http_bytes', nbytes, host=host)
+        self.inc('http_responses', host=host, status=response.status_code)
+
+    def httpx_trace(self, host):
+        """
+        生成httpx的trace回调，把连接(含DNS解析)、TLS握手、首字节和下载时间分别计入指标
+        用法: await client.get(url, extensions={'trace': metrics.httpx_trace(host)})
+        """
+        stages = {
+            'connection.connect_tcp': 'http_connect',
+            'connection.start_tls': 'http_tls',
+            'http11.receive_response_headers': 'http_ttfb',
+            'http2.receive_response_headers': 'http_ttfb',
+            'http11.receive_response_body': 'http_download',
+            'http2.receive_response_body': 'http_download',
+        }
+        started = {}
+
+        async def trace(event_name, info):
+            stage, _, phase = event_name.rpartition('.')
+            if stage not in stages:
+                return
+            if phase == 'started':
+                started[stage] = time.perf_counter()
+            elif phase in ('complete', 'failed') and stage in started:
+                self.observe(stages[stage], time.perf_counter() - started.pop(stage), host=host)
+
+        return trace
+
+    def _series(self, table):
+        return [(name, dict(labels), value) for (name, labels), value in sorted(table.items())]
+
+    def report(self):
+        """
+        机器可读的运行报告
+        :return: {'started_at', 'elapsed', 'stages': {指标名: 累计秒数}, 'timers': [...], 'counters': [...]}
+        """
+        with self.lock:
+            timers = self._series({k: dict(v, samples=list(v['samples'])) for k, v in self.timers.items()})
+            counters = self._series(self.counters)
+            started_at = self.started_at
+        stages = {}
+        for name, _, timer in timers:
+            stages[name] = stages.get(name, 0.0) + timer['sum']
+        return {
+            'started_at': datetime.fromtimestamp(started_at).isoformat(timespec='seconds'),
+            'elapsed': round(time.time() - started_at, 3),
+            # 各类耗时的合计，按从大到小排列，定位时间花在哪里
+            'stages': {name: round(total, 3) for name, total in sorted(stages.items(), key=lambda x: -x[1])},
+            'timers': [{
+                'name': name,
+                'labels': labels,
+                'count': timer['count'],
+                'sum': round(timer['sum'], 6),
+                'mean': round(timer['sum'] / timer['count'], 6),
+                'p50': round(_quantile(timer['samples'], 0.5), 6),
+                'p95': round(_quantile(timer['samples'], 0.95), 6),
+                'max': round(timer['max'], 6),
+            } for name, labels, timer in timers],
+            'counters': [{'name': name, 'labels': labels, 'value': value} for name, labels, value in counters],
+        }
+
+    def write_report(self, path):
+        """把运行报告写入JSON文件"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, ensure_ascii=False, indent=2)
+        logging.info(f"Metrics report saved to {path}")
+
+    def summary(self, top=8):
+        """耗时最多的几类操作，用于日志"""
+        stages = self.report()['stages']
+        return ', '.join(f"{name} {seconds:.1f}s" for name, seconds in list(stages.items())[:top])
+
+    def prometheus_text(self):
+        """Prometheus文本格式的指标：计数器为counter，耗时为带分位数的summary"""
+        report = self.report()
+        lines = []
+        typed = set()
+
+        def labels_text(labels, extra=None):
+            items = list(labels.items()) + list((extra or {}).items())
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{_escape(str(v))}"' for k, v in items) + '}'
+
+        for counter in report['counters']:
+            name = f"{PREFIX}_{counter['name']}_total"
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} counter')
+            lines.append(f"{name}{labels_text(counter['labels'])} {counter['value']}")
+        for timer in report['timers']:
+            name = f"{PREFIX}_{timer['name']}_seconds"
+            if name not in typed:
+                typed.add(name)
+                lines.append(f'# TYPE {name} summary')
+            for q in ('0.5', '0.95'):
+                value = timer['p50'] if q == '0.5' else timer['p95']
+                lines.append(f"{name}{labels_text(timer['labels'], {'quantile': q})} {value}")
+            lines.append(f"{name}_sum{labels_text(timer['labels'])} {timer['sum']}")
+            lines.append(f"{name}_count{labels_text(timer['labels'])} {timer['count']}")
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """
+        在后台线程中提供/metrics(Prometheus文本格式)和/report(JSON)
+        :return: HTTP服务器，结束时调用shutdown()和server_close()
+        """
+        # 只有启用指标服务时才需要http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith('/metrics'):
+                    body, content_type = registry.prometheus_text(), 'text/plain; version=0.0.4'
+                elif self.path.startswith('/report'):
+                    body, content_type = json.dumps(registry.report(), ensure_ascii=False), 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                data = body.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+        logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+
+# 全局指标，各模块共用
+metrics = Metrics()
+
+
+@contextmanager
+def profiled(path, top=25):
+    """
+    用cProfile分析代码块，包括期间新启动的工作线程；结果写入path(可用pstats或snakeviz查看)，
+    并在日志中输出累计耗时最多的函数
+    整个进程的采样分析可用 py-spy record --threads -o profile.svg -- python pipeline.py，线程按阶段命名
+    :param path: 输出文件
+    :param top: 日志中显示的函数数
+    """
+    import cProfile
+    import pstats
+    profiles = []
+    lock = threading.Lock()
+
+    def start_thread_profile(*_):
+        # 新线程执行的第一个事件触发，之后由该线程自己的Profile接管
+        profile = cProfile.Profile()
+        with lock:
+            profiles.append(profile)
+        profile.enable()
+
+    main = cProfile.Profile()
+    threading.setprofile(start_thread_profile)
+    main.enable()
+    try:
+        yield
+    finally:
+        main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(main)
+        with lock:
+            for profile in profiles:
+                stats.add(profile)
+        stats.dump_stats(path)
+        text = io.StringIO()
+        stats.stream = text
+        stats.sort_stats('cumulative').print_stats(top)
+        logging.info(f"Profile saved to {path} ({len(profiles)} worker threads)\n{text.getvalue()}")
+
+
+def add_arguments(parser):
+    """为命令行添加--report、--metrics-port和--profile参数"""
+    parser.add_argument('--report', help="运行结束后把指标报告(JSON)写入此文件")
+    parser.add_argument('--metrics-port', type=int, help="在此端口提供Prometheus文本格式的/metrics")
+    parser.add_argument('--profile', help="用cProfile分析整个运行(包括工作线程)，结果写入此文件")
+
+
+@contextmanager
+def instrumented(args):
+    """
+    按命令行参数启动指标服务和性能分析，结束时写出报告
+    :param args: 包含add_arguments所加参数的argparse结果
+    """
+    metrics.reset()
+    server = metrics.serve(args.metrics_port) if args.metrics_port else None
+    try:
+        with profiled(args.profile) if args.profile else nullcontext():
+            yield metrics
+    finally:
+        logging.info(f"Time by stage: {metrics.summary()}")
+        if args.report:
+            metrics.write_report(args.report)
+        if server is not None:
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,522 @@
+import logging
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from feed_source import FEED
+from fetch_scheduler import HostScheduler
+from game_name import default_extractor
+from metrics import metrics
+from proxy_pool import ProxyPool
+from rate_control import CAPTCHA, CONSENT, EMPTY, OK, AIMDController, classify_response
+from result_store import ResultStore, ResultSet, write_csv
+from serp_parser import get_parser
+
+# 每页请求的结果数
+PAGE_SIZE = 100
+
+# 可选的抓取引擎
+ENGINES = ('threads', 'async')
+
+
+def add_fetch_arguments(parser):
+    """为命令行添加CLI、流水线和守护进程共用的--proxies、--max-pages和--engine参数"""
+    parser.add_argument('--proxies', help="代理列表文件(每行一个host:port)，默认读取config.json中的proxy_pool")
+    parser.add_argument('--max-pages', type=int, default=5, help="每个查询最多翻的页数，1表示只取第一页")
+    parser.add_argument('--engine', choices=ENGINES, default='threads',
+                        help="抓取引擎：按主机调度的线程池，或基于httpx长连接的asyncio引擎")
+
+
+def create_rate_control(proxies=None):
+    """
+    创建按主机和按代理的自适应限速，二者共用一个AIMD控制器
+    :param proxies: 代理列表文件，默认读取config.json中的proxy_pool
+    :return: (AIMDController, HostScheduler, ProxyPool或None)
+    """
+    rate_controller = AIMDController()
+    if proxies:
+        proxy_pool = ProxyPool.from_file(proxies, rate_controller=rate_controller)
+    else:
+        proxy_pool = ProxyPool.from_config_file(rate_controller=rate_controller)
+    return rate_controller, HostScheduler(rate_controller=rate_controller), proxy_pool
+
+
+def log_rate_control(logger, rate_controller, proxy_pool=None):
+    """运行结束后记录各主机的限速状态和各代理的表现"""
+    for key, state in rate_controller.stats().items():
+        logger.info(f"Rate control {key}: delay {state['delay']}s, window {state['window']}, "
+                    f"outcomes {state['outcomes']}")
+    if proxy_pool is not None:
+        for state in proxy_pool.stats():
+            logger.info(f"Proxy {state['proxy']}: score {state['score']}, {state['successes']} ok, "
+                        f"{state['failures']} failed, {state['blocks']} blocked")
+
+
+class GameSiteMonitor:
+    def __init__(self, sites_file="game_sites.txt", proxy_host=None, proxy_port=None, logger_callback=None,
+                 search_base_url="https://www.google.com/search", scheduler=None, parser_backend='auto',
+                 response_cache=None, seen_index=None, proxy_pool=None, max_pages=5,
+                 feed_source=None, session=None, planner=None,
+                 output_format='game_monitor_results_%Y%m%d.csv', result_callback=None, parse_pool=None,
+                 engine='threads'):
+        """
+        初始化监控器
+        :param sites_file: 包含游戏网站列表的文本文件
+        :param proxy_host: 代理主机地址
+        :param proxy_port: 代理端口
+        :param logger_callback: 日志回调函数，例如GUI的进度显示
+        :param search_base_url: 搜索接口地址，可替换为本地模拟服务器
+        :param scheduler: 并发请求调度器，默认按主机限流
+        :param parser_backend: 搜索结果解析后端('auto', 'lxml', 'stream', 'html.parser')
+        :param response_cache: 可选的ResponseCache，命中时不再重复下载
+        :param seen_index: 可选的SeenIndex，配置后只输出以前运行中未出现过的URL
+        :param proxy_pool: 可选的ProxyPool，配置后请求在多个代理间轮换，优先于proxy_host/proxy_port
+        :param max_pages: 每个查询最多翻的页数，某页没有新URL时提前停止
+        :param feed_source: 可选的FeedSource；time_range为'feed'的任务从网站的sitemap/RSS获取新页面
+        :param session: 可选的requests.Session，长期运行时复用长连接；默认每次请求单独建立连接
+        :param planner: 可选的PollPlanner，配置后按各网站的新页面速度决定本次查询哪些网站和时间范围，
+                        需要同时配置seen_index
+        :param output_format: 导出CSV的文件名(strftime格式)，默认每天一个文件
+        :param result_callback: 结果回调函数，导出时对每个查询以(site, time_range, 过滤后的新结果)调用，例如GUI的结果表
+        :param parse_pool: 可选的ParsePool，配置后搜索结果页交给工作进程解析，抓取线程只传递原始响应
+        :param engine: 抓取引擎，'threads'为按主机调度的线程池，'async'为基于httpx长连接的asyncio引擎
+        """
+        self.sites = self._load_sites(sites_file)
+        self.search_base_url = search_base_url
+        self.scheduler = scheduler or HostScheduler()
+        self.serp_parser = get_parser(parser_backend)
+        self.response_cache = response_cache
+        self.seen_index = seen_index
+        self.headers = {
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+        }
+
+        # 设置代理
+        self.proxies = None
+        if proxy_host and proxy_port:
+            self.proxies = {
+                'http': f'http://{proxy_host}:{proxy_port}',
+                'https': f'http://{proxy_host}:{proxy_port}'
+            }
+
+        self.proxy_pool = proxy_pool
+        self.max_pages = max(1, int(max_pages))
+        self.feed_source = feed_source
+        if session is None:
+            # requests导入较慢，创建监控器时才导入
+            import requests
+            session = requests
+        self.session = session
+        self.planner = planner
+        # 本次运行中被封禁或出错的(site, time_range)，这些查询不算成功覆盖
+        self.failed_queries = set()
+        self.logger_callback = logger_callback
+        self.result_callback = result_callback
+        self.parse_pool = parse_pool
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}")
+        self.engine = engine
+        self.output_format = output_format
+        self.last_output_file = None
+        self.setup_logging()
+
+    def setup_logging(self):
+        """设置日志"""
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(levelname)s - %(message)s',
+            handlers=[
+                logging.FileHandler('game_monitor.log'),
+                logging.StreamHandler()
+            ]
+        )
+        self.logger = logging
+
+    def _load_sites(self, filename):
+        """加载网站列表"""
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                return [line.strip() for line in f if line.strip()]
+        except FileNotFoundError:
+            raise Exception(f"Sites file {filename} not found!")
+        except Exception as e:
+            raise Exception(f"Error loading sites file: {str(e)}")
+
+    def log_message(self, message, level=logging.INFO):
+        """
+        统一的日志记录函数，同时转发给日志回调
+        :param message: 日志内容
+        :param level: 日志级别
+        """
+        if self.logger_callback:
+            self.logger_callback(message)
+        self.logger.log(level, message)
+
+    def build_google_search_url(self, site, time_range, start=0):
+        """
+        构建Google搜索URL
+        :param site: 网站域名
+        :param time_range: 时间范围('24h' or '1w')
+        :param start: 结果偏移量，翻页时为PAGE_SIZE的倍数
+        :return: 编码后的搜索URL
+        """
+        base_url = self.search_base_url
+        if time_range == '24h':
+            tbs = 'qdr:d'  # 最近24小时
+        elif time_range == '1w':
+            tbs = 'qdr:w'  # 最近1周
+        else:
+            raise ValueError("Invalid time range")
+
+        query = f'site:{site}'
+        params = {
+            'q': query,
+            'tbs': tbs,
+            'num': PAGE_SIZE  # 每页结果数
+        }
+        if start:
+            params['start'] = start
+
+        query_string = '&'.join([f'{k}={quote(str(v))}' for k, v in params.items()])
+        return f"{base_url}?{query_string}"
+
+    def extract_search_results(self, html_content):
+        """
+        从Google搜索结果页面提取信息
+        :param html_content: 页面HTML内容
+        :return: 提取的URL和标题列表
+        """
+        results = []
+
+        # 查找搜索结果
+        with metrics.timer('serp_parse'):
+            pairs = list(self.serp_parser.parse(html_content))
+        start = time.perf_counter()
+        for title, url in pairs:
+            try:
+                # 提取可能的游戏名称
+                game_name = self.extract_game_name(title)
+
+                if game_name:
+                    results.append({
+                        'title': title,
+                        'url': url,
+                        'game_name': game_name
+                    })
+            except Exception as e:
+                self.log_message(f"Error extracting result: {str(e)}", logging.ERROR)
+        metrics.observe('game_name_extract', time.perf_counter() - start)
+
+        return results
+
+    def extract_game_name(self, title):
+        """
+        从标题中提取可能的游戏名称
+        :param title: 页面标题
+        :return: 提取的游戏名称或None
+        """
+        # 规则统一在GameNameExtractor中预编译，CLI与GUI共用
+        return default_extractor.extract(title)
+
+    def fetch_page(self, url):
+        """
+        获取页面，配置了缓存时优先使用缓存(缓存键包含代理)
+        :param url: 请求URL
+        :return: 带status_code和text属性的响应
+        """
+        def do_get(extra_headers=None):
+            headers = {**self.headers, **(extra_headers or {})}
+            start = time.perf_counter()
+            if self.proxy_pool is not None:
+                response = self.proxy_pool.get(url, headers=headers, timeout=30)
+            else:
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    proxies=self.proxies,
+                    timeout=30  # 添加超时设置
+                )
+            metrics.record_http(self.scheduler.host_of_url(url), response, time.perf_counter() - start)
+            return response
+
+        if self.response_cache is not None:
+            return self.response_cache.fetch(url, do_get, proxy=self.cache_proxy())
+        return do_get()
+
+    def cache_proxy(self):
+        """响应缓存键中的代理部分"""
+        if self.proxy_pool is not None:
+            # 代理池中的代理可互换，共用同一组缓存
+            return 'proxy-pool'
+        return self.proxies['https'] if self.proxies else None
+
+    def monitor_site(self, site, time_range, start=0):
+        """
+        监控单个网站
+        :param site: 网站域名
+        :param time_range: 时间范围
+        :param start: 结果偏移量
+        :return: 搜索结果列表
+        """
+        search_url = self.build_google_search_url(site, time_range, start)
+        page = f" (page {start // PAGE_SIZE + 1})" if start else ""
+        self.log_message(f"Monitoring {site} for {time_range} timeframe{page}")
+
+        try:
+            response = self.fetch_page(search_url)
+            # 使用解析进程池时直接传递原始字节，解码也在工作进程中完成(缓存的响应只有text)
+            body = getattr(response, 'content', None) if self.parse_pool is not None else None
+            return self.handle_response(site, search_url, response.status_code,
+                                        response.text if body is None else body,
+                                        getattr(response, 'from_cache', False), time_range,
+                                        getattr(response, 'encoding', None))
+        except Exception as e:
+            self.failed_queries.add((site, time_range))
+            self.log_message(f"Error monitoring {site}: {str(e)}", logging.ERROR)
+            return []
+
+    def handle_response(self, site, search_url, status_code, text, from_cache=False, time_range=None,
+                        encoding=None):
+        """
+        解析并分类搜索响应，把分类结果反馈给调度器的限速器
+        :param site: 网站域名
+        :param search_url: 请求的搜索URL
+        :param status_code: HTTP状态码
+        :param text: 响应正文；配置了parse_pool时也可以是原始字节
+        :param from_cache: 是否来自缓存(缓存响应不反映当前限流状态，不反馈)
+        :param time_range: 时间范围，请求失败时记入failed_queries
+        :param encoding: 原始字节的编码
+        :return: 搜索结果列表
+        """
+        if self.parse_pool is not None:
+            # 包括等待空闲工作进程的时间
+            with metrics.timer('serp_parse'):
+                outcome, results = self.parse_pool.parse(status_code, text, encoding)
+        else:
+            results = self.extract_search_results(text) if status_code == 200 else []
+            outcome = classify_response(status_code, text, len(results))
+        host = self.scheduler.host_of_url(search_url)
+        metrics.inc('responses', host=host, outcome=outcome, cached=from_cache)
+        metrics.inc('results', len(results), site=site)
+        rate_controller = self.scheduler.rate_controller
+        if rate_controller is not None and not from_cache:
+            rate_controller.record(host, outcome)
+        if outcome not in (OK, EMPTY) and time_range is not None:
+            self.failed_queries.add((site, time_range))
+
+        if outcome in (OK, EMPTY) and status_code == 200:
+            self.log_message(f"Found {len(results)} results for {site}")
+        elif outcome in (CAPTCHA, CONSENT):
+            self.log_message(f"Failed to fetch results for {site}: got a {outcome} page", logging.ERROR)
+        else:
+            self.log_message(f"Failed to fetch results for {site}: Status code {status_code}", logging.ERROR)
+        return results
+
+    def _unit_host(self, site, time_range, start=0):
+        """返回任务实际请求的目标主机"""
+        if time_range == FEED:
+            return self.scheduler.host_of_url(site)
+        return self.scheduler.host_of_url(self.build_google_search_url(site, time_range, start))
+
+    def _monitor_unit(self, site, time_range, start=0):
+        """执行单个(site, time_range)任务的一页并补充元数据"""
+        if time_range == FEED:
+            return self.annotate_results(self.monitor_feeds(site), site, time_range)
+        return self.annotate_results(self.monitor_site(site, time_range, start), site, time_range)
+
+    def monitor_feeds(self, site):
+        """
+        从网站的sitemap/RSS获取上次运行以来的新页面
+        :param site: 网站地址
+        :return: 与搜索结果格式相同的结果列表
+        """
+        if self.feed_source is None:
+            self.log_message(f"No feed source configured, skipping feeds of {site}", logging.ERROR)
+            return []
+        self.log_message(f"Checking sitemaps and feeds of {site}")
+
+        results = []
+        start = time.perf_counter()
+        try:
+            for title, url in self.feed_source.iter_new(site):
+                game_name = self.extract_game_name(title)
+                if game_name:
+                    results.append({
+                        'title': title,
+                        'url': url,
+                        'game_name': game_name
+                    })
+        except Exception as e:
+            self.log_message(f"Error reading feeds of {site}: {str(e)}", logging.ERROR)
+            return results
+        finally:
+            metrics.observe('feed_read', time.perf_counter() - start, site=site)
+            metrics.inc('results', len(results), site=site)
+        self.log_message(f"Found {len(results)} new feed entries for {site}")
+        return results
+
+    def next_page(self, start, results, seen_urls):
+        """
+        记录一页结果并决定是否继续翻页
+        :param start: 本页的结果偏移量
+        :param results: 本页的结果列表
+        :param seen_urls: 本查询已出现过的URL集合，会被更新
+        :return: (本页新出现的结果, 下一页偏移量)；本页没有新URL、不足半页或已达页数上限时下一页偏移量为None
+        """
+        new_results = []
+        for result in results:
+            if result['url'] not in seen_urls:
+                seen_urls.add(result['url'])
+                new_results.append(result)
+        next_start = start + PAGE_SIZE
+        # 超出结果总数时Google会重复最后一页，不足半页通常就是最后一页
+        if not new_results or len(results) < PAGE_SIZE // 2 or next_start >= self.max_pages * PAGE_SIZE:
+            return new_results, None
+        return new_results, next_start
+
+    def filter_new(self, site, time_range, results, record=True):
+        """
+        配置了已见索引时只保留新URL，并记录这次查询供轮询计划学习网站的新页面速度
+        :param site: 网站域名
+        :param time_range: 时间范围
+        :param results: 该查询的全部结果
+        :param record: 是否记录这次查询(恢复运行时以前完成的查询不再记录)
+        :return: 新结果列表
+        """
+        if self.seen_index is None:
+            return results
+        # 结果落盘后再提交索引，避免保存失败导致新URL被误标为已见
+        new_results = self.seen_index.filter_new(results, commit=False)
+        if record and self.planner is not None:
+            ok = (site, time_range) not in self.failed_queries
+            self.planner.record(site, time_range, len(results), len(new_results), ok)
+        self.failed_queries.discard((site, time_range))
+        return new_results
+
+    def plan_units(self, time_ranges):
+        """
+        生成本次运行的(site, time_range)任务；配置了轮询计划时跳过未到期的网站和冗余的时间范围
+        :param time_ranges: 时间范围列表
+        :return: 任务列表
+        """
+        units = [(site, time_range) for site in self.sites for time_range in time_ranges]
+        if self.planner is None:
+            return units
+        planned = self.planner.plan(units)
+        self.log_message(f"Adaptive polling: running {len(planned)} of {len(units)} queries")
+        return planned
+
+    def annotate_results(self, results, site, time_range):
+        """为结果补充网站、时间范围和时间戳"""
+        for result in results:
+            result.update({
+                'site': site,
+                'time_range': time_range,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            })
+        return results
+
+    def iter_results(self, units):
+        """
+        按目标主机并发执行任务，每个查询翻页完成后立即产出结果
+        下一页在上一页完成后加入调度队列，与其他查询的请求交错进行
+        :param units: (site, time_range) 列表
+        :return: (site, time_range, results) 生成器，按完成顺序
+        """
+        if self.engine == 'async':
+            # asyncio引擎依赖httpx，选用时才导入
+            from async_monitor import AsyncGameSiteMonitor
+            engine = AsyncGameSiteMonitor(self, max_in_flight=self.scheduler.max_workers,
+                                          max_keepalive=self.scheduler.max_workers)
+            yield from engine.iter_results(units)
+            return
+        queries = {}
+        finished = []
+
+        def follow_up(unit, results):
+            site, time_range, start = unit
+            query = queries.setdefault((site, time_range), {'results': [], 'urls': set()})
+            new_results, next_start = self.next_page(start, results, query['urls'])
+            query['results'].extend(new_results)
+            # sitemap/RSS任务一次读完，没有下一页
+            if next_start is None or time_range == FEED:
+                finished.append((site, time_range))
+                return []
+            return [(site, time_range, next_start)]
+
+        pages = [(site, time_range, 0) for site, time_range in units]
+        for _ in self.scheduler.iter_run(pages, self._monitor_unit, self._unit_host, follow_up):
+            while finished:
+                site, time_range = finished.pop()
+                yield site, time_range, queries.pop((site, time_range))['results']
+
+    def monitor_all_sites(self, time_ranges=None, lazy=False, resume=True):
+        """
+        监控所有网站
+        :param time_ranges: 时间范围列表
+        :param lazy: 为True时返回ResultSet，调用方需要时再加载DataFrame
+        :param resume: 是否跳过当天结果文件中已完成的任务
+        :return: 包含所有结果的DataFrame(lazy为True时为ResultSet)
+        """
+        if time_ranges is None:
+            time_ranges = ['24h', '1w']
+
+        units = self.plan_units(time_ranges)
+        store = self.open_result_store(resume)
+        try:
+            done = store.completed_units()
+            pending = [unit for unit in units if unit not in done]
+            if len(pending) < len(units):
+                self.log_message(f"Resuming: skipping {len(units) - len(pending)} completed queries")
+
+            # 按目标主机并发执行，每个任务完成后立即写入结果文件
+            for site, time_range, results in self.iter_results(pending):
+                store.append(site, time_range, results)
+
+            return self.save_results(store, units, lazy, polled=pending)
+        finally:
+            store.close()
+
+    def open_result_store(self, resume=True):
+        """打开当天的流式结果文件"""
+        return ResultStore(f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}.jsonl', resume=resume)
+
+    def save_results(self, store, units, lazy=False, polled=None):
+        """
+        从流式结果文件导出CSV；配置了已见索引时只保存新URL，导出完成后删除流式结果文件
+        :param store: ResultStore
+        :param units: 导出的(site, time_range)顺序
+        :param lazy: 为True时返回ResultSet而不加载DataFrame
+        :param polled: 本次实际执行的任务，只为这些任务记录查询；默认全部
+        :return: 包含所有结果的DataFrame(lazy为True时为ResultSet)
+        """
+        counts = {'total': 0}
+
+        polled = set(units if polled is None else polled)
+
+        def rows():
+            for site, time_range, results in store.iter_batches(units):
+                counts['total'] += len(results)
+                new_results = self.filter_new(site, time_range, results, record=(site, time_range) in polled)
+                # 回调收到的行与导出的CSV一致：已见的URL和'24h'/'1w'的重叠部分都已去掉
+                if self.result_callback and new_results:
+                    self.result_callback(site, time_range, new_results)
+                yield from new_results
+
+        self.last_output_file = datetime.now().strftime(self.output_format)
+        row_count = write_csv(self.last_output_file, rows())
+        if self.seen_index is not None:
+            self.seen_index.commit()
+            self.log_message(f"{row_count} of {counts['total']} results are new since the last run")
+        if self.feed_source is not None:
+            self.feed_source.commit()
+        # 导出成功后不再需要续传
+        store.discard()
+
+        if row_count:
+            self.log_message(f"Results saved to {self.last_output_file}")
+            result_set = ResultSet(self.last_output_file, row_count)
+        else:
+            self.log_message("No results found", logging.WARNING)
+            result_set = ResultSet(None, 0)
+        return result_set if lazy else result_set.to_dataframe()
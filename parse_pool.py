@@ -0,0 +1,154 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future
+from itertools import chain, islice
+
+from game_name import default_extractor
+from rate_control import classify_response
+from serp_parser import get_parser
+
+# 工作进程中的解析器，由_init_worker创建
+_parser = None
+
+
+def _init_worker(backend):
+    global _parser
+    _parser = get_parser(backend)
+
+
+def parse_page(status_code, body, encoding=None):
+    """
+    在工作进程中解析一页搜索结果并分类响应
+    :param status_code: HTTP状态码
+    :param body: 响应正文，bytes或str；bytes在工作进程中解码，主进程不做解码
+    :param encoding: bytes正文的编码，默认utf-8
+    :return: (响应分类, [(title, url, game_name), ...])，只返回紧凑的元组以减少进程间传输
+    """
+    if isinstance(body, bytes):
+        body = body.decode(encoding or 'utf-8', errors='replace')
+    records = []
+    if status_code == 200:
+        for title, url in _parser.parse(body):
+            try:
+                game_name = default_extractor.extract(title)
+            except Exception:
+                continue
+            if game_name:
+                records.append((title, url, game_name))
+    return classify_response(status_code, body, len(records)), records
+
+
+class ParsePool:
+    def __init__(self, workers=None, backend='auto', max_in_flight=None, min_batch=8):
+        """
+        多进程的搜索结果解析阶段：抓取线程把原始响应交给进程池，解析和游戏名称提取不再受GIL限制
+        单核机器上进程池比进程内解析更慢(工作进程与抓取线程争抢同一个核，还要序列化页面)，此时直接在进程内解析
+        :param workers: 工作进程数，默认CPU核数
+        :param backend: 工作进程使用的解析后端
+        :param max_in_flight: 同时提交给进程池的最大页数，超过时提交方等待，内存占用不随抓取速度增长；
+                              默认为工作进程数的4倍
+        :param min_batch: imap收到的页数少于此值时在进程内解析，进程间传输的开销大于并行的收益
+        """
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.max_in_flight = max(1, int(max_in_flight or self.workers * 4))
+        self.min_batch = max(1, int(min_batch))
+        self.inline = (os.cpu_count() or 1) <= 1
+        self.executor = None
+        if not self.inline:
+            # 多进程模块导入较慢，只在确实使用进程池时导入
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            # 抓取线程已在运行时fork不安全，统一使用spawn
+            self.executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=_init_worker, initargs=(backend,))
+        # 进程内解析使用的解析器
+        _init_worker(backend)
+        self.slots = threading.BoundedSemaphore(self.max_in_flight)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.pages = 0
+        self.inline_pages = 0
+
+    def _parse_inline(self, page):
+        """在当前进程内解析一页"""
+        with self.lock:
+            self.pages += 1
+            self.inline_pages += 1
+        return parse_page(*page)
+
+    def submit(self, status_code, body, encoding=None):
+        """
+        提交一页，在途页数达到上限时阻塞直到有页面解析完成
+        :return: Future，结果为parse_page的返回值
+        """
+        if self.inline:
+            future = Future()
+            try:
+                future.set_result(self._parse_inline((status_code, body, encoding)))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        self.slots.acquire()
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            self.pages += 1
+        try:
+            future = self.executor.submit(parse_page, status_code, body, encoding)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def parse(self, status_code, body, encoding=None):
+        """
+        解析一页并等待结果，可在多个抓取线程中同时调用
+        :return: (响应分类, 结果字典列表)，字典格式与GameSiteMonitor.extract_search_results相同
+        """
+        outcome, records = self.submit(status_code, body, encoding).result()
+        return outcome, [{'title': title, 'url': url, 'game_name': game_name} for title, url, game_name in records]
+
+    def imap(self, pages):
+        """
+        按顺序流式解析多页，最多max_in_flight页同时在途
+        :param pages: (status_code, body, encoding) 可迭代对象
+        :return: (响应分类, 记录元组列表) 生成器，顺序与输入相同
+        """
+        pages = iter(pages)
+        head = list(islice(pages, self.min_batch))
+        if self.inline or len(head) < self.min_batch:
+            for page in chain(head, pages):
+                yield self._parse_inline(page)
+            return
+
+        pending = deque()
+        for page in chain(head, pages):
+            if len(pending) >= self.max_in_flight:
+                yield pending.popleft().result()
+            pending.append(self.submit(*page))
+        while pending:
+            yield pending.popleft().result()
+
+    def stats(self):
+        return {'workers': self.workers, 'inline': self.inline, 'pages': self.pages,
+                'inline_pages': self.inline_pages, 'peak_in_flight': self.peak_in_flight,
+                'max_in_flight': self.max_in_flight}
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
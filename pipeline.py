@@ -0,0 +1,255 @@
+import argparse
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from feed_source import FEED, FeedSource
+from keyword_cache import KeywordCache
+from metrics import add_arguments, instrumented, metrics
+from parse_pool import ParsePool
+from poll_planner import PollPlanner
+from response_cache import ResponseCache
+from result_store import write_csv
+from seen_index import SeenIndex
+from monitor_core import GameSiteMonitor, add_fetch_arguments, create_rate_control, log_rate_control
+from step2_key_extract import BASE_URL, KeywordExtractor, build_keyword_input
+from step3_trends_analyse import analyse_trends, save_data
+from title_clustering import cluster_results
+from trends_store import TrendsStore
+from trends_warehouse import TrendsWarehouse
+
+# 阶段之间传递的结束标记
+_DONE = object()
+
+STEP1_FIELDS = ('title', 'url', 'game_name', 'site', 'time_range', 'timestamp')
+
+
+class GamePipeline:
+    def __init__(self, monitor, extractor, warehouse, trends_batch_size=16, queue_size=64, checkpoint=True,
+                 days=30):
+        """
+        在一个进程内串联step1 → step2 → step3，各阶段通过有界队列传递内存中的结果批次，
+        后一阶段在前一阶段仍在产出时就开始处理，总耗时接近最慢的阶段而不是各阶段之和
+        :param monitor: GameSiteMonitor(CLI或GUI版本)
+        :param extractor: KeywordExtractor
+        :param warehouse: TrendsWarehouse
+        :param trends_batch_size: 攒够多少个新关键词后更新一次Trends历史
+        :param queue_size: 阶段之间最多缓存的批次数
+        :param checkpoint: 是否把各阶段结果另存为与分步运行相同的CSV文件
+        :param days: 计算趋势指标使用的天数
+        """
+        self.monitor = monitor
+        self.extractor = extractor
+        self.warehouse = warehouse
+        self.trends_batch_size = max(1, int(trends_batch_size))
+        self.queue_size = queue_size
+        self.checkpoint = checkpoint
+        self.days = days
+        self.logger = logging
+        self.errors = []
+        self.timings = {}
+
+    def _stage(self, name, target, inbox, outbox):
+        """
+        运行一个阶段并记录耗时；出错时记录异常并继续消费上游直到结束，避免上游阻塞在满队列上
+        """
+        start = time.perf_counter()
+        try:
+            target(inbox, outbox)
+        except Exception as e:
+            self.logger.error(f"Pipeline stage {name} failed: {e}")
+            self.errors.append(e)
+            if inbox is not None:
+                while inbox.get() is not _DONE:
+                    pass
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            metrics.observe('pipeline_stage', self.timings[name], stage=name)
+            if outbox is not None:
+                outbox.put(_DONE)
+
+    def _monitor_stage(self, inbox, outbox):
+        """step1：每个(site, time_range)任务完成后立即把新结果交给下游"""
+        for site, time_range, results in self.monitor.iter_results(self.units):
+            # 整个流水线成功后才提交索引
+            results = self.monitor.filter_new(site, time_range, results)
+            if results:
+                if self.first_result_at is None:
+                    self.first_result_at = time.perf_counter()
+                outbox.put(results)
+
+    def _keyword_stage(self, inbox, outbox):
+        """step2：把当前已到达的批次合并后聚类，每簇只请求一次关键词"""
+        while True:
+            batch = inbox.get()
+            if batch is _DONE:
+                return
+            done = False
+            # 合并队列中已经积压的批次，减少小批量请求
+            while True:
+                try:
+                    more = inbox.get_nowait()
+                except queue.Empty:
+                    break
+                if more is _DONE:
+                    done = True
+                    break
+                batch.extend(more)
+
+            representatives = cluster_results(batch)
+            offset = len(self.rows)
+            texts = [build_keyword_input(row['game_name'], row['title']) for row in representatives]
+            keyword_by_cluster = dict(zip((row['cluster_id'] for row in representatives),
+                                          self.extractor.extract_all(texts)))
+            for row in batch:
+                row['keywords'] = keyword_by_cluster[row['cluster_id']]
+                # 簇编号是代表行在整个运行中的位置，与step2的CSV一致
+                row['cluster_id'] += offset
+            self.rows.extend(batch)
+            outbox.put(batch)
+            if done:
+                return
+
+    def _trends_stage(self, inbox, outbox):
+        """step3：跳过帖子类页面和重复关键词，攒够一批就增量更新Trends历史"""
+        pending = []
+        while True:
+            batch = inbox.get()
+            if batch is _DONE:
+                break
+            for row in batch:
+                keyword, url = row.get('keywords'), row.get('url')
+                if not keyword or not url or 'post' in url or keyword in self.urls:
+                    continue
+                self.urls[keyword] = url
+                pending.append(keyword)
+            while len(pending) >= self.trends_batch_size:
+                self.warehouse.update(pending[:self.trends_batch_size], today=self.today)
+                pending = pending[self.trends_batch_size:]
+        if pending:
+            self.warehouse.update(pending, today=self.today)
+
+    def run(self, time_ranges=None):
+        """
+        运行整条流水线
+        :param time_ranges: 时间范围列表
+        :return: {'results': 带关键词的结果DataFrame, 'increases': 趋势指标DataFrame}
+        """
+        # 运行日期在开始时确定，跨午夜时所有检查点文件仍使用同一个日期
+        run_at = datetime.now()
+        self.today = pd.Timestamp(run_at).normalize()
+        self.units = self.monitor.plan_units(time_ranges or ['24h', '1w'])
+        self.rows = []
+        self.urls = {}
+        self.errors = []
+        self.timings = {}
+        self.first_result_at = None
+
+        start = time.perf_counter()
+        results_queue = queue.Queue(maxsize=self.queue_size)
+        keywords_queue = queue.Queue(maxsize=self.queue_size)
+        threads = [
+            threading.Thread(target=self._stage, args=('monitor', self._monitor_stage, None, results_queue),
+                             name='stage-monitor', daemon=True),
+            threading.Thread(target=self._stage, args=('keywords', self._keyword_stage, results_queue, keywords_queue),
+                             name='stage-keywords', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        self._stage('trends', self._trends_stage, keywords_queue, None)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        seen_index = self.monitor.seen_index
+        feed_source = self.monitor.feed_source
+        if self.errors:
+            for resource in (seen_index, feed_source):
+                if resource is not None:
+                    resource.rollback()
+            raise self.errors[0]
+
+        increases_df = analyse_trends(self.warehouse, list(self.urls), self.urls, today=self.today, days=self.days)
+        results_df = pd.DataFrame(self.rows)
+        if self.checkpoint:
+            self.save_checkpoints(run_at, increases_df)
+        for resource in (seen_index, feed_source):
+            if resource is not None:
+                resource.commit()
+
+        stage_times = ', '.join(f"{name} {seconds:.1f}s" for name, seconds in self.timings.items())
+        first_result = f"{self.first_result_at - start:.1f}s" if self.first_result_at else "n/a"
+        self.logger.info(f"Pipeline finished in {elapsed:.1f}s ({stage_times}, first result after {first_result}): "
+                         f"{len(self.rows)} results, {len(self.urls)} keywords, {len(increases_df)} trends")
+        return {'results': results_df, 'increases': increases_df}
+
+    def save_checkpoints(self, run_at, increases_df):
+        """按分步运行时的文件名保存各阶段结果，便于单独重跑后续步骤"""
+        date = run_at.strftime("%Y%m%d")
+        step1_file = f'game_monitor_results_{date}.csv'
+        if write_csv(step1_file, ({k: row[k] for k in STEP1_FIELDS if k in row} for row in self.rows)):
+            self.logger.info(f"Results saved to {step1_file}")
+            write_csv(step1_file.replace(".csv", "_update.csv"), self.rows)
+        if not increases_df.empty:
+            save_data(increases_df, f'data/genai_trends_increases_30days_{date}.csv')
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="在一个进程内依次流式运行监控、关键词提取和趋势分析")
+    parser.add_argument('--sites-file', default="game_sites.txt", help="游戏网站列表文件")
+    parser.add_argument('--base-url', default=BASE_URL, help="OpenAI兼容接口地址")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地响应缓存和关键词缓存")
+    parser.add_argument('--all', action='store_true', help="处理全部结果，不按已见URL索引过滤")
+    parser.add_argument('--no-checkpoint', action='store_true', help="不保存各阶段的CSV文件")
+    parser.add_argument('--source', choices=['search', 'feed', 'both'], default='search',
+                        help="新页面来源：site:搜索、网站的sitemap/RSS，或两者都用")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="按各网站的新页面速度安排查询：安静的网站少查，'24h'能覆盖时跳过'1w'")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="解析搜索结果页的工作进程数，0表示在抓取线程中直接解析")
+    add_fetch_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """按命令行参数运行整条流水线"""
+    response_cache = None if args.no_cache else ResponseCache()
+    keyword_cache = None if args.no_cache else KeywordCache()
+    seen_index = None if args.all else SeenIndex()
+    planner = PollPlanner(seen_index) if args.adaptive and seen_index is not None else None
+    # 与CLI相同的按主机和按代理的自适应限速
+    rate_controller, scheduler, proxy_pool = create_rate_control(args.proxies)
+    feed_source = None
+    time_ranges = ['24h', '1w']
+    if args.source != 'search':
+        feed_source = FeedSource.from_config_file()
+        time_ranges = [FEED] if args.source == 'feed' else time_ranges + [FEED]
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+    try:
+        monitor = GameSiteMonitor(args.sites_file, scheduler=scheduler, response_cache=response_cache,
+                                  seen_index=seen_index, proxy_pool=proxy_pool, max_pages=args.max_pages,
+                                  feed_source=feed_source, planner=planner, parse_pool=parse_pool,
+                                  engine=args.engine)
+        extractor = KeywordExtractor(base_url=args.base_url, cache=keyword_cache)
+        pipeline = GamePipeline(monitor, extractor, TrendsWarehouse(TrendsStore()),
+                                checkpoint=not args.no_checkpoint)
+        output = pipeline.run(time_ranges)
+        log_rate_control(monitor.logger, rate_controller, proxy_pool)
+        if not output['increases'].empty:
+            print(output['increases'].head(20).to_string())
+    finally:
+        for resource in (response_cache, keyword_cache, seen_index, feed_source, parse_pool):
+            if resource is not None:
+                resource.close()
+
+
+if __name__ == "__main__":
+    main()
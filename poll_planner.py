@@ -0,0 +1,120 @@
+import logging
+import time
+
+from feed_source import FEED
+
+# 各时间范围的查询能覆盖的时长(秒)
+WINDOWS = {'24h': 86400, '1w': 7 * 86400}
+
+
+class PollPlanner:
+    def __init__(self, seen_index, target_new=1.0, min_interval=3600, max_interval=6 * 86400,
+                 history_days=28, tolerance=900, clock=time.time):
+        """
+        按每个网站的历史查询记录安排轮询：学习网站的新URL到达速度，安静的网站少查；
+        距上次成功查询的间隔能被'24h'覆盖时跳过冗余的'1w'查询，覆盖不了时改用'1w'补齐
+        :param seen_index: SeenIndex，提供查询记录
+        :param target_new: 期望每次轮询平均发现的新URL数，决定轮询间隔
+        :param min_interval: 最短轮询间隔(秒)
+        :param max_interval: 最长轮询间隔(秒)，不超过'1w'的覆盖范围，保证不漏结果
+        :param history_days: 估计到达速度使用的历史天数
+        :param tolerance: 判断时间范围能否覆盖间隔时允许的误差(秒)，吸收定时任务的启动抖动
+        :param clock: 返回当前时间戳的函数，基准测试中可替换为模拟时钟
+        """
+        self.seen_index = seen_index
+        self.target_new = target_new
+        self.min_interval = min_interval
+        self.max_interval = min(max_interval, WINDOWS['1w'] - tolerance)
+        self.history_days = history_days
+        self.tolerance = tolerance
+        self.clock = clock
+        self.logger = logging
+
+    def record(self, site, time_range, results, new_results, ok=True):
+        """
+        记录一次完成的查询(sitemap/RSS任务不记录)
+        :param results: 查询返回的结果数
+        :param new_results: 其中首次出现的结果数
+        :param ok: 查询是否成功完成
+        """
+        if time_range in WINDOWS:
+            self.seen_index.record_poll(site, time_range, results, new_results, ok, polled_at=self.clock())
+
+    def _history(self, site):
+        """窗口内的成功查询记录"""
+        since = self.clock() - self.history_days * 86400
+        return [poll for poll in self.seen_index.poll_history(site, since) if poll[4]]
+
+    def last_success(self, site):
+        """网站最近一次成功查询的时间戳，没有记录时为None"""
+        history = self._history(site)
+        return history[-1][1] if history else None
+
+    def arrival_rate(self, site):
+        """
+        估计网站每天出现的新URL数：第一次查询之后的各次查询发现的新URL总数除以经过的时间
+        第一次查询发现的是网站已有的页面，不计入
+        :return: 每天的新URL数；记录不足时为None
+        """
+        first = self.seen_index.first_poll(site)
+        history = [poll for poll in self._history(site) if poll[1] > first]
+        if not history:
+            return None
+        start = max(first, self.clock() - self.history_days * 86400)
+        elapsed = history[-1][1] - start
+        if elapsed <= 0:
+            return None
+        return sum(poll[3] for poll in history) / (elapsed / 86400)
+
+    def interval_for(self, site):
+        """
+        网站的轮询间隔(秒)：平均每次轮询发现target_new个新URL，限制在[min_interval, max_interval]内
+        还没有足够记录的网站按最短间隔轮询
+        """
+        rate = self.arrival_rate(site)
+        if rate is None:
+            return self.min_interval
+        if rate == 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, self.target_new / rate * 86400))
+
+    def is_due(self, site):
+        """距上次成功查询已超过轮询间隔(允许tolerance的提前量)"""
+        last = self.last_success(site)
+        return last is None or self.clock() - last >= self.interval_for(site) - self.tolerance
+
+    def choose_ranges(self, site, time_ranges):
+        """
+        为到期的网站选择查询的时间范围：选能覆盖上次成功查询以来间隔的最短范围
+        :param site: 网站域名
+        :param time_ranges: 允许使用的时间范围
+        :return: 时间范围列表；没有成功查询记录时返回全部time_ranges
+        """
+        ranges = [time_range for time_range in time_ranges if time_range in WINDOWS]
+        last = self.last_success(site)
+        if last is None or not ranges:
+            return ranges
+        gap = self.clock() - last
+        ranges.sort(key=WINDOWS.get)
+        for time_range in ranges:
+            if WINDOWS[time_range] + self.tolerance >= gap:
+                return [time_range]
+        self.logger.warning(f"{site} was last polled {gap / 86400:.1f} days ago, "
+                            f"beyond the '{ranges[-1]}' window; some results may be missed")
+        return [ranges[-1]]
+
+    def plan(self, units):
+        """
+        从(site, time_range)任务中选出本次需要执行的：未到期网站的搜索任务全部跳过，
+        到期网站只执行选出的时间范围；sitemap/RSS任务始终保留
+        :param units: (site, time_range) 列表
+        :return: 保持原顺序的任务子集
+        """
+        requested = {}
+        for site, time_range in units:
+            requested.setdefault(site, []).append(time_range)
+        chosen = {}
+        for site, time_ranges in requested.items():
+            chosen[site] = set(self.choose_ranges(site, time_ranges)) if self.is_due(site) else set()
+        return [(site, time_range) for site, time_range in units
+                if time_range == FEED or time_range in chosen[site]]
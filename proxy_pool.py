@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from metrics import metrics
+from rate_control import BLOCKED, CAPTCHA, EMPTY, OK, classify_response
+
+
+def normalize_proxy(proxy):
+    """'host:port'补全为'http://host:port'"""
+    proxy = proxy.strip()
+    return proxy if '://' in proxy else f'http://{proxy}'
+
+
+class ProxyState:
+    def __init__(self, url):
+        """
+        单个代理的健康状态
+        :param url: 代理地址
+        """
+        self.url = url
+        self.score = 1.0
+        self.latency = None
+        self.cooldown_until = 0.0
+        self.ready_at = 0.0
+        self.consecutive_blocks = 0
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.blocks = 0
+
+    def as_dict(self):
+        return {
+            'proxy': self.url,
+            'score': round(self.score, 3),
+            'latency': round(self.latency, 3) if self.latency is not None else None,
+            'successes': self.successes,
+            'failures': self.failures,
+            'blocks': self.blocks,
+            'cooling_down': self.cooldown_until > time.monotonic(),
+        }
+
+
+class ProxyPool:
+    def __init__(self, proxies, cooldown=300, max_cooldown=3600, alpha=0.3, min_score=0.05, rate_controller=None):
+        """
+        轮换代理池：按健康分和延迟加权随机选择代理，被封禁或遇到验证码的代理进入冷却
+        :param proxies: 代理地址列表('host:port'或完整URL)
+        :param cooldown: 第一次被封禁后的冷却时间(秒)，连续封禁时翻倍
+        :param max_cooldown: 最长冷却时间(秒)
+        :param alpha: 健康分和延迟的指数滑动平均系数
+        :param min_score: 健康分下限，避免失败过的代理永远不再被选中
+        :param rate_controller: 可选的AIMDController，按代理分别限制并发数和请求间隔
+        """
+        proxies = list(dict.fromkeys(normalize_proxy(p) for p in proxies if p and p.strip()))
+        if not proxies:
+            raise ValueError("proxy pool is empty")
+        self.states = {url: ProxyState(url) for url in proxies}
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.alpha = alpha
+        self.min_score = min_score
+        self.rate_controller = rate_controller
+        self.lock = threading.Condition()
+
+    @classmethod
+    def from_file(cls, path, **kwargs):
+        """
+        从文本文件加载代理，每行一个，#开头为注释
+        :param path: 代理列表文件
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            proxies = [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+        return cls(proxies, **kwargs)
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """
+        从配置字典(config.json)创建代理池
+        支持'proxy_pool'(代理地址列表)和'proxy_pool_file'(代理列表文件)，
+        并包含原有的单个proxy_host/proxy_port
+        :param config: 配置字典
+        :return: ProxyPool；没有配置任何代理时返回None
+        """
+        proxies = list(config.get('proxy_pool') or [])
+        pool_file = config.get('proxy_pool_file')
+        if pool_file and os.path.exists(pool_file):
+            with open(pool_file, 'r', encoding='utf-8') as f:
+                proxies += [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+        if config.get('proxy_host') and config.get('proxy_port'):
+            proxies.insert(0, f"{config['proxy_host']}:{config['proxy_port']}")
+        return cls(proxies, **kwargs) if proxies else None
+
+    @classmethod
+    def from_config_file(cls, config_file='config.json', **kwargs):
+        """读取config.json并创建代理池，文件不存在或没有代理时返回None"""
+        if not os.path.exists(config_file):
+            return None
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return cls.from_config(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.states)
+
+    def _weight(self, state):
+        """健康分越高、延迟越低、当前并发越少，被选中的概率越大"""
+        latency = state.latency if state.latency is not None else 1.0
+        return state.score / max(latency, 0.05) / (1 + state.in_flight)
+
+    def _available(self, state, now):
+        """代理不在冷却中、已过请求间隔且未超过并发限制"""
+        if state.cooldown_until > now or state.ready_at > now:
+            return False
+        return self.rate_controller is None or state.in_flight < self.rate_controller.window(state.url)
+
+    def acquire(self):
+        """
+        选择一个代理，没有可用代理时等待最早恢复的那个
+        :return: 代理地址
+        """
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                available = [s for s in self.states.values() if self._available(s, now)]
+                if available:
+                    state = random.choices(available, weights=[self._weight(s) for s in available])[0]
+                    state.in_flight += 1
+                    return state.url
+                # 受并发限制时由release唤醒，受冷却或间隔限制时等到最早恢复的时间
+                resume_at = min(max(s.cooldown_until, s.ready_at) for s in self.states.values())
+                self.lock.wait(resume_at - now if resume_at > now else None)
+
+    def release(self, proxy, outcome, latency=None):
+        """
+        归还代理并更新健康状态
+        :param proxy: acquire返回的代理地址
+        :param outcome: classify_response的分类结果；无法连接时为BLOCKED
+        :param latency: 请求耗时(秒)
+        """
+        with self.lock:
+            state = self.states[proxy]
+            state.in_flight = max(0, state.in_flight - 1)
+            if latency is not None:
+                state.latency = latency if state.latency is None else \
+                    (1 - self.alpha) * state.latency + self.alpha * latency
+            if outcome in (OK, EMPTY):
+                state.successes += 1
+                state.consecutive_blocks = 0
+                state.score = (1 - self.alpha) * state.score + self.alpha
+            else:
+                state.failures += 1
+                state.score = max(self.min_score, (1 - self.alpha) * state.score)
+            if outcome in (BLOCKED, CAPTCHA):
+                # 被封禁、限流、遇到验证码或无法连接时进入冷却
+                state.blocks += 1
+                delay = min(self.max_cooldown, self.cooldown * 2 ** state.consecutive_blocks)
+                state.consecutive_blocks += 1
+                state.cooldown_until = time.monotonic() + delay
+                logging.warning(f"Proxy {proxy} returned {outcome}, cooling down for {delay:.0f}s")
+            if self.rate_controller is not None:
+                self.rate_controller.record(proxy, outcome)
+                state.ready_at = time.monotonic() + self.rate_controller.next_delay(proxy)
+            self.lock.notify_all()
+
+    def get(self, url, max_attempts=3, **kwargs):
+        """
+        通过代理池发送GET请求，被封禁、遇到验证码或连接失败时换一个代理重试
+        :param url: 请求URL
+        :param max_attempts: 最多尝试的代理数
+        :param kwargs: 传给requests.get的其他参数
+        :return: requests.Response
+        """
+        # requests导入较慢，第一次请求时才导入
+        import requests
+        attempts = max(1, min(max_attempts, len(self.states)))
+        for attempt in range(attempts):
+            with metrics.timer('proxy_wait'):
+                proxy = self.acquire()
+            start = time.monotonic()
+            try:
+                response = requests.get(url, proxies={'http': proxy, 'https': proxy}, **kwargs)
+            except requests.RequestException:
+                self.release(proxy, BLOCKED, latency=time.monotonic() - start)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            outcome = classify_response(response.status_code, response.text)
+            metrics.inc('proxy_responses', proxy=proxy, outcome=outcome)
+            self.release(proxy, outcome, latency=time.monotonic() - start)
+            if outcome not in (BLOCKED, CAPTCHA) or attempt == attempts - 1:
+                return response
+
+    def stats(self):
+        """每个代理的健康状态列表"""
+        with self.lock:
+            return [state.as_dict() for state in self.states.values()]
@@ -0,0 +1,114 @@
+import random
+import re
+import threading
+
+# 响应分类
+OK = 'ok'
+BLOCKED = 'blocked'
+CAPTCHA = 'captcha'
+CONSENT = 'consent'
+EMPTY = 'empty'
+
+# 视为被封禁或限流的状态码
+BLOCK_STATUS_CODES = (403, 429, 503)
+
+CAPTCHA_MARKERS = re.compile(
+    r'/sorry/index|g-recaptcha|id="captcha-form"|unusual traffic from your computer network|'
+    r'detected unusual traffic|our systems have detected',
+    re.IGNORECASE
+)
+CONSENT_MARKERS = re.compile(
+    r'consent\.google\.com|action="https://consent\.|Before you continue to Google',
+    re.IGNORECASE
+)
+
+
+def classify_response(status_code, text, result_count=None):
+    """
+    对搜索响应分类
+    :param status_code: HTTP状态码
+    :param text: 响应正文
+    :param result_count: 解析出的结果数，未知时为None
+    :return: OK / BLOCKED / CAPTCHA / CONSENT / EMPTY
+    """
+    if status_code in BLOCK_STATUS_CODES or status_code >= 500:
+        return BLOCKED
+    if status_code != 200:
+        return EMPTY
+    if result_count:
+        return OK
+    # 只在没有结果时检查特征，避免结果摘要中恰好出现这些词
+    if CAPTCHA_MARKERS.search(text or ''):
+        return CAPTCHA
+    if CONSENT_MARKERS.search(text or ''):
+        return CONSENT
+    return EMPTY if result_count == 0 else OK
+
+
+class AIMDController:
+    def __init__(self, initial_delay=2.0, min_delay=0.5, max_delay=120.0, delay_step=0.25, backoff_factor=2.0,
+                 initial_window=2, max_window=8, jitter=0.5):
+        """
+        加性增、乘性减(AIMD)的自适应限速：响应正常时逐步缩短间隔、放宽并发，
+        遇到封禁或验证码时间隔加倍、并发减半；按键(主机或代理)分别维护
+        :param initial_delay: 初始请求间隔(秒)
+        :param min_delay: 最小请求间隔(秒)
+        :param max_delay: 最大请求间隔(秒)
+        :param delay_step: 每次正常响应后间隔减少的秒数
+        :param backoff_factor: 遇到封禁后间隔乘以的倍数
+        :param initial_window: 初始并发数
+        :param max_window: 最大并发数
+        :param jitter: 实际等待时间在间隔的(1 ± jitter)倍之间随机
+        """
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay_step = delay_step
+        self.backoff_factor = backoff_factor
+        self.initial_window = initial_window
+        self.max_window = max_window
+        self.jitter = jitter
+        self.states = {}
+        self.lock = threading.Lock()
+
+    def _state(self, key):
+        state = self.states.get(key)
+        if state is None:
+            state = self.states[key] = {'delay': self.initial_delay, 'window': float(self.initial_window),
+                                        'outcomes': {}}
+        return state
+
+    def record(self, key, outcome):
+        """
+        记录一次响应结果并调整限速
+        :param key: 主机名或代理地址
+        :param outcome: classify_response的分类结果
+        """
+        with self.lock:
+            state = self._state(key)
+            state['outcomes'][outcome] = state['outcomes'].get(outcome, 0) + 1
+            if outcome in (BLOCKED, CAPTCHA):
+                state['delay'] = min(self.max_delay, state['delay'] * self.backoff_factor)
+                state['window'] = max(1.0, state['window'] / 2)
+            elif outcome in (OK, EMPTY):
+                state['delay'] = max(self.min_delay, state['delay'] - self.delay_step)
+                state['window'] = min(float(self.max_window), state['window'] + 1 / state['window'])
+            # CONSENT与速率无关，不调整
+
+    def next_delay(self, key):
+        """本次请求完成后需要等待的时间(秒)"""
+        with self.lock:
+            delay = self._state(key)['delay']
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def window(self, key):
+        """当前允许的并发数"""
+        with self.lock:
+            return int(self._state(key)['window'])
+
+    def stats(self):
+        """每个键的当前间隔、并发数和各分类计数"""
+        with self.lock:
+            return {key: {'delay': round(state['delay'], 2), 'window': int(state['window']),
+                          'outcomes': dict(state['outcomes'])}
+                    for key, state in self.states.items()}
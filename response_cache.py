@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+
+from rate_control import CAPTCHA, CONSENT, classify_response
+
+
+class CacheMissError(Exception):
+    """仅回放模式下请求的页面不在缓存中"""
+
+
+class CachedResponse:
+    def __init__(self, status_code, text, from_cache=False):
+        """
+        缓存返回的响应，只保留监控需要的字段
+        :param status_code: HTTP状态码
+        :param text: 页面内容
+        :param from_cache: 是否来自缓存
+        """
+        self.status_code = status_code
+        self.text = text
+        self.from_cache = from_cache
+
+
+class ResponseCache:
+    def __init__(self, path='http_cache.sqlite', ttl=12 * 3600, max_bytes=200 * 1024 * 1024, replay_only=False,
+                 clock=time.time):
+        """
+        基于SQLite的持久化HTTP响应缓存
+        :param path: 缓存数据库文件
+        :param ttl: 缓存有效期(秒)，过期后通过ETag/Last-Modified重新验证
+        :param max_bytes: 缓存内容(压缩后)的总大小上限，超出时按最近最少使用淘汰
+        :param replay_only: 仅回放模式，只读取缓存，不发起任何网络请求
+        :param clock: 返回当前时间戳的函数，基准测试中可替换为模拟时钟
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.replay_only = replay_only
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.revalidated = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                proxy TEXT,
+                status INTEGER NOT NULL,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)')
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(url, proxy=None):
+        """缓存键由URL和代理共同决定"""
+        return hashlib.sha256(f'{proxy or ""}\n{url}'.encode('utf-8')).hexdigest()
+
+    def lookup(self, url, proxy=None):
+        """
+        查询缓存条目
+        :return: (状态码, 内容, etag, last_modified, 抓取时间) 或 None
+        """
+        key = self.make_key(url, proxy)
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT status, body, etag, last_modified, fetched_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute('UPDATE responses SET accessed_at = ? WHERE key = ?', (self.clock(), key))
+            self.conn.commit()
+        status, body, etag, last_modified, fetched_at = row
+        return status, zlib.decompress(body).decode('utf-8'), etag, last_modified, fetched_at
+
+    def store(self, url, proxy, status, text, etag=None, last_modified=None):
+        """写入缓存并按大小上限淘汰旧条目"""
+        body = zlib.compress(text.encode('utf-8'))
+        now = self.clock()
+        with self.lock:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(key, url, proxy, status, body, size, etag, last_modified, fetched_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self.make_key(url, proxy), url, proxy, status, body, len(body), etag, last_modified, now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _refresh(self, url, proxy):
+        """304响应后刷新抓取时间"""
+        now = self.clock()
+        with self.lock:
+            self.conn.execute('UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?',
+                              (now, now, self.make_key(url, proxy)))
+            self.conn.commit()
+
+    def _evict(self):
+        """按最近最少使用淘汰，直到总大小不超过上限"""
+        total = self.conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self.conn.execute('SELECT key, size FROM responses ORDER BY accessed_at').fetchall():
+            self.conn.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def prepare(self, url, proxy=None):
+        """
+        请求前查询缓存
+        :param url: 请求URL
+        :param proxy: 请求使用的代理，参与缓存键计算
+        :return: (命中时的CachedResponse或None, 缓存条目, 条件请求头)；未命中时由调用方发起请求后调用complete
+        """
+        entry = self.lookup(url, proxy)
+        if self.replay_only:
+            if entry is None:
+                self.misses += 1
+                raise CacheMissError(f"{url} not in cache (replay only)")
+            self.hits += 1
+            return CachedResponse(entry[0], entry[1], from_cache=True), entry, {}
+
+        extra_headers = {}
+        if entry is not None:
+            status, text, etag, last_modified, fetched_at = entry
+            if self.clock() - fetched_at < self.ttl:
+                self.hits += 1
+                return CachedResponse(status, text, from_cache=True), entry, {}
+            # 过期条目尝试条件请求重新验证
+            if etag:
+                extra_headers['If-None-Match'] = etag
+            if last_modified:
+                extra_headers['If-Modified-Since'] = last_modified
+        self.misses += 1
+        return None, entry, extra_headers
+
+    def complete(self, url, proxy, entry, response):
+        """
+        请求完成后更新缓存：304时刷新已有条目，正常的200结果页写入缓存
+        :param entry: prepare返回的缓存条目
+        :param response: requests或httpx风格的响应
+        :return: CachedResponse
+        """
+        if response.status_code == 304 and entry is not None:
+            self.revalidated += 1
+            self._refresh(url, proxy)
+            return CachedResponse(entry[0], entry[1], from_cache=True)
+
+        # 验证码和同意页面虽然是200，但不是真正的结果页，不缓存
+        if response.status_code == 200 and classify_response(200, response.text) not in (CAPTCHA, CONSENT):
+            self.store(url, proxy, response.status_code, response.text,
+                       response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return CachedResponse(response.status_code, response.text)
+
+    def fetch(self, url, do_get, proxy=None):
+        """
+        通过缓存获取页面
+        :param url: 请求URL
+        :param do_get: 实际发起请求的函数，参数为附加请求头字典，返回requests风格的响应
+        :param proxy: 请求使用的代理，参与缓存键计算
+        :return: CachedResponse
+        """
+        cached, entry, extra_headers = self.prepare(url, proxy)
+        if cached is not None:
+            return cached
+        return self.complete(url, proxy, entry, do_get(extra_headers))
+
+    def stats(self):
+        """返回命中统计"""
+        return {'hits': self.hits, 'misses': self.misses, 'revalidated': self.revalidated}
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
+        logging.info(f"Response cache stats: {self.stats()}")
@@ -0,0 +1,165 @@
+import csv
+import json
+import os
+from datetime import datetime
+
+
+class ResultStore:
+    def __init__(self, path, resume=True):
+        """
+        追加写入的流式结果文件(JSONL)，每个(site, time_range)任务完成后写入一行
+        一行要么完整写入要么被截断丢弃，因此中断后可以跳过已完成的任务继续运行
+        :param path: JSONL文件路径
+        :param resume: 是否保留已有文件中已完成的任务；为False时清空重新开始
+        """
+        self.path = path
+        self.offsets = {}
+        if not resume and os.path.exists(path):
+            os.remove(path)
+        self._scan()
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def _scan(self):
+        """扫描已有文件，记录每个已完成任务的偏移量，并截掉末尾不完整的行"""
+        if not os.path.exists(self.path):
+            return
+        valid_end = 0
+        with open(self.path, 'rb') as f:
+            while True:
+                offset = f.tell()
+                line = f.readline()
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.offsets[(record['site'], record['time_range'])] = offset
+                valid_end = f.tell()
+        if valid_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(valid_end)
+
+    def completed_units(self):
+        """已完成的(site, time_range)集合"""
+        return set(self.offsets)
+
+    def append(self, site, time_range, results):
+        """
+        写入一个已完成任务的全部结果并立即落盘
+        :param site: 网站域名
+        :param time_range: 时间范围
+        :param results: 该任务的结果字典列表
+        """
+        record = {
+            'site': site,
+            'time_range': time_range,
+            'completed_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'results': results,
+        }
+        self.file.seek(0, os.SEEK_END)
+        self.offsets[(site, time_range)] = self.file.tell()
+        self.file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def iter_batches(self, units=None):
+        """
+        按顺序逐个读取任务结果，每次只在内存中保留一个任务
+        :param units: 需要读取的(site, time_range)顺序；默认按写入顺序
+        :return: (site, time_range, results) 生成器
+        """
+        self.file.flush()
+        if units is None:
+            units = sorted(self.offsets, key=self.offsets.get)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for unit in units:
+                offset = self.offsets.get(tuple(unit))
+                if offset is None:
+                    continue
+                f.seek(offset)
+                record = json.loads(f.readline())
+                yield record['site'], record['time_range'], record['results']
+
+    def discard(self):
+        """结果已全部导出后删除文件，当天再次运行时重新抓取，只有中断的运行才会续传"""
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.offsets = {}
+
+    def close(self):
+        """关闭文件"""
+        self.file.close()
+
+
+class ResultSet:
+    def __init__(self, path, row_count):
+        """
+        已导出的结果文件，只有调用方需要时才加载为DataFrame
+        :param path: CSV文件路径，没有结果时为None
+        :param row_count: 结果行数
+        """
+        self.path = path
+        self.row_count = row_count
+
+    def __len__(self):
+        return self.row_count
+
+    @property
+    def empty(self):
+        return self.row_count == 0
+
+    def to_dataframe(self):
+        """读取为DataFrame，所有列保持字符串类型"""
+        import pandas as pd
+        if not self.path:
+            return pd.DataFrame()
+        return pd.read_csv(self.path, dtype=str, keep_default_na=False, encoding='utf-8-sig')
+
+
+def write_csv(path, rows):
+    """
+    流式写出CSV，列顺序取第一行的字段顺序
+    :param path: 输出文件
+    :param rows: 结果字典的可迭代对象
+    :return: 写出的行数；没有结果时不创建文件并返回0
+    """
+    count = 0
+    writer = None
+    f = None
+    try:
+        for row in rows:
+            if writer is None:
+                f = open(path, 'w', encoding='utf-8-sig', newline='')
+                writer = csv.DictWriter(f, fieldnames=list(row.keys()), lineterminator=os.linesep)
+                writer.writeheader()
+            writer.writerow(row)
+            count += 1
+    finally:
+        if f is not None:
+            f.close()
+    return count
+
+
+def append_csv(path, rows):
+    """
+    向CSV追加结果，文件不存在时先写表头；已有文件沿用其表头的列顺序
+    :param path: 输出文件
+    :param rows: 结果字典列表
+    :return: 追加的行数
+    """
+    if not rows:
+        return 0
+    fieldnames = None
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            fieldnames = next(csv.reader(f), None)
+    # 追加到已有文件时utf-8-sig不会重复写入BOM
+    with open(path, 'a', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames or list(rows[0].keys()),
+                                lineterminator=os.linesep, extrasaction='ignore')
+        if fieldnames is None:
+            writer.writeheader()
+        writer.writerows(rows)
+    return len(rows)
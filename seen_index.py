@@ -0,0 +1,129 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+class SeenIndex:
+    def __init__(self, path='seen_urls.sqlite'):
+        """
+        持久化的已见URL索引，记录每个URL首次和最近一次出现的时间
+        :param path: 索引数据库文件
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS seen_urls (
+                url TEXT PRIMARY KEY,
+                site TEXT,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_seen_site ON seen_urls(site, first_seen)')
+        # 每次查询的记录，供PollPlanner学习各网站的新页面速度
+        self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS site_polls (
+                site TEXT NOT NULL,
+                time_range TEXT NOT NULL,
+                polled_at REAL NOT NULL,
+                results INTEGER NOT NULL,
+                new_results INTEGER NOT NULL,
+                ok INTEGER NOT NULL
+            )
+        ''')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_polls_site ON site_polls(site, polled_at)')
+        self.conn.commit()
+
+    def filter_new(self, results, commit=True):
+        """
+        过滤出首次出现的结果，并更新所有结果的最近出现时间
+        同一批次内重复的URL(例如'24h'和'1w'的重叠部分)只保留第一条
+        :param results: 结果字典列表，需包含'url'字段
+        :param commit: 是否立即提交；为False时需在结果落盘后调用commit()
+        :return: 新结果列表
+        """
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        new_results = []
+        batch_seen = set()
+        with self.lock:
+            for result in results:
+                url = result['url']
+                if url in batch_seen:
+                    continue
+                batch_seen.add(url)
+                cursor = self.conn.execute(
+                    'INSERT OR IGNORE INTO seen_urls (url, site, first_seen, last_seen) VALUES (?, ?, ?, ?)',
+                    (url, result.get('site'), now, now)
+                )
+                if cursor.rowcount:
+                    new_results.append(result)
+                else:
+                    self.conn.execute('UPDATE seen_urls SET last_seen = ? WHERE url = ?', (now, url))
+            if commit:
+                self.conn.commit()
+        return new_results
+
+    def commit(self):
+        """提交索引更新"""
+        with self.lock:
+            self.conn.commit()
+
+    def rollback(self):
+        """放弃未提交的索引更新，使本次结果在下次运行时仍被视为新结果"""
+        with self.lock:
+            self.conn.rollback()
+
+    def record_poll(self, site, time_range, results, new_results, ok=True, polled_at=None):
+        """
+        记录一次查询，与已见URL一起在commit()时提交
+        :param site: 网站域名
+        :param time_range: 时间范围
+        :param results: 查询返回的结果数
+        :param new_results: 其中首次出现的结果数
+        :param ok: 查询是否成功完成(没有被封禁或出错)
+        :param polled_at: 查询时间戳，默认为当前时间
+        """
+        polled_at = time.time() if polled_at is None else polled_at
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO site_polls (site, time_range, polled_at, results, new_results, ok) VALUES (?, ?, ?, ?, ?, ?)',
+                (site, time_range, polled_at, results, new_results, int(ok))
+            )
+
+    def poll_history(self, site, since=0):
+        """
+        网站在since之后的查询记录
+        :return: [(time_range, polled_at, results, new_results, ok), ...]，按时间排序
+        """
+        with self.lock:
+            return self.conn.execute(
+                'SELECT time_range, polled_at, results, new_results, ok FROM site_polls '
+                'WHERE site = ? AND polled_at >= ? ORDER BY polled_at',
+                (site, since)
+            ).fetchall()
+
+    def first_poll(self, site):
+        """网站第一次查询的时间戳，从未查询过时为None"""
+        with self.lock:
+            return self.conn.execute('SELECT MIN(polled_at) FROM site_polls WHERE site = ?', (site,)).fetchone()[0]
+
+    def lookup(self, url):
+        """
+        查询URL的首次和最近出现时间
+        :return: (first_seen, last_seen) 或 None
+        """
+        with self.lock:
+            return self.conn.execute(
+                'SELECT first_seen, last_seen FROM seen_urls WHERE url = ?', (url,)
+            ).fetchone()
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM seen_urls').fetchone()[0]
+
+    def close(self):
+        """关闭数据库连接"""
+        with self.lock:
+            self.conn.close()
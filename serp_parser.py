@@ -0,0 +1,176 @@
+import logging
+from html.parser import HTMLParser
+
+RESULT_CLASS = 'g'
+
+
+class BeautifulSoupBackend:
+    name = 'html.parser'
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def parse(self, html_content):
+        """
+        构建完整的DOM树后用CSS选择器提取结果
+        :param html_content: 页面HTML内容
+        :return: (标题, URL) 列表
+        """
+        soup = self._soup(html_content, 'html.parser')
+        pairs = []
+        for result in soup.select('div.g'):
+            title_elem = result.select_one('h3')
+            url_elem = result.select_one('a')
+            if title_elem and url_elem and url_elem.has_attr('href'):
+                pairs.append((title_elem.get_text(), url_elem['href']))
+        return pairs
+
+
+class LxmlBackend:
+    name = 'lxml'
+
+    RESULT_XPATH = f'//div[contains(concat(" ", normalize-space(@class), " "), " {RESULT_CLASS} ")]'
+
+    def __init__(self):
+        import lxml.html
+        from lxml import etree
+        self._fromstring = lxml.html.fromstring
+        self._result_xpath = etree.XPath(self.RESULT_XPATH)
+        self._h3_xpath = etree.XPath('.//h3')
+        self._a_xpath = etree.XPath('.//a')
+
+    def parse(self, html_content):
+        """
+        使用libxml2解析并通过预编译的XPath提取结果
+        :param html_content: 页面HTML内容
+        :return: (标题, URL) 列表
+        """
+        if not html_content or not html_content.strip():
+            return []
+        try:
+            root = self._fromstring(html_content)
+        except Exception as e:
+            logging.error(f"Error parsing page with lxml: {str(e)}")
+            return []
+
+        pairs = []
+        for result in self._result_xpath(root):
+            titles = self._h3_xpath(result)
+            links = self._a_xpath(result)
+            if titles and links:
+                url = links[0].get('href')
+                if url is not None:
+                    pairs.append((titles[0].text_content(), url))
+        return pairs
+
+
+class _ResultBlock:
+    __slots__ = ('order', 'depth', 'title_parts', 'title_done', 'h3_depth', 'url', 'url_seen')
+
+    def __init__(self, order):
+        self.order = order
+        self.depth = 1
+        self.title_parts = None
+        self.title_done = False
+        self.h3_depth = 0
+        self.url = None
+        self.url_seen = False
+
+
+class _StreamingResultParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_blocks = []
+        self.finished = []
+        self.counter = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'div':
+            for block in self.open_blocks:
+                block.depth += 1
+            for name, value in attrs:
+                if name == 'class' and value and RESULT_CLASS in value.split():
+                    self.open_blocks.append(_ResultBlock(self.counter))
+                    self.counter += 1
+                    break
+        elif not self.open_blocks:
+            return
+        elif tag == 'h3':
+            for block in self.open_blocks:
+                if block.h3_depth:
+                    block.h3_depth += 1
+                elif block.title_parts is None:
+                    block.title_parts = []
+                    block.h3_depth = 1
+        elif tag == 'a':
+            for block in self.open_blocks:
+                if not block.url_seen:
+                    block.url_seen = True
+                    block.url = dict(attrs).get('href')
+
+    def handle_endtag(self, tag):
+        if not self.open_blocks:
+            return
+        if tag == 'div':
+            still_open = []
+            for block in self.open_blocks:
+                block.depth -= 1
+                if block.depth:
+                    still_open.append(block)
+                else:
+                    self.finished.append(block)
+            self.open_blocks = still_open
+        elif tag == 'h3':
+            for block in self.open_blocks:
+                if block.h3_depth:
+                    block.h3_depth -= 1
+
+    def handle_data(self, data):
+        for block in self.open_blocks:
+            if block.h3_depth:
+                block.title_parts.append(data)
+
+    def results(self):
+        """按结果块在文档中出现的顺序返回 (标题, URL) 列表"""
+        blocks = sorted(self.finished + self.open_blocks, key=lambda b: b.order)
+        return [(''.join(b.title_parts), b.url) for b in blocks
+                if b.title_parts is not None and b.url is not None]
+
+
+class StreamingBackend:
+    name = 'stream'
+
+    def parse(self, html_content):
+        """
+        流式扫描标签，只收集结果块中的第一个h3文本和第一个链接，不构建DOM树
+        :param html_content: 页面HTML内容
+        :return: (标题, URL) 列表
+        """
+        parser = _StreamingResultParser()
+        parser.feed(html_content)
+        parser.close()
+        return parser.results()
+
+
+BACKENDS = {
+    'lxml': LxmlBackend,
+    'stream': StreamingBackend,
+    'html.parser': BeautifulSoupBackend,
+}
+
+
+def get_parser(backend='auto'):
+    """
+    获取搜索结果解析器
+    :param backend: 'auto', 'lxml', 'stream' 或 'html.parser'；'auto' 优先使用lxml，不可用时回退到html.parser
+    :return: 解析器实例，提供 parse(html_content) 方法
+    """
+    if backend == 'auto':
+        try:
+            return LxmlBackend()
+        except ImportError:
+            return BeautifulSoupBackend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown parser backend: {backend}")
+    return BACKENDS[backend]()
@@ -1,192 +1,61 @@
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from datetime import datetime, timedelta
-import time
-import re
-import logging
-from urllib.parse import quote
-import random
+import argparse
+from response_cache import ResponseCache
+from seen_index import SeenIndex
+from feed_source import FEED, FeedSource
+from poll_planner import PollPlanner
+from metrics import add_arguments, instrumented
+from parse_pool import ParsePool
+# 监控器在CLI、GUI和守护进程间共用，保留从本模块导入的方式
+from monitor_core import GameSiteMonitor, add_fetch_arguments, create_rate_control, log_rate_control
 
-class GameSiteMonitor:
-    def __init__(self, sites_file="game_sites.txt"):
-        """
-        初始化监控器
-        :param sites_file: 包含游戏网站列表的文本文件
-        """
-        self.sites = self._load_sites(sites_file)
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        self.setup_logging()
-
-    def setup_logging(self):
-        """设置日志"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('game_monitor.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging
-
-    def _load_sites(self, filename):
-        """加载网站列表"""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return [line.strip() for line in f if line.strip()]
-        except FileNotFoundError:
-            raise Exception(f"Sites file {filename} not found!")
-
-    def build_google_search_url(self, site, time_range):
-        """
-        构建Google搜索URL
-        :param site: 网站域名
-        :param time_range: 时间范围('24h' or '1w')
-        :return: 编码后的搜索URL
-        """
-        base_url = "https://www.google.com/search"
-        if time_range == '24h':
-            tbs = 'qdr:d'  # 最近24小时
-        elif time_range == '1w':
-            tbs = 'qdr:w'  # 最近1周
-        else:
-            raise ValueError("Invalid time range")
-
-        query = f'site:{site}'
-        params = {
-            'q': query,
-            'tbs': tbs,
-            'num': 100  # 每页结果数
-        }
-
-        query_string = '&'.join([f'{k}={quote(str(v))}' for k, v in params.items()])
-        return f"{base_url}?{query_string}"
-
-    def extract_search_results(self, html_content):
-        """
-        从Google搜索结果页面提取信息
-        :param html_content: 页面HTML内容
-        :return: 提取的URL和标题列表
-        """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        results = []
-
-        # 查找搜索结果
-        for result in soup.select('div.g'):
-            try:
-                title_elem = result.select_one('h3')
-                url_elem = result.select_one('a')
-
-                if title_elem and url_elem:
-                    title = title_elem.get_text()
-                    url = url_elem['href']
-
-                    # 提取可能的游戏名称
-                    game_name = self.extract_game_name(title)
-
-                    if game_name:
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'game_name': game_name
-                        })
-            except Exception as e:
-                self.logger.error(f"Error extracting result: {str(e)}")
-
-        return results
-
-    def extract_game_name(self, title):
-        """
-        从标题中提取可能的游戏名称
-        :param title: 页面标题
-        :return: 提取的游戏名称或None
-        """
-        # 这里可以根据具体网站的标题特征来优化游戏名称提取规则
-        patterns = [
-            r'《(.+?)》',  # 中文书名号
-            r'"(.+?)"',    # 英文引号
-            r'【(.+?)】',  # 中文方括号
-            r'\[(.+?)\]'   # 英文方括号
-        ]
-
-        for pattern in patterns:
-            match = re.search(pattern, title)
-            if match:
-                return match.group(1)
-
-        # 如果没有特定标记，返回清理后的标题
-        cleaned_title = re.sub(r'(攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏)', '', title)
-        return cleaned_title.strip()
-
-    def monitor_site(self, site, time_range):
-        """
-        监控单个网站
-        :param site: 网站域名
-        :param time_range: 时间范围
-        :return: 搜索结果列表
-        """
-        search_url = self.build_google_search_url(site, time_range)
-        self.logger.info(f"Monitoring {site} for {time_range} timeframe")
-
-        try:
-            response = requests.get(search_url, headers=self.headers)
-            if response.status_code == 200:
-                results = self.extract_search_results(response.text)
-                self.logger.info(f"Found {len(results)} results for {site}")
-                return results
-            else:
-                self.logger.error(f"Failed to fetch results for {site}: Status code {response.status_code}")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error monitoring {site}: {str(e)}")
-            return []
-
-    def monitor_all_sites(self, time_ranges=None):
-        """
-        监控所有网站
-        :param time_ranges: 时间范围列表
-        :return: 包含所有结果的DataFrame
-        """
-        if time_ranges is None:
-            time_ranges = ['24h', '1w']
-
-        all_results = []
-
-        for site in self.sites:
-            for time_range in time_ranges:
-                results = self.monitor_site(site, time_range)
-                for result in results:
-                    result.update({
-                        'site': site,
-                        'time_range': time_range,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                all_results.extend(results)
-
-                # 随机延时，避免请求过快
-                time.sleep(random.uniform(2, 5))
-
-        # 转换为DataFrame并保存
-        if all_results:
-            df = pd.DataFrame(all_results)
-            output_file = f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}.csv'
-            df.to_csv(output_file, index=False, encoding='utf-8-sig')
-            self.logger.info(f"Results saved to {output_file}")
-            return df
-        else:
-            self.logger.warning("No results found")
-            return pd.DataFrame()
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description="监控游戏网站的新页面")
+    parser.add_argument('--sites-file', default="game_sites.txt", help="游戏网站列表文件")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地响应缓存")
+    parser.add_argument('--replay', action='store_true', help="仅回放缓存中的页面，不发起网络请求")
+    parser.add_argument('--all', action='store_true', help="输出全部结果，不按已见URL索引过滤")
+    parser.add_argument('--restart', action='store_true', help="忽略当天已完成的任务，重新监控全部网站")
+    parser.add_argument('--source', choices=['search', 'feed', 'both'], default='search',
+                        help="新页面来源：site:搜索、网站的sitemap/RSS，或两者都用")
+    parser.add_argument('--adaptive', action='store_true',
+                        help="按各网站的新页面速度安排查询：安静的网站少查，'24h'能覆盖时跳过'1w'")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="解析搜索结果页的工作进程数，0表示在抓取线程中直接解析")
+    add_fetch_arguments(parser)
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """按命令行参数运行监控并输出统计"""
     # 创建监控器实例
-    monitor = GameSiteMonitor()
+    response_cache = None if args.no_cache else ResponseCache(replay_only=args.replay)
+    seen_index = None if args.all else SeenIndex()
+    # 轮询计划从已见索引的查询记录中学习
+    planner = PollPlanner(seen_index) if args.adaptive and seen_index is not None else None
+    # 按主机和按代理的自适应限速共用一个控制器
+    rate_controller, scheduler, proxy_pool = create_rate_control(args.proxies)
+    feed_source = None
+    time_ranges = ['24h', '1w']
+    if args.source != 'search':
+        feed_source = FeedSource.from_config_file()
+        time_ranges = [FEED] if args.source == 'feed' else time_ranges + [FEED]
+    parse_pool = ParsePool(args.parse_workers) if args.parse_workers > 0 else None
+    monitor = GameSiteMonitor(args.sites_file, scheduler=scheduler,
+                              response_cache=response_cache, seen_index=seen_index, proxy_pool=proxy_pool,
+                              max_pages=args.max_pages, feed_source=feed_source, planner=planner,
+                              parse_pool=parse_pool, engine=args.engine)
 
     # 开始监控
-    results_df = monitor.monitor_all_sites()
+    results_df = monitor.monitor_all_sites(time_ranges, resume=not args.restart)
+    for resource in (response_cache, seen_index, feed_source, parse_pool):
+        if resource is not None:
+            resource.close()
+    log_rate_control(monitor.logger, rate_controller, proxy_pool)
 
     # 输出统计信息
     if not results_df.empty:
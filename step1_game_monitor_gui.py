@@ -1,17 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-from datetime import datetime
-import time
-import re
 import logging
-from urllib.parse import quote
-import random
 from threading import Thread
 import os
 import json
+from feed_source import FEED
+from daemon import DEFAULT_PORT, DaemonClient
+from gui_widgets import RingLog, UIBridge, VirtualTable
+
+# 结果表的列：(列名, 标题, 宽度)
+RESULT_COLUMNS = [('site', '网站', 120), ('time_range', '范围', 50), ('game_name', '游戏名称', 150),
+                  ('url', '链接', 260)]
+
 
 class Config:
     def __init__(self, config_file="config.json"):
@@ -25,6 +25,14 @@ class Config:
             "proxy_enabled": False,
             "proxy_host": "127.0.0.1",
             "proxy_port": "7890",
+            "proxy_pool": [],
+            "proxy_pool_file": "",
+            "max_pages": 5,
+            "feed_urls": {},
+            "daemon_url": f"http://127.0.0.1:{DEFAULT_PORT}",
+            "adaptive_polling": False,
+            "engine": "threads",
+            "log_max_lines": 5000,
             "time_range": "24h"
         }
         
@@ -58,6 +66,13 @@ class GameMonitorGUI:
         self.setup_styles()
         self.setup_gui()
         self.setup_logging()
+
+        # 工作线程通过队列更新界面，Tk主循环定时批量处理
+        self.bridge = UIBridge(self.root)
+        self.bridge.on('log', self.show_messages)
+        self.bridge.on('results', self.show_results)
+        self.bridge.on('call', lambda callbacks: [callback() for callback in callbacks])
+        self.bridge.start()
         
         # 加载保存的配置
         self.load_saved_config()
@@ -139,6 +154,8 @@ class GameMonitorGUI:
                        value="24h").pack(side=tk.LEFT, padx=5)
         ttk.Radiobutton(time_frame, text="最近一周", variable=self.time_range, 
                        value="1w").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(time_frame, text="网站sitemap/RSS", variable=self.time_range,
+                       value=FEED).pack(side=tk.LEFT, padx=5)
 
         # 开始按钮
         self.start_button = ttk.Button(main_frame, text="开始监控", command=self.start_monitoring)
@@ -148,17 +165,29 @@ class GameMonitorGUI:
         self.progress_var = tk.StringVar(value="准备就绪")
         ttk.Label(main_frame, textvariable=self.progress_var).pack(pady=5)
 
-        # 结果显示区域
+        # 结果显示区域：结果表和日志分两页
         result_frame = ttk.LabelFrame(main_frame, text="监控结果", padding=5)
         result_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-
-        # 创建文本框和滚动条
-        self.result_text = tk.Text(result_frame, height=20, width=70)
-        scrollbar = ttk.Scrollbar(result_frame, orient=tk.VERTICAL, command=self.result_text.yview)
+        notebook = ttk.Notebook(result_frame)
+        notebook.pack(fill=tk.BOTH, expand=True)
+
+        # 结果表只渲染可见的行
+        table_frame = ttk.Frame(notebook)
+        notebook.add(table_frame, text="结果")
+        self.result_table = VirtualTable(table_frame, [(name, heading) for name, heading, _ in RESULT_COLUMNS],
+                                         widths=[width for _, _, width in RESULT_COLUMNS])
+        self.result_table.pack(fill=tk.BOTH, expand=True)
+
+        # 日志只保留最后若干行
+        log_frame = ttk.Frame(notebook)
+        notebook.add(log_frame, text="日志")
+        self.result_text = tk.Text(log_frame, height=20, width=70)
+        scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.result_text.yview)
         self.result_text.configure(yscrollcommand=scrollbar.set)
         
         self.result_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.log_view = RingLog(self.result_text, max_lines=self.config.config["log_max_lines"])
 
     def load_saved_config(self):
         """加载保存的配置"""
@@ -201,17 +230,42 @@ class GameMonitorGUI:
 
     def on_closing(self):
         """窗口关闭时的处理"""
+        self.bridge.stop()
         self.save_current_config()
         self.root.destroy()
 
     def update_progress(self, message):
-        """更新进度显示"""
-        self.progress_var.set(message)
-        self.result_text.insert(tk.END, message + "\n")
-        self.result_text.see(tk.END)
+        """更新进度显示，可在任意线程中调用"""
+        self.bridge.post('log', message)
+
+    def add_results(self, site, time_range, results):
+        """把一个查询的结果加入结果表，可在任意线程中调用"""
+        self.bridge.post('results', [(site, time_range, result['game_name'], result['url']) for result in results])
+
+    def show_messages(self, messages):
+        """在主线程中显示一批日志消息"""
+        self.progress_var.set(messages[-1])
+        self.log_view.extend(messages)
+
+    def show_results(self, batches):
+        """在主线程中追加一批结果行"""
+        self.result_table.extend([row for rows in batches for row in rows])
+
+    def clear_results(self):
+        self.log_view.clear()
+        self.result_table.clear()
 
     def start_monitoring(self):
         """开始监控"""
+        # 本机已运行守护进程时直接连接它，不再启动自己的监控线程
+        daemon_url = self.config.config.get("daemon_url")
+        if daemon_url:
+            client = DaemonClient(daemon_url, timeout=1)
+            if client.available():
+                self.save_current_config()
+                self.attach_daemon(client)
+                return
+
         if not self.file_path.get():
             messagebox.showerror("错误", "请选择网站列表文件！")
             return
@@ -227,25 +281,120 @@ class GameMonitorGUI:
         self.start_button.configure(state='disabled')
         
         # 清空结果显示
-        self.result_text.delete(1.0, tk.END)
+        self.clear_results()
         
         # 在新线程中运行监控
         Thread(target=self.run_monitor, daemon=True).start()
 
+    def attach_daemon(self, client):
+        """连接已运行的守护进程：请求立即轮询它的全部网站，之后定时获取新结果"""
+        self.start_button.configure(state='disabled')
+        self.clear_results()
+        try:
+            status = client.status()
+            ticket = client.run_now()
+        except Exception as e:
+            self.update_progress(f"连接守护进程失败: {str(e)}")
+            self.start_button.configure(state='normal')
+            return
+        self.update_progress(f"已连接守护进程 {client.url}，使用其网站列表({len(status['sites'])} 个网站)")
+        self.daemon_seq = status['result_seq']
+        self.root.after(1000, self.poll_daemon, client, ticket['cycle'], 0)
+
+    def poll_daemon(self, client, cycle, found, limit=500):
+        """
+        定时获取守护进程的新结果，请求的一轮完成且结果取完后恢复开始按钮
+        :param client: DaemonClient
+        :param cycle: 等待完成的轮次
+        :param found: 已显示的新结果数
+        :param limit: 每次最多获取的结果数
+        """
+        try:
+            # 先取状态再取结果，确认一轮完成时它的结果都已在队列中
+            status = client.status()
+            results = client.results(self.daemon_seq, limit)
+        except Exception as e:
+            self.update_progress(f"与守护进程的连接中断: {str(e)}")
+            self.start_button.configure(state='normal')
+            return
+        if results:
+            self.daemon_seq = results[-1]['seq']
+            self.show_results([[(result['site'], result['time_range'], result['game_name'], result['url'])
+                                for result in results]])
+        found += len(results)
+        if status['cycles'] >= cycle and len(results) < limit:
+            self.update_progress(f"\n=== 监控统计 ===\n总计发现新页面: {found}")
+            self.update_progress(f"结果已保存至: {status['output_file']}")
+            self.start_button.configure(state='normal')
+            return
+        if status['current_cycle']:
+            self.progress_var.set(f"守护进程正在执行第 {status['current_cycle']['number']} 轮，"
+                                  f"已发现新页面 {found} 个")
+        self.root.after(1000, self.poll_daemon, client, cycle, found)
+
     def run_monitor(self):
         """运行监控任务"""
+        # 监控相关模块(requests、解析器等)在开始监控时才导入，窗口可以立即显示
+        from fetch_scheduler import HostScheduler
+        from monitor_core import GameSiteMonitor
+        from poll_planner import PollPlanner
+        from proxy_pool import ProxyPool
+        from rate_control import AIMDController
+        from response_cache import ResponseCache
+        from seen_index import SeenIndex
+        from feed_source import FeedSource
         try:
             proxy_host = self.proxy_host.get() if self.proxy_enabled.get() else None
             proxy_port = self.proxy_port.get() if self.proxy_enabled.get() else None
             
+            # 按主机和按代理的自适应限速共用一个控制器
+            rate_controller = AIMDController()
+            # config.json中配置了代理列表时使用代理池轮换
+            proxy_pool = None
+            config = self.config.config
+            if self.proxy_enabled.get() and (config.get("proxy_pool") or config.get("proxy_pool_file")):
+                proxy_pool = ProxyPool.from_config({**config, "proxy_host": proxy_host, "proxy_port": proxy_port},
+                                                   rate_controller=rate_controller)
+
+            response_cache = ResponseCache()
+            seen_index = SeenIndex()
+            # 按各网站的新页面速度跳过未到期的网站
+            planner = PollPlanner(seen_index) if config.get("adaptive_polling") else None
+            # 选择sitemap/RSS时直接读取网站公开的新页面列表，不经过搜索
+            feed_source = None
+            if self.time_range.get() == FEED:
+                proxies = {'http': f'http://{proxy_host}:{proxy_port}',
+                           'https': f'http://{proxy_host}:{proxy_port}'} if proxy_host and proxy_port else None
+                feed_source = FeedSource(feed_urls=config.get("feed_urls"), proxies=proxies)
             monitor = GameSiteMonitor(
                 sites_file=self.file_path.get(),
                 proxy_host=proxy_host,
                 proxy_port=proxy_port,
-                logger_callback=self.update_progress
+                logger_callback=self.update_progress,
+                result_callback=self.add_results,
+                scheduler=HostScheduler(rate_controller=rate_controller),
+                response_cache=response_cache,
+                seen_index=seen_index,
+                proxy_pool=proxy_pool,
+                max_pages=config.get("max_pages", 5),
+                feed_source=feed_source,
+                planner=planner,
+                engine=config.get("engine", "threads"),
+                output_format='game_monitor_results_%Y%m%d_%H%M%S.csv'
             )
             
             results_df = monitor.monitor_all_sites([self.time_range.get()])
+            response_cache.close()
+            seen_index.close()
+            if feed_source is not None:
+                feed_source.close()
+                stats = feed_source.stats()
+                self.update_progress(f"sitemap/RSS: 请求 {stats['requests']} 次, 未变化 {stats['not_modified']} 个, "
+                                     f"跳过子sitemap {stats['skipped']} 个, 下载 {stats['bytes'] / 1024:.0f} KB")
+            if proxy_pool is not None:
+                for state in proxy_pool.stats():
+                    self.update_progress(f"代理 {state['proxy']}: 健康分 {state['score']}, "
+                                         f"成功 {state['successes']}, 失败 {state['failures']}, 封禁 {state['blocks']}")
             
             if not results_df.empty:
                 self.update_progress("\n=== 监控统计 ===")
@@ -262,206 +411,9 @@ class GameMonitorGUI:
         except Exception as e:
             self.update_progress(f"发生错误: {str(e)}")
         finally:
-            # 重新启用开始按钮
-            self.root.after(0, lambda: self.start_button.configure(state='normal'))
-
-class GameSiteMonitor:
-    def __init__(self, sites_file="game_sites.txt", proxy_host=None, proxy_port=None, logger_callback=None):
-        """
-        初始化监控器
-        :param sites_file: 包含游戏网站列表的文本文件
-        :param proxy_host: 代理主机地址
-        :param proxy_port: 代理端口
-        :param logger_callback: 日志回调函数
-        """
-        self.sites = self._load_sites(sites_file)
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        # 设置代理
-        self.proxies = None
-        if proxy_host and proxy_port:
-            self.proxies = {
-                'http': f'http://{proxy_host}:{proxy_port}',
-                'https': f'http://{proxy_host}:{proxy_port}'
-            }
-        
-        self.logger_callback = logger_callback
-        self.last_output_file = None
-        self.setup_logging()
+            # 重新启用开始按钮(由主线程执行)
+            self.bridge.post('call', lambda: self.start_button.configure(state='normal'))
 
-    def setup_logging(self):
-        """设置日志"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler('game_monitor.log'),
-                logging.StreamHandler()
-            ]
-        )
-        self.logger = logging
-
-    def _load_sites(self, filename):
-        """加载网站列表"""
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return [line.strip() for line in f if line.strip()]
-        except FileNotFoundError:
-            raise Exception(f"Sites file {filename} not found!")
-        except Exception as e:
-            raise Exception(f"Error loading sites file: {str(e)}")
-
-    def log_message(self, message):
-        """统一的日志记录函数"""
-        if self.logger_callback:
-            self.logger_callback(message)
-        self.logger.info(message)
-
-    def build_google_search_url(self, site, time_range):
-        """
-        构建Google搜索URL
-        :param site: 网站域名
-        :param time_range: 时间范围('24h' or '1w')
-        :return: 编码后的搜索URL
-        """
-        base_url = "https://www.google.com/search"
-        if time_range == '24h':
-            tbs = 'qdr:d'  # 最近24小时
-        elif time_range == '1w':
-            tbs = 'qdr:w'  # 最近1周
-        else:
-            raise ValueError("Invalid time range")
-        
-        query = f'site:{site}'
-        params = {
-            'q': query,
-            'tbs': tbs,
-            'num': 100  # 每页结果数
-        }
-        
-        query_string = '&'.join([f'{k}={quote(str(v))}' for k, v in params.items()])
-        return f"{base_url}?{query_string}"
-
-    def extract_search_results(self, html_content):
-        """
-        从Google搜索结果页面提取信息
-        :param html_content: 页面HTML内容
-        :return: 提取的URL和标题列表
-        """
-        soup = BeautifulSoup(html_content, 'html.parser')
-        results = []
-        
-        # 查找搜索结果
-        for result in soup.select('div.g'):
-            try:
-                title_elem = result.select_one('h3')
-                url_elem = result.select_one('a')
-                
-                if title_elem and url_elem:
-                    title = title_elem.get_text()
-                    url = url_elem['href']
-                    
-                    # 提取可能的游戏名称
-                    game_name = self.extract_game_name(title)
-                    
-                    if game_name:
-                        results.append({
-                            'title': title,
-                            'url': url,
-                            'game_name': game_name
-                        })
-            except Exception as e:
-                self.log_message(f"Error extracting result: {str(e)}")
-                
-        return results
-
-    def extract_game_name(self, title):
-        """
-        从标题中提取可能的游戏名称
-        :param title: 页面标题
-        :return: 提取的游戏名称或None
-        """
-        patterns = [
-            r'《(.+?)》',  # 中文书名号
-            r'"(.+?)"',    # 英文引号
-            r'【(.+?)】',  # 中文方括号
-            r'\[(.+?)\]'   # 英文方括号
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, title)
-            if match:
-                return match.group(1)
-        
-        # 如果没有特定标记，返回清理后的标题
-        cleaned_title = re.sub(r'(攻略|评测|资讯|下载|官网|专区|合集|手游|网游|页游|主机游戏|单机游戏)', '', title)
-        return cleaned_title.strip()
-
-    def monitor_site(self, site, time_range):
-        """
-        监控单个网站
-        :param site: 网站域名
-        :param time_range: 时间范围
-        :return: 搜索结果列表
-        """
-        search_url = self.build_google_search_url(site, time_range)
-        self.log_message(f"Monitoring {site} for {time_range} timeframe")
-        
-        try:
-            response = requests.get(
-                search_url, 
-                headers=self.headers,
-                proxies=self.proxies,
-                timeout=30  # 添加超时设置
-            )
-            if response.status_code == 200:
-                results = self.extract_search_results(response.text)
-                self.log_message(f"Found {len(results)} results for {site}")
-                return results
-            else:
-                self.log_message(f"Failed to fetch results for {site}: Status code {response.status_code}")
-                return []
-        except Exception as e:
-            self.log_message(f"Error monitoring {site}: {str(e)}")
-            return []
-
-    def monitor_all_sites(self, time_ranges=None):
-        """
-        监控所有网站
-        :param time_ranges: 时间范围列表
-        :return: 包含所有结果的DataFrame
-        """
-        if time_ranges is None:
-            time_ranges = ['24h', '1w']
-            
-        all_results = []
-        
-        for site in self.sites:
-            for time_range in time_ranges:
-                results = self.monitor_site(site, time_range)
-                for result in results:
-                    result.update({
-                        'site': site,
-                        'time_range': time_range,
-                        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    })
-                all_results.extend(results)
-                
-                # 随机延时，避免请求过快
-                time.sleep(random.uniform(2, 5))
-        
-        # 转换为DataFrame并保存
-        if all_results:
-            df = pd.DataFrame(all_results)
-            self.last_output_file = f'game_monitor_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-            df.to_csv(self.last_output_file, index=False, encoding='utf-8-sig')
-            self.log_message(f"Results saved to {self.last_output_file}")
-            return df
-        else:
-            self.log_message("No results found")
-            return pd.DataFrame()
 def main():
     root = tk.Tk()
     app = GameMonitorGUI(root)
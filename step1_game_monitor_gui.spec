@@ -6,11 +6,12 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    # serp_parser在函数内导入lxml，"engine": "async"时才导入async_monitor和httpx，显式列出以确保打包进GUI
+    hiddenimports=['monitor_core', 'lxml', 'lxml.etree', 'lxml.html', 'lxml._elementpath', 'async_monitor', 'httpx'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=['matplotlib'],
+    excludes=['matplotlib', 'openai', 'pytrends'],
     noarchive=False,
     optimize=0,
 )
@@ -26,7 +27,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
@@ -1,60 +1,232 @@
-import openai  # 确保已安装 openai 库
-import pandas as pd
-from pytrends.request import TrendReq
-from datetime import datetime, timedelta
+from datetime import datetime
 import time
 import logging
-import os
-from openai import OpenAI
+import re
+import random
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from keyword_cache import KeywordCache
+from metrics import add_arguments, instrumented, metrics
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# 设置OpenAI API密钥
-openai.api_key = 'xxxx'  # 替换为实际的API密钥
+# OpenAI API密钥；openai、pandas等较重的库在用到时才导入，--help和被其他模块导入时不加载
+API_KEY = 'xxxx'  # 替换为实际的API密钥
+
+
+SYS_PROMPT = "You are a Google SEO expert. I will give you some game information, and you need to help me summarize the information into a single Google SEO keyword. Please output only the keyword."
+BATCH_SYS_PROMPT = SYS_PROMPT + " You will receive several numbered items, one per line. Answer every item with one line in the form '<number>. <keyword>', in the same order, and output nothing else."
+MODEL_NAME = "deepseek-ai/DeepSeek-V2.5"  # "gpt-4o", #gpt-4o gpt-3.5-turbo  gpt-4o-ca, gpt-3.5-turbo-16k
+BASE_URL = "https://api.siliconflow.cn/v1"
+
+NUMBERED_ANSWER = re.compile(r'^\s*(\d+)\s*[.):、]\s*(.*?)\s*$')
+
+
+class KeywordExtractor:
+    def __init__(self, api_key=None, base_url=BASE_URL, model_name=MODEL_NAME, batch_size=10,
+                 max_workers=4, max_retries=5, timeout=60, cache=None):
+        """
+        批量并发的关键词提取器，所有请求共用一个OpenAI客户端
+        :param api_key: API密钥，默认使用API_KEY
+        :param base_url: OpenAI兼容接口地址，可替换为本地模拟服务
+        :param model_name: 模型名称
+        :param batch_size: 每个提示中打包的条目数
+        :param max_workers: 同时进行的最大请求数
+        :param max_retries: 限流或服务端错误时的最大重试次数
+        :param timeout: 单次请求超时时间(秒)
+        :param cache: 可选的KeywordCache，命中的文本不再请求API
+        """
+        self.model_name = model_name
+        self.cache = cache
+        self.batch_size = max(1, int(batch_size))
+        self.max_workers = max(1, int(max_workers))
+        self.max_retries = max_retries
+        from openai import OpenAI  # 确保已安装 openai 库
+        # 重试由本类统一处理，以便限流时所有线程一起暂停
+        self.client = OpenAI(api_key=api_key or API_KEY, base_url=base_url,
+                             max_retries=0, timeout=timeout)
+        self.lock = threading.Lock()
+        self.pause_until = 0.0
+        self.request_count = 0
+
+    def _wait_for_rate_limit(self):
+        """若最近触发过限流，等待共享的冷却时间结束"""
+        with self.lock:
+            delay = self.pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _complete(self, sys_prompt, user_content):
+        """发送一次补全请求，限流和临时错误时指数退避重试"""
+        import openai
+        messages = [{'role': 'system', 'content': sys_prompt},
+                    {'role': 'user', 'content': user_content}, ]
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_rate_limit()
+            try:
+                with self.lock:
+                    self.request_count += 1
+                start = time.perf_counter()
+                try:
+                    completion = self.client.chat.completions.create(model=self.model_name, messages=messages)
+                finally:
+                    metrics.observe('llm_request', time.perf_counter() - start, model=self.model_name)
+                usage = getattr(completion, 'usage', None)
+                if usage is not None:
+                    metrics.inc('llm_tokens', usage.prompt_tokens or 0, kind='prompt')
+                    metrics.inc('llm_tokens', usage.completion_tokens or 0, kind='completion')
+                metrics.inc('llm_requests', outcome='ok')
+                return completion.choices[0].message.content or ""
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                metrics.inc('llm_requests', outcome=type(e).__name__)
+                if attempt == self.max_retries:
+                    raise
+                delay = min(60, 2 ** attempt) * random.uniform(0.5, 1.5)
+                response = getattr(e, 'response', None)
+                retry_after = response.headers.get('Retry-After') if response is not None else None
+                if retry_after:
+                    try:
+                        delay = float(retry_after)
+                    except ValueError:
+                        pass
+                if isinstance(e, openai.RateLimitError):
+                    # 限流时所有线程共同暂停，避免继续触发429
+                    with self.lock:
+                        self.pause_until = max(self.pause_until, time.monotonic() + delay)
+                logging.warning(f"请求失败，{delay:.1f}秒后重试 ({attempt + 1}/{self.max_retries}): {e}")
+                time.sleep(delay)
+
+    def extract_one(self, text):
+        """提取单条关键词，失败时返回空字符串"""
+        try:
+            # 模型输出可能带有首尾空白或换行，压成一行后再作为关键词使用
+            return ' '.join(self._complete(SYS_PROMPT, text).split())
+        except Exception as e:
+            logging.error(f"关键词提取时出错: {e}")
+            return ""
+
+    def extract_batch(self, texts):
+        """
+        将多条文本打包到一个提示中，按编号解析回每一条的关键词
+        解析结果不完整时对缺失的条目逐条重试
+        :param texts: 文本列表
+        :return: 与texts一一对应的关键词列表
+        """
+        if len(texts) == 1:
+            return [self.extract_one(texts[0])]
+
+        answers = {}
+        try:
+            # 换行会破坏编号格式，打包前先压成一行
+            user_content = "\n".join(f"{i}. {' '.join(text.split())}" for i, text in enumerate(texts, 1))
+            for line in self._complete(BATCH_SYS_PROMPT, user_content).splitlines():
+                match = NUMBERED_ANSWER.match(line)
+                if match and 1 <= int(match.group(1)) <= len(texts) and match.group(2):
+                    answers.setdefault(int(match.group(1)), match.group(2))
+        except Exception as e:
+            logging.error(f"批量关键词提取时出错: {e}")
+
+        missing = len(texts) - len(answers)
+        if missing:
+            logging.warning(f"批量结果缺少{missing}条，逐条重试")
+        return [answers[i] if i in answers else self.extract_one(text) for i, text in enumerate(texts, 1)]
+
+    def extract_all(self, texts):
+        """
+        分批并发提取关键词；配置缓存时只请求未命中的文本，相同文本只请求一次
+        :param texts: 文本列表
+        :return: 与texts顺序一致的关键词列表
+        """
+        texts = list(texts)
+        if self.cache is not None:
+            keys = [self.cache.make_key(text, self.model_name, SYS_PROMPT) for text in texts]
+            found = self.cache.get_many(keys)
+        else:
+            keys = texts
+            found = {}
+
+        # 未命中的文本按缓存键去重后再请求
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in pending:
+                pending[key] = text
+        pending_keys = list(pending)
+        pending_texts = list(pending.values())
+
+        batches = [pending_texts[i:i + self.batch_size] for i in range(0, len(pending_texts), self.batch_size)]
+        extracted = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='llm') as executor:
+            for batch_keywords in executor.map(self.extract_batch, batches):
+                extracted.extend(batch_keywords)
+        found.update(zip(pending_keys, extracted))
+        if self.cache is not None:
+            self.cache.put_many(zip(pending_keys, extracted), self.model_name)
+
+        logging.info(f"关键词提取完成: {len(texts)}条, {self.request_count}次请求")
+        return [found[key] for key in keys]
+
+
+_default_extractor = None
 
 
 def extract_keywords_from_game_names(game_names):
     """使用GPT API从游戏名称中提取关键词"""
-    keywords = ""
-    try:
-        sys_prompt = "You are a Google SEO expert. I will give you some game information, and you need to help me summarize the information into a single Google SEO keyword. Please output only the keyword."
-        # prompt = "从以下游戏名称中提取相关的AI关键词:\n\n" + "\n".join(game_names)
-        model_name = "deepseek-ai/DeepSeek-V2.5"  # "gpt-4o", #gpt-4o gpt-3.5-turbo  gpt-4o-ca, gpt-3.5-turbo-16k
-        client = OpenAI(
-            api_key=openai.api_key,
-            base_url="https://api.siliconflow.cn/v1"
-        )
-        messages = [{'role': 'system', 'content': sys_prompt},
-                    {'role': 'user', 'content': game_names}, ]
-        completion = client.chat.completions.create(model=model_name, messages=messages)
-        ans_str = completion.choices[0].message.content
-        return ans_str
-        logging.info("关键词提取成功")
-    except Exception as e:
-        logging.error(f"关键词提取时出错: {e}")
-    return keywords
+    global _default_extractor
+    if _default_extractor is None:
+        _default_extractor = KeywordExtractor()
+    return _default_extractor.extract_one(game_names)
+
+
+def build_keyword_input(game_name, title):
+    """拼接游戏名称和标题作为关键词提取的输入"""
+    import pandas as pd
+    game_name = "" if pd.isna(game_name) else str(game_name)
+    title = "" if pd.isna(title) else str(title)
+    if game_name != title:
+        return (game_name + " " + title).strip()
+    return game_name
+
 
 def main():
     """主函数"""
-    filename = f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}.csv'
+    parser = argparse.ArgumentParser(description="使用LLM从监控结果中提取SEO关键词")
+    parser.add_argument('--input', default=f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}.csv',
+                        help="step1输出的CSV文件")
+    parser.add_argument('--base-url', default=BASE_URL, help="OpenAI兼容接口地址")
+    parser.add_argument('--batch-size', type=int, default=10, help="每个提示打包的条目数")
+    parser.add_argument('--workers', type=int, default=4, help="最大并发请求数")
+    parser.add_argument('--no-cache', action='store_true', help="不使用本地关键词缓存")
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented(args):
+        run(args)
+
+
+def run(args):
+    """按命令行参数提取关键词并保存"""
+    import pandas as pd
+    from title_clustering import cluster_titles
+    filename = args.input
     data = pd.read_csv(filename)
-    game_names = data['game_name'].dropna().tolist()
-    titles = data['title'].dropna().tolist()
-    count = 0
-    keyword_list = []
-    for i in range(len(game_names)):
-        name= game_names[i]
-        title = titles[i]
-        if name != titles:
-            name = name + " " + title
-        print("name", name)
-        count += 1
-        # if count > 2:
-        #     break
-        keyword = extract_keywords_from_game_names(name)
-        print("keyword", keyword)
-        keyword_list.append(keyword)
+
+    # 近似重复的标题归为一簇，每簇只请求代表行，关键词再回填到整簇
+    data['cluster_id'] = cluster_titles(data['title'].fillna(''))
+    # 簇编号是代表行的位置，read_csv得到的是RangeIndex，可直接与索引比较
+    representatives = data[data['cluster_id'] == data.index]
+    texts = [build_keyword_input(name, title)
+             for name, title in zip(representatives['game_name'], representatives['title'])]
+    logging.info(f"{len(data)}行聚类为{len(representatives)}个簇")
+
+    cache = None if args.no_cache else KeywordCache()
+    extractor = KeywordExtractor(base_url=args.base_url, batch_size=args.batch_size, max_workers=args.workers,
+                                 cache=cache)
+    keyword_by_cluster = dict(zip(representatives['cluster_id'], extractor.extract_all(texts)))
+    keyword_list = data['cluster_id'].map(keyword_by_cluster)
+    if cache is not None:
+        cache.report()
+        cache.close()
 
     # 将关键词列表添加到数据框中
     data['keywords'] = keyword_list  # 新增关键词列
@@ -1,10 +1,12 @@
+import numpy as np
 import pandas as pd
-from pytrends.request import TrendReq
 from datetime import datetime, timedelta
-import time
 import logging
-import os
-import random
+import argparse
+from metrics import add_arguments, instrumented
+from trends_scheduler import TrendsScheduler
+from trends_store import TrendsStore
+from trends_warehouse import TrendsWarehouse
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -14,76 +16,108 @@ def load_game_names(filename):
     """从CSV文件中加载game_name列"""
     try:
         data = pd.read_csv(filename)
-        game_names = data['keywords'].dropna().tolist()
-        url = data['url'].dropna().tolist()
+        data = data.dropna(subset=['keywords', 'url'])
+        # 同一簇(近似重复标题)和相同关键词只查询一次
+        if 'cluster_id' in data.columns:
+            data = data.drop_duplicates('cluster_id')
+        data = data.drop_duplicates('keywords')
+        game_names = data['keywords'].tolist()
+        url = data['url'].tolist()
         logging.info("成功加载游戏名称")
         return [game_names, url]
     except Exception as e:
         logging.error(f"加载游戏名称时出错: {e}")
         return []
 
-def get_ai_trends(filename, timeframe='today 1-m'):
-    pytrends = TrendReq(retries=3, backoff_factor=0.5, hl='en-US', tz=360, timeout=(5, 10))
-
+def select_trend_keywords(filename):
+    """从step2输出中选出需要查询Trends的关键词(跳过帖子类页面)"""
     ai_keywords_orgin, urls = load_game_names(filename)
     ai_keywords = []
     for i in range(len(ai_keywords_orgin)):
         url = urls[i]
         if "post" not in url:
             ai_keywords.append(ai_keywords_orgin[i])
-
-
-    all_trends = pd.DataFrame()
-
-    for i in range(0, len(ai_keywords), 2):
-        keywords_batch = ai_keywords[i:i+2]
-        try:
-            pytrends.build_payload(keywords_batch, timeframe=timeframe)
-            interest_over_time = pytrends.interest_over_time()
-            if not interest_over_time.empty:
-                # remove the column 'isPartial'
-                interest_over_time = interest_over_time.drop(columns=['isPartial'])
-                all_trends = pd.concat([all_trends, interest_over_time], axis=1)
-            # set random seed
-            random.seed(time.time())
-            time.sleep(random.uniform(2, 6))  # 增加延迟以避免被封禁
-        except Exception as e:
-            logging.error(f"Error fetching trends for {keywords_batch}: {e}")
-
-    return all_trends
-
-
-def calculate_trend_increase(df, urls):
-    print("df.columns", df.columns)
-    trends_data = []
-    for column in df.columns:
-        if column != 'isPartial':
-            start_value = df[column].iloc[0]  # 确保获取单个值
-            end_value = df[column].iloc[-1]    # 确保获取单个值
-            max_value = df[column].max()
-            avg_value = df[column].mean()
-            if isinstance(start_value, (int, float)):  # 检查是否为数值
-                print("end_value", start_value, end_value)
-                if start_value > 0:
-                    increase = (end_value - start_value) / start_value * 100
-                elif end_value > 0:
-                    increase = end_value
-                else:
-                    increase = 0
-                trends_data.append({
-                    'topic': column,
-                    'url': urls[df.columns.get_loc(column)],
-                    'start_value': start_value,
-                    'end_value': end_value,
-                    'max_value': max_value,
-                    'avg_value': avg_value,
-                    'increase': increase
-                })
-
-    trends_df = pd.DataFrame(trends_data)
-    if not trends_df.empty:
-        trends_df = trends_df.sort_values('increase', ascending=False).reset_index(drop=True)
-    return trends_df
+    return ai_keywords
+
+def get_ai_trends(filename, timeframe='today 1-m', scheduler=None, store=None):
+    """
+    抓取关键词的Google Trends数据
+    :param filename: step2输出的CSV文件
+    :param timeframe: Trends时间范围
+    :param scheduler: TrendsScheduler，默认每个请求打包4个关键词和1个锚点词
+    :param store: TrendsStore，提供时把原始值和缩放系数追加到历史仓库
+    :return: 以日期为索引、每个关键词一列(已按锚点缩放)的DataFrame
+    """
+    scheduler = scheduler or TrendsScheduler(timeframe=timeframe)
+    raw, factors = scheduler.fetch_raw(select_trend_keywords(filename), timeframe)
+    if raw.empty:
+        return raw
+    if store is not None:
+        rows = store.append(raw, factors)
+        logging.info(f"已写入趋势仓库 {store.directory}: {rows} 条记录")
+    return raw.mul(pd.Series(factors), axis=1)
+
+
+def _ratio(numerator, denominator):
+    """分母为正时取比值，否则沿用increase的约定：分子为正时取分子，否则为0"""
+    safe = np.where(denominator > 0, denominator, 1)
+    return np.where(denominator > 0, numerator / safe, np.where(numerator > 0, numerator, 0))
+
+
+def calculate_trend_increase(df, urls, window=7):
+    """
+    一次性计算所有关键词列的趋势指标
+    :param df: 以日期为索引、每个关键词一列的DataFrame
+    :param urls: {关键词: URL} 映射，或与df的列一一对应的URL列表
+    :param window: 首尾对比窗口的天数
+    :return: 按increase降序排列的指标DataFrame
+    """
+    values_df = df.drop(columns=['isPartial'], errors='ignore').select_dtypes('number')
+    if values_df.empty:
+        return pd.DataFrame()
+
+    topics = values_df.columns
+    values = values_df.to_numpy(dtype=float)
+    rows = values.shape[0]
+
+    start_value = values[0]
+    end_value = values[-1]
+    avg_value = np.nanmean(values, axis=0)
+    std_value = np.nanstd(values, axis=0)
+
+    # 线性回归斜率：每天的平均变化量
+    t = np.arange(rows, dtype=float) - (rows - 1) / 2
+    denominator = (t ** 2).sum()
+    regression_slope = (t @ np.nan_to_num(values - avg_value)) / denominator if denominator else np.zeros(len(topics))
+
+    # 数据不足window天时按实际天数计算，列名仍使用请求的window，保证不同批次的列一致
+    days = max(1, min(window, rows))
+    first_window = np.nanmean(values[:days], axis=0)
+    last_window = np.nanmean(values[-days:], axis=0)
+
+    if isinstance(urls, dict):
+        url_values = [urls.get(topic) for topic in topics]
+    elif len(urls) == len(topics):
+        url_values = list(urls)
+    else:
+        logging.warning(f"URL数量({len(urls)})与关键词列数({len(topics)})不一致，无法按位置对应")
+        url_values = [None] * len(topics)
+
+    trends_df = pd.DataFrame({
+        'topic': topics,
+        'url': url_values,
+        'start_value': start_value,
+        'end_value': end_value,
+        'max_value': np.nanmax(values, axis=0),
+        'avg_value': avg_value,
+        'increase': np.where(start_value > 0, _ratio(end_value - start_value, start_value) * 100,
+                             np.where(end_value > 0, end_value, 0)),
+        'slope': (end_value - start_value) / max(rows - 1, 1),
+        'regression_slope': regression_slope,
+        'volatility': _ratio(std_value, avg_value),
+        f'last{window}_first{window}_ratio': _ratio(last_window, first_window),
+    })
+    return trends_df.sort_values('increase', ascending=False, kind='stable').reset_index(drop=True)
 
 def save_data(df, filename):
     try:
@@ -92,23 +126,50 @@ def save_data(df, filename):
     except Exception as e:
         logging.error(f"保存数据时出错 {filename}: {e}")
 
-def collect_google_trends_data():
+def analyse_trends(warehouse, keywords, urls, today=None, days=30):
+    """
+    从历史仓库读取最近days天的数据，计算趋势指标和长期增长率
+    :param warehouse: TrendsWarehouse
+    :param keywords: 关键词列表
+    :param urls: {关键词: URL}
+    :param today: 截止日期，默认今天
+    :param days: 计算趋势指标使用的天数
+    :return: 指标DataFrame；没有数据时为空DataFrame
+    """
+    today = pd.Timestamp(today or datetime.now()).normalize()
+    trends_df = warehouse.store.load(keywords, start=today - timedelta(days=days - 1), end=today)
+    if trends_df.empty:
+        return pd.DataFrame()
+    increases_df = calculate_trend_increase(trends_df, urls)
+    return increases_df.join(warehouse.growth(keywords, today=today), on='topic')
+
+def collect_google_trends_data(days=30):
     logging.info("开始收集最近30天的Google Trends数据")
     filename = f'game_monitor_results_{datetime.now().strftime("%Y%m%d")}_update.csv'
-    trends_df = get_ai_trends(filename)
+    # 只增量抓取历史仓库中缺少的日期
+    warehouse = TrendsWarehouse(TrendsStore())
+    keywords = select_trend_keywords(filename)
+    warehouse.update(keywords)
+    ai_keywords_orgin, urls = load_game_names(filename)
+    increases_df = analyse_trends(warehouse, keywords, dict(zip(ai_keywords_orgin, urls)), days=days)
 
-    if not trends_df.empty:
-        ai_keywords_orgin, urls = load_game_names(filename)
-        increases_df = calculate_trend_increase(trends_df, urls)
-        logging.info("increases_df: ", increases_df)
-        os.makedirs('data', exist_ok=True)
+    if not increases_df.empty:
+        logging.info(f"increases_df:\n{increases_df.head(20)}")
         timestamp = datetime.now().strftime("%Y%m%d")
-        save_data(trends_df, f'data/genai_trends_raw_30days_{timestamp}.csv')
         save_data(increases_df, f'data/genai_trends_increases_30days_{timestamp}.csv')
     else:
         logging.warning("没有收集到Google Trends数据")
 
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="增量更新关键词的Google Trends历史并计算趋势指标")
+    add_arguments(parser)
+    args = parser.parse_args()
+    with instrumented(args):
+        logging.info("Google Trends GenAI 30天数据收集脚本启动")
+        collect_google_trends_data()
+        logging.info("数据收集完成")
+
+
 if __name__ == "__main__":
-    logging.info("Google Trends GenAI 30天数据收集脚本启动")
-    collect_google_trends_data()
-    logging.info("数据收集完成")
+    main()
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+
+from async_monitor import HostSlots
+from fake_server import FakeProxyServer, FakeRateLimitedServer, FakeServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from monitor_core import GameSiteMonitor
+from proxy_pool import ProxyPool
+from rate_control import AIMDController
+from response_cache import ResponseCache
+
+logging.disable(logging.ERROR)
+
+SITES = [f'https://site{i}.example' for i in range(5)]
+
+
+def make_monitor(tmp_path, base_url, engine, **kwargs):
+    sites_file = tmp_path / 'sites.txt'
+    sites_file.write_text('\n'.join(SITES) + '\n', encoding='utf-8')
+    return GameSiteMonitor(str(sites_file), search_base_url=f'{base_url}/search', max_pages=1,
+                           scheduler=HostScheduler(default_policy=HostPolicy(8, (0, 0))), engine=engine, **kwargs)
+
+
+def collect(monitor):
+    units = [(site, '24h') for site in monitor.sites]
+    return sorted((site, result['url']) for site, _, results in monitor.iter_results(units) for result in results)
+
+
+def test_async_engine_matches_threads(tmp_path):
+    with FakeServer(latency=0) as server:
+        threaded = collect(make_monitor(tmp_path, server.base_url, 'threads'))
+        asynchronous = collect(make_monitor(tmp_path, server.base_url, 'async'))
+    assert len(threaded) == len(SITES) * 10
+    assert asynchronous == threaded
+
+
+def test_async_engine_uses_response_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'))
+    with FakeServer(latency=0) as server:
+        first = collect(make_monitor(tmp_path, server.base_url, 'async', response_cache=cache))
+        requests_made = server.request_count
+        second = collect(make_monitor(tmp_path, server.base_url, 'async', response_cache=cache))
+        assert server.request_count == requests_made
+    assert second == first
+    assert cache.stats()['hits'] == len(SITES)
+    cache.close()
+
+
+def test_async_engine_uses_proxy_pool(tmp_path):
+    with FakeProxyServer(latency=0) as first, FakeProxyServer(latency=0) as second:
+        pool = ProxyPool([first.base_url, second.base_url])
+        # 搜索地址不可达，只有经过代理才能拿到结果
+        results = collect(make_monitor(tmp_path, 'http://search.invalid', 'async', proxy_pool=pool))
+        assert first.proxied_count + second.proxied_count == len(SITES)
+    assert len(results) == len(SITES) * 10
+    assert sum(state['successes'] for state in pool.stats()) == len(SITES)
+
+
+class ShrinkingScheduler:
+    """并发数可随时修改的调度器替身"""
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def concurrency_for(self, host):
+        return self.limit
+
+
+def test_host_slots_follow_the_current_window():
+    scheduler = ShrinkingScheduler(4)
+    active = []
+    peaks = {'before': 0, 'after': 0}
+
+    async def request(slots, phase):
+        async with slots.hold('host'):
+            active.append(1)
+            peaks[phase] = max(peaks[phase], len(active))
+            await asyncio.sleep(0.01)
+            active.pop()
+
+    async def run():
+        slots = HostSlots(scheduler)
+        await asyncio.gather(*(request(slots, 'before') for _ in range(8)))
+        # 限速器把窗口收缩到1后，同一主机只能有一个请求在途
+        scheduler.limit = 1
+        await asyncio.gather(*(request(slots, 'after') for _ in range(8)))
+
+    asyncio.run(run())
+    assert peaks == {'before': 4, 'after': 1}
+
+
+def test_async_engine_backs_off_after_429(tmp_path):
+    controller = AIMDController(initial_delay=0, min_delay=0, initial_window=8, max_window=8, jitter=0)
+    with FakeRateLimitedServer(capacity=3, latency=0) as server:
+        monitor = make_monitor(tmp_path, server.base_url, 'async')
+        monitor.scheduler = HostScheduler(default_policy=HostPolicy(8, (0, 0)), rate_controller=controller)
+        collect(monitor)
+        assert server.blocked_count
+    assert controller.stats()['127.0.0.1']['window'] < 8
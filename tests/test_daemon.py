@@ -0,0 +1,52 @@
+import logging
+
+from daemon import MonitorDaemon
+from fake_server import FakeServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from monitor_core import GameSiteMonitor
+from response_cache import ResponseCache
+from seen_index import SeenIndex
+
+logging.disable(logging.ERROR)
+
+SITE = 'hot.example'
+
+
+class VirtualClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_response_cache_does_not_hide_new_results(tmp_path, monkeypatch):
+    # 守护进程把结果追加到当前目录的CSV
+    monkeypatch.chdir(tmp_path)
+    sites_file = tmp_path / 'sites.txt'
+    sites_file.write_text(SITE + '\n', encoding='utf-8')
+    clock = VirtualClock(1_700_000_000.0)
+    published = {SITE: 5}
+
+    with FakeServer(latency=0, total_results=published.get) as server:
+        cache = ResponseCache(str(tmp_path / 'cache.sqlite'), clock=clock)
+        seen_index = SeenIndex(str(tmp_path / 'seen.sqlite'))
+        monitor = GameSiteMonitor(str(sites_file), search_base_url=f'{server.base_url}/search', max_pages=1,
+                                  scheduler=HostScheduler(default_policy=HostPolicy(8, (0, 0))),
+                                  seen_index=seen_index, response_cache=cache)
+        daemon = MonitorDaemon(monitor, clock=clock, default_interval=3600, min_interval=600, max_interval=6 * 3600)
+        # 默认12小时的有效期被降到最短间隔以下
+        assert cache.ttl < daemon.min_interval
+
+        assert daemon.run_cycle(daemon.due_sites()) == 5
+        requests_made = server.request_count
+
+        # 下一次到期时网站又发布了3个游戏，轮询必须重新请求而不是读缓存
+        published[SITE] = 8
+        clock.now += daemon.seconds_until_due()
+        assert daemon.due_sites() == [SITE]
+        assert daemon.run_cycle([SITE]) == 3
+        assert server.request_count > requests_made
+        assert daemon.sites[SITE]['last_new'] == 3
+        cache.close()
+        seen_index.close()
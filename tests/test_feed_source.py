@@ -0,0 +1,84 @@
+import gzip
+import logging
+
+from fake_server import FakeSitemapServer
+from feed_source import FeedSource, iter_entries, parse_date, title_from_url
+
+logging.disable(logging.ERROR)
+
+SITEMAP_INDEX = b'''<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>https://games.example/sitemap-0.xml.gz</loc><lastmod>2026-10-01</lastmod></sitemap>
+</sitemapindex>'''
+URLSET = b'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url>
+    <loc>https://games.example/games/moto-racer</loc><lastmod>2026-10-02T08:00:00Z</lastmod>
+    <image:image><image:loc>https://games.example/moto.png</image:loc><image:title>Cover</image:title></image:image>
+  </url>
+  <url><loc>https://games.example/games/zombie_farm.html</loc></url>
+</urlset>'''
+RSS = b'''<?xml version="1.0"?><rss version="2.0"><channel><title>Games</title>
+  <item><title>Play Moto Racer</title><link>https://games.example/games/moto-racer</link>
+        <pubDate>Fri, 02 Oct 2026 08:00:00 GMT</pubDate></item>
+</channel></rss>'''
+ATOM = b'''<?xml version="1.0"?><feed xmlns="http://www.w3.org/2005/Atom">
+  <entry><title>Moto Racer</title><link rel="edit" href="https://games.example/edit/1"/>
+         <link href="https://games.example/games/moto-racer"/><updated>2026-10-02T08:00:00Z</updated></entry>
+</feed>'''
+
+
+def chunked(data, size=7):
+    return (data[i:i + size] for i in range(0, len(data), size))
+
+
+def test_iter_entries_reads_every_feed_format():
+    moto = parse_date('2026-10-02T08:00:00Z')
+    assert list(iter_entries(chunked(SITEMAP_INDEX))) == [
+        ('sitemap', 'https://games.example/sitemap-0.xml.gz', parse_date('2026-10-01'), None)]
+    # gzip内容按魔数识别；图片扩展中的loc和title不当作页面
+    assert list(iter_entries(chunked(gzip.compress(URLSET)))) == [
+        ('page', 'https://games.example/games/moto-racer', moto, None),
+        ('page', 'https://games.example/games/zombie_farm.html', None, None)]
+    assert list(iter_entries(chunked(RSS))) == [
+        ('page', 'https://games.example/games/moto-racer', moto, 'Play Moto Racer')]
+    assert list(iter_entries(chunked(ATOM))) == [
+        ('page', 'https://games.example/games/moto-racer', moto, 'Moto Racer')]
+
+
+def test_dates_and_titles():
+    assert parse_date('Fri, 02 Oct 2026 08:00:00 GMT') == parse_date('2026-10-02T08:00:00+00:00')
+    assert parse_date('not a date') is None and parse_date('') is None
+    assert title_from_url('https://games.example/games/zombie_farm.html') == 'Zombie Farm'
+    assert title_from_url('https://games.example/') == ''
+
+
+def test_feed_source_only_reads_what_changed(tmp_path):
+    with FakeSitemapServer(history_days=30, games_per_day=10, chunk_size=50, latency=0) as server:
+        site = f'{server.base_url}/site0'
+        source = FeedSource(str(tmp_path / 'feeds.sqlite'))
+        # 第一次只输出最近7天的页面
+        first = list(source.iter_new(site))
+        source.commit()
+        assert abs(len(first) - 70) <= 1
+        assert all(url.startswith(f'{site}/games/') for _, url in first)
+
+        requests_made = server.request_count
+        assert list(source.iter_new(site)) == []
+        source.commit()
+        # 重新运行时不再读robots.txt，索引未变化时返回304
+        assert server.request_count - requests_made == 1
+        assert source.stats()['not_modified'] == 1
+
+        server.advance(1)
+        second = list(source.iter_new(site))
+        # 只下载有新游戏的子sitemap，其余lastmod未变的被跳过
+        assert source.stats()['skipped'] >= 5
+        assert abs(len(second) - 10) <= 1
+        assert not {url for _, url in second} & {url for _, url in first}
+
+        # 回滚后再次读取时重新输出这些页面
+        source.rollback()
+        assert len(list(source.iter_new(site))) == len(second)
+        source.close()
@@ -0,0 +1,69 @@
+import math
+
+import pandas as pd
+import pytest
+
+from bench_game_name import legacy_extract_game_name, synthetic_titles
+from game_name import GameNameExtractor
+
+TITLES = [
+    # 标记优先级：书名号 > 英文引号 > 中文方括号 > 英文方括号，与出现位置无关
+    '[Bracket] 【方括号】 "Quoted" 《书名号》',
+    '[Bracket] 【方括号】 "Quoted"',
+    '[Bracket] 【方括号】',
+    '[Bracket] only',
+    # 未闭合或空的标记
+    '《未闭合 "Quoted"',
+    '《》 [x]',
+    '""',
+    '【】攻略',
+    # 换行
+    '《第一行\n第二行》',
+    '"line one\nline two" [tag]',
+    '攻略\n官网\n',
+    # 非ASCII
+    '原神 攻略 官网',
+    'Pokémon Légendes 手游下载',
+    'ゼルダの伝説 単機游戏',
+    '🎮 Emoji Game 合集',
+    '  Plain ASCII Title  ',
+    '',
+    '   ',
+]
+
+
+@pytest.fixture(scope='module')
+def extractor():
+    return GameNameExtractor()
+
+
+@pytest.mark.parametrize('title', TITLES)
+def test_extract_matches_legacy(extractor, title):
+    assert extractor.extract(title) == legacy_extract_game_name(title)
+
+
+def test_extract_matches_legacy_on_synthetic_titles(extractor):
+    titles = synthetic_titles(5000)
+    assert [extractor.extract(title) for title in titles] == [legacy_extract_game_name(title) for title in titles]
+
+
+def test_extract_many(extractor):
+    titles = TITLES + synthetic_titles(1000) + TITLES
+    expected = [legacy_extract_game_name(title) for title in titles]
+    assert extractor.extract_many(titles) == expected
+
+    series = pd.Series(titles, index=range(100, 100 + len(titles)), name='title')
+    names = extractor.extract_many(series)
+    assert names.index.equals(series.index) and names.name == 'title'
+    assert names.tolist() == expected
+
+
+def test_nan_title_raises_like_legacy(extractor):
+    # 旧实现对NaN抛出TypeError，调用方据此跳过该结果
+    with pytest.raises(TypeError):
+        legacy_extract_game_name(math.nan)
+    with pytest.raises(TypeError):
+        extractor.extract(math.nan)
+    with pytest.raises(TypeError):
+        extractor.extract_many(pd.Series(['《Game》', math.nan]))
+    assert extractor.extract_many(pd.Series(['《Game》', ''])).tolist() == ['Game', '']
@@ -0,0 +1,41 @@
+import logging
+
+from fake_server import FakeOpenAIServer
+from keyword_cache import KeywordCache
+from step2_key_extract import SYS_PROMPT, KeywordExtractor
+
+logging.disable(logging.ERROR)
+
+MODEL = 'fake-model'
+
+
+def test_keys_ignore_case_and_whitespace_but_not_model_or_prompt():
+    key = KeywordCache.make_key('Game  One\tOnline', MODEL, SYS_PROMPT)
+    assert KeywordCache.make_key(' game one online ', MODEL, SYS_PROMPT) == key
+    # 全角字符经NFKC归一后与半角相同
+    assert KeywordCache.make_key('Ｇａｍｅ One Online', MODEL, SYS_PROMPT) == key
+    assert KeywordCache.make_key('Game One Online', 'other-model', SYS_PROMPT) != key
+    assert KeywordCache.make_key('Game One Online', MODEL, SYS_PROMPT + ' ') != key
+
+
+def test_empty_keywords_are_not_cached_and_old_entries_are_evicted(tmp_path):
+    cache = KeywordCache(str(tmp_path / 'keywords.sqlite'), max_entries=2)
+    cache.put_many([('a', 'kw a'), ('failed', '')], MODEL)
+    assert cache.get_many(['a', 'failed']) == {'a': 'kw a'}
+    cache.put_many([('b', 'kw b'), ('c', 'kw c')], MODEL)
+    assert len(cache.get_many(['a', 'b', 'c'])) == 2
+    assert cache.report() == {'hits': 3, 'misses': 2}
+    cache.close()
+
+
+def test_second_run_is_served_from_the_cache(tmp_path):
+    texts = [f'Game{i} Online Free' for i in range(12)]
+    with FakeOpenAIServer(latency=0) as server:
+        for _ in range(2):
+            cache = KeywordCache(str(tmp_path / 'keywords.sqlite'))
+            extractor = KeywordExtractor(api_key='test', base_url=server.base_url + '/v1', batch_size=5,
+                                         cache=cache)
+            # 重复文本只请求一次
+            assert extractor.extract_all(texts + texts[:3]) == [f'kw game{i}' for i in list(range(12)) + [0, 1, 2]]
+            cache.close()
+        assert server.item_count == 12
@@ -0,0 +1,44 @@
+import logging
+
+from fake_server import FakeOpenAIServer
+from step2_key_extract import BATCH_SYS_PROMPT, KeywordExtractor
+
+logging.disable(logging.ERROR)
+
+TEXTS = [f'Game{i} Play Game{i} Online Free | CrazyGames' for i in range(25)]
+EXPECTED = [f'kw game{i}' for i in range(25)]
+
+
+def make_extractor(server, **kwargs):
+    return KeywordExtractor(api_key='test', base_url=server.base_url + '/v1', **kwargs)
+
+
+def test_batches_keep_the_input_order():
+    with FakeOpenAIServer(latency=0) as server:
+        assert make_extractor(server, batch_size=10, max_workers=3).extract_all(TEXTS) == EXPECTED
+        # 25条分为10+10+5三个请求
+        assert server.request_count == 3 and server.item_count == 25
+
+
+def test_rate_limited_requests_are_retried():
+    with FakeOpenAIServer(latency=0, rate_limit_every=2) as server:
+        extractor = make_extractor(server, batch_size=5, max_workers=2)
+        assert extractor.extract_all(TEXTS) == EXPECTED
+        assert extractor.request_count == server.request_count > 5
+
+
+def test_missing_batch_answers_fall_back_to_single_requests():
+    with FakeOpenAIServer(latency=0) as server:
+        extractor = make_extractor(server, batch_size=4, max_workers=1)
+        complete = extractor._complete
+
+        def drop_second_answer(sys_prompt, user_content):
+            answer = complete(sys_prompt, user_content)
+            if sys_prompt != BATCH_SYS_PROMPT:
+                return '\n  ' + answer + '  \n'
+            return '\n'.join(line for line in answer.splitlines() if not line.startswith('2.'))
+
+        extractor._complete = drop_second_answer
+        # 缺少的第2条单独请求，单条结果中的首尾空白被去掉
+        assert extractor.extract_batch(TEXTS[:4]) == EXPECTED[:4]
+        assert server.request_count == 2
@@ -0,0 +1,88 @@
+import argparse
+import json
+import logging
+import pstats
+import threading
+import time
+import urllib.request
+
+import pytest
+
+from metrics import Metrics, add_arguments, instrumented, metrics
+
+logging.disable(logging.ERROR)
+
+
+def test_report_aggregates_by_name_and_labels():
+    registry = Metrics()
+    registry.inc('http_bytes', 100, host='a.example')
+    registry.inc('http_bytes', 50, host='a.example')
+    registry.inc('http_bytes', 10, host='b.example')
+    for seconds in (0.1, 0.2, 0.3, 0.4):
+        registry.observe('http_fetch', seconds, host='a.example')
+    with pytest.raises(RuntimeError):
+        with registry.timer('parse'):
+            raise RuntimeError
+
+    report = registry.report()
+    assert [(c['labels'], c['value']) for c in report['counters']] == [
+        ({'host': 'a.example'}, 150), ({'host': 'b.example'}, 10)]
+    fetch, = [t for t in report['timers'] if t['name'] == 'http_fetch']
+    assert (fetch['count'], fetch['sum'], fetch['p50'], fetch['max']) == (4, 1.0, 0.3, 0.4)
+    # 异常退出的计时也会记录
+    assert [t['count'] for t in report['timers'] if t['name'] == 'parse'] == [1]
+    assert list(report['stages'])[0] == 'http_fetch'
+
+
+def test_samples_are_capped():
+    registry = Metrics(max_samples=10)
+    for i in range(1000):
+        registry.observe('llm_request', i)
+    timer, = registry.report()['timers']
+    assert timer['count'] == 1000 and timer['max'] == 999
+    assert len(registry.timers[('llm_request', ())]['samples']) == 10
+
+
+def test_prometheus_text_escapes_labels():
+    registry = Metrics()
+    registry.inc('proxy_responses', proxy='http://"x"\n', outcome='ok')
+    registry.observe('http_ttfb', 0.5, host='a.example')
+    lines = registry.prometheus_text().splitlines()
+    assert '# TYPE game_monitor_proxy_responses_total counter' in lines
+    assert 'game_monitor_proxy_responses_total{outcome="ok",proxy="http://\\"x\\"\\n"} 1' in lines
+    assert 'game_monitor_http_ttfb_seconds{host="a.example",quantile="0.95"} 0.5' in lines
+    assert 'game_monitor_http_ttfb_seconds_count{host="a.example"} 1' in lines
+
+
+def test_instrumented_serves_and_writes_the_report(tmp_path):
+    parser = argparse.ArgumentParser()
+    add_arguments(parser)
+    report_path = tmp_path / 'report.json'
+    profile_path = tmp_path / 'run.prof'
+    args = parser.parse_args(['--report', str(report_path), '--metrics-port', '0', '--profile', str(profile_path)])
+
+    with instrumented(args):
+        metrics.inc('rows', 3, stage='step1')
+        # 工作线程中的调用也计入分析结果
+        worker = threading.Thread(target=time.sleep, args=(0.01,))
+        worker.start()
+        worker.join()
+
+    report = json.loads(report_path.read_text(encoding='utf-8'))
+    assert report['counters'] == [{'name': 'rows', 'labels': {'stage': 'step1'}, 'value': 3}]
+    assert any('sleep' in function[2] for function in pstats.Stats(str(profile_path)).stats)
+
+
+def test_serve_exposes_metrics_and_report():
+    registry = Metrics()
+    registry.inc('rows', 2)
+    server = registry.serve(port=0)
+    try:
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        with urllib.request.urlopen(f'{base}/metrics') as response:
+            assert 'game_monitor_rows_total 2' in response.read().decode('utf-8')
+        with urllib.request.urlopen(f'{base}/report') as response:
+            assert json.load(response)['counters'][0]['value'] == 2
+    finally:
+        server.shutdown()
+        server.server_close()
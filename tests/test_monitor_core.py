@@ -0,0 +1,65 @@
+import logging
+
+import pytest
+
+from fake_server import FakeServer
+from fetch_scheduler import HostPolicy, HostScheduler
+from monitor_core import GameSiteMonitor
+from seen_index import SeenIndex
+
+logging.disable(logging.ERROR)
+
+SITES = ['site0.example', 'site1.example']
+
+
+def make_monitor(tmp_path, base_url, **kwargs):
+    sites_file = tmp_path / 'sites.txt'
+    sites_file.write_text('\n'.join(SITES) + '\n', encoding='utf-8')
+    return GameSiteMonitor(str(sites_file), search_base_url=f'{base_url}/search', max_pages=1,
+                           scheduler=HostScheduler(default_policy=HostPolicy(8, (0, 0))), **kwargs)
+
+
+def test_second_run_on_the_same_day_fetches_again(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with FakeServer(latency=0) as server:
+        first = make_monitor(tmp_path, server.base_url).monitor_all_sites(['24h'])
+        requests_made = server.request_count
+        # 导出成功后不再保留当天的流式结果文件
+        assert not list(tmp_path.glob('*.jsonl'))
+        second = make_monitor(tmp_path, server.base_url).monitor_all_sites(['24h'])
+        assert server.request_count == 2 * requests_made
+    assert len(first) == len(second) == len(SITES) * 10
+
+
+def test_interrupted_run_resumes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with FakeServer(latency=0) as server:
+        monitor = make_monitor(tmp_path, server.base_url)
+
+        def fail_on_export(*args, **kwargs):
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(monitor, 'save_results', fail_on_export)
+        with pytest.raises(KeyboardInterrupt):
+            monitor.monitor_all_sites(['24h'])
+        requests_made = server.request_count
+        assert list(tmp_path.glob('*.jsonl'))
+
+        results = make_monitor(tmp_path, server.base_url).monitor_all_sites(['24h'])
+        assert server.request_count == requests_made
+    assert len(results) == len(SITES) * 10
+
+
+def test_result_callback_receives_the_exported_rows(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    shown = []
+    with FakeServer(latency=0) as server:
+        seen_index = SeenIndex(str(tmp_path / 'seen.sqlite'))
+        make_monitor(tmp_path, server.base_url, seen_index=seen_index).monitor_all_sites(['24h'])
+        monitor = make_monitor(tmp_path, server.base_url, seen_index=seen_index,
+                               result_callback=lambda site, time_range, results: shown.extend(results))
+        # 第二次运行的'24h'结果都已见过，'1w'中只有新URL
+        results = monitor.monitor_all_sites(['24h', '1w'])
+        seen_index.close()
+    assert sorted(result['url'] for result in shown) == sorted(results['url'])
+    assert len(shown) == len(SITES) * 10
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+import parse_pool
+from bench_parse import load_corpus
+from parse_pool import ParsePool
+from rate_control import BLOCKED
+
+CORPUS = [html.encode('utf-8') for html in load_corpus().values()]
+PAGES = [(200, CORPUS[i % len(CORPUS)], 'utf-8') for i in range(12)] + [(429, b'Too Many Requests', None)]
+
+
+@pytest.fixture(scope='module')
+def expected():
+    parse_pool._init_worker('auto')
+    return [parse_pool.parse_page(*page) for page in PAGES]
+
+
+def test_single_core_parses_in_process(monkeypatch, expected):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 1)
+    with ParsePool(4) as pool:
+        assert pool.executor is None
+        assert list(pool.imap(PAGES)) == expected
+        outcome, results = pool.parse(*PAGES[0])
+        stats = pool.stats()
+    assert results == [{'title': title, 'url': url, 'game_name': name} for title, url, name in expected[0][1]]
+    assert stats['inline'] and stats['inline_pages'] == stats['pages'] == len(PAGES) + 1
+
+
+def test_small_batches_skip_the_worker_processes(monkeypatch, expected):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 2)
+    with ParsePool(1, min_batch=8) as pool:
+        assert pool.executor is not None
+        assert list(pool.imap(PAGES[-3:])) == expected[-3:]
+        assert pool.stats()['inline_pages'] == 3
+        # 大批量交给工作进程，结果与进程内解析一致
+        assert list(pool.imap(PAGES)) == expected
+        stats = pool.stats()
+    assert stats['inline_pages'] == 3 and stats['pages'] == 3 + len(PAGES)
+    assert stats['peak_in_flight'] <= stats['max_in_flight']
+    assert expected[-1] == (BLOCKED, [])
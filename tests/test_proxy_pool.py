@@ -0,0 +1,69 @@
+import json
+import logging
+import threading
+import time
+
+import pytest
+
+from fake_server import FakeProxyServer
+from proxy_pool import ProxyPool
+from rate_control import BLOCKED, OK, AIMDController
+
+logging.disable(logging.ERROR)
+
+URL = 'http://search.invalid/search?q=site:games.example'
+
+
+def test_pool_is_built_from_config(tmp_path):
+    pool_file = tmp_path / 'proxies.txt'
+    pool_file.write_text('# 备用代理\n10.0.0.2:8080\n\nhttp://10.0.0.3:8080\n', encoding='utf-8')
+    config_file = tmp_path / 'config.json'
+    config_file.write_text(json.dumps({
+        'proxy_host': '10.0.0.1', 'proxy_port': 8080,
+        'proxy_pool': ['10.0.0.2:8080'], 'proxy_pool_file': str(pool_file),
+    }), encoding='utf-8')
+
+    pool = ProxyPool.from_config_file(str(config_file))
+    # 原有的单个代理排在最前，重复的代理只保留一个
+    assert [state['proxy'] for state in pool.stats()] == [
+        'http://10.0.0.1:8080', 'http://10.0.0.2:8080', 'http://10.0.0.3:8080']
+    assert ProxyPool.from_config({}) is None
+    assert ProxyPool.from_config_file(str(tmp_path / 'missing.json')) is None
+    with pytest.raises(ValueError):
+        ProxyPool([' ', ''])
+
+
+def test_blocked_proxies_cool_down():
+    pool = ProxyPool(['10.0.0.1:8080', '10.0.0.2:8080'], cooldown=60)
+    blocked = pool.acquire()
+    pool.release(blocked, BLOCKED)
+    # 冷却期间只会选中另一个代理
+    for _ in range(20):
+        proxy = pool.acquire()
+        assert proxy != blocked
+        pool.release(proxy, OK, latency=0.1)
+    states = {state['proxy']: state for state in pool.stats()}
+    assert states[blocked]['cooling_down'] and states[blocked]['blocks'] == 1
+    assert states[blocked]['score'] < states[proxy]['score']
+
+
+def test_concurrency_follows_the_rate_controller():
+    pool = ProxyPool(['10.0.0.1:8080'], rate_controller=AIMDController(initial_delay=0, min_delay=0, jitter=0,
+                                                                       initial_window=1))
+    proxy = pool.acquire()
+    start = time.monotonic()
+    # 窗口为1时第二个请求要等第一个归还
+    timer = threading.Timer(0.2, pool.release, (proxy, OK))
+    timer.start()
+    assert pool.acquire() == proxy
+    assert time.monotonic() - start >= 0.15
+    timer.join()
+
+
+def test_get_retries_blocked_responses_on_another_proxy():
+    with FakeProxyServer(latency=0, block_every=1) as blocky, FakeProxyServer(latency=0) as healthy:
+        pool = ProxyPool([blocky.base_url, healthy.base_url], cooldown=60)
+        # 返回429的代理进入冷却，之后的请求都换到另一个代理
+        for _ in range(5):
+            assert pool.get(URL, timeout=5).status_code == 200
+        assert blocky.proxied_count <= 1 and healthy.proxied_count == 5
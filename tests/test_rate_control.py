@@ -0,0 +1,50 @@
+import pytest
+
+from fake_server import CAPTCHA_PAGE, CONSENT_PAGE
+from fetch_scheduler import HostPolicy, HostScheduler
+from rate_control import BLOCKED, CAPTCHA, CONSENT, EMPTY, OK, AIMDController, classify_response
+
+
+@pytest.mark.parametrize('status_code, text, result_count, expected', [
+    (429, '', None, BLOCKED),
+    (503, '', None, BLOCKED),
+    (502, '', None, BLOCKED),
+    (404, '', None, EMPTY),
+    (200, CAPTCHA_PAGE, None, CAPTCHA),
+    (200, CONSENT_PAGE, 0, CONSENT),
+    (200, '<html>no results</html>', 0, EMPTY),
+    (200, '<html>results</html>', None, OK),
+    # 有结果时不检查特征，摘要中恰好出现这些词不算验证码
+    (200, 'Our systems have detected unusual traffic', 10, OK),
+])
+def test_classify_response(status_code, text, result_count, expected):
+    assert classify_response(status_code, text, result_count) == expected
+
+
+def test_aimd_backs_off_multiplicatively_and_recovers_additively():
+    controller = AIMDController(initial_delay=2.0, min_delay=0.5, delay_step=0.25, initial_window=4, max_window=8,
+                                jitter=0)
+    controller.record('host', CAPTCHA)
+    assert controller.next_delay('host') == 4.0 and controller.window('host') == 2
+    controller.record('host', BLOCKED)
+    assert controller.next_delay('host') == 8.0 and controller.window('host') == 1
+    # 同意页面与速率无关
+    controller.record('host', CONSENT)
+    assert controller.next_delay('host') == 8.0
+
+    for _ in range(3):
+        controller.record('host', OK)
+    assert controller.next_delay('host') == 7.25 and controller.window('host') == 2
+    # 按键分别维护
+    assert controller.window('other') == 4
+    assert controller.stats()['host']['outcomes'] == {CAPTCHA: 1, BLOCKED: 1, CONSENT: 1, OK: 3}
+
+
+def test_scheduler_limits_follow_the_controller():
+    controller = AIMDController(initial_window=4, jitter=0)
+    scheduler = HostScheduler(default_policy=HostPolicy(3, (0, 0)), rate_controller=controller)
+    # 取固定上限与AIMD窗口中较小的一个，等待时间由AIMD决定
+    assert scheduler.concurrency_for('host') == 3
+    controller.record('host', BLOCKED)
+    assert scheduler.concurrency_for('host') == 2
+    assert scheduler.delay_for('host') == controller.next_delay('host')
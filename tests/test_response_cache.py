@@ -0,0 +1,112 @@
+import zlib
+
+import pytest
+
+from response_cache import CacheMissError, ResponseCache
+
+URL = 'https://www.google.com/search?q=site:games.example'
+
+
+class VirtualClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, status_code, text='', headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class RecordingGet:
+    """记录每次请求的附加请求头，并依次返回预设的响应"""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def __call__(self, extra_headers):
+        self.calls.append(extra_headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock(1_700_000_000.0)
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), ttl=3600, clock=clock)
+    get = RecordingGet(FakeResponse(200, '<html>results</html>'))
+    assert cache.fetch(URL, get).from_cache is False
+
+    clock.now += 60
+    response = cache.fetch(URL, get)
+    assert response.from_cache and response.text == '<html>results</html>'
+    assert len(get.calls) == 1
+    # 代理参与缓存键，换代理后重新请求
+    assert cache.fetch(URL, RecordingGet(FakeResponse(200, 'other')), proxy='http://proxy:8080').text == 'other'
+    assert cache.stats() == {'hits': 1, 'misses': 2, 'revalidated': 0}
+    cache.close()
+
+
+def test_expired_entries_are_revalidated(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), ttl=3600, clock=clock)
+    cache.fetch(URL, RecordingGet(FakeResponse(200, 'page', {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 Sep 2026'})))
+
+    clock.now += 7200
+    get = RecordingGet(FakeResponse(304))
+    response = cache.fetch(URL, get)
+    assert get.calls == [{'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Sep 2026'}]
+    assert response.from_cache and response.text == 'page'
+    # 304刷新了抓取时间，有效期内不再请求
+    clock.now += 60
+    assert cache.fetch(URL, RecordingGet()).from_cache
+    assert cache.stats()['revalidated'] == 1
+    cache.close()
+
+
+def test_captcha_and_error_pages_are_not_cached(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), clock=clock)
+    captcha = FakeResponse(200, '<form id="captcha-form">unusual traffic from your computer network</form>')
+    cache.fetch(URL, RecordingGet(captcha))
+    cache.fetch(URL, RecordingGet(FakeResponse(429, 'slow down')))
+    assert cache.lookup(URL) is None
+    cache.close()
+
+
+def test_replay_only_never_requests(tmp_path, clock):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ResponseCache(path, ttl=60, clock=clock)
+    cache.fetch(URL, RecordingGet(FakeResponse(200, 'page')))
+    cache.close()
+
+    clock.now += 86400
+    replay = ResponseCache(path, ttl=60, replay_only=True, clock=clock)
+    # 仅回放模式下过期条目也直接返回
+    assert replay.fetch(URL, RecordingGet()).text == 'page'
+    with pytest.raises(CacheMissError):
+        replay.fetch(URL + '&start=10', RecordingGet())
+    replay.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    # 上限恰好容纳两个条目
+    size = len(zlib.compress(b'page 0'))
+    cache = ResponseCache(str(tmp_path / 'cache.sqlite'), max_bytes=2 * size, clock=clock)
+    urls = [f'{URL}&start={i * 10}' for i in range(3)]
+    for i, url in enumerate(urls[:2]):
+        clock.now += 1
+        cache.store(url, None, 200, f'page {i}')
+    # 读取第一个条目后，最久未使用的是第二个
+    clock.now += 1
+    assert cache.lookup(urls[0])[1] == 'page 0'
+    clock.now += 1
+    cache.store(urls[2], None, 200, 'page 2')
+    assert cache.lookup(urls[1]) is None
+    assert cache.lookup(urls[0]) and cache.lookup(urls[2])
+    cache.close()
@@ -0,0 +1,40 @@
+from seen_index import SeenIndex
+
+
+def results(*urls):
+    return [{'site': 'games.example', 'url': url} for url in urls]
+
+
+def test_only_first_sightings_are_new(tmp_path):
+    index = SeenIndex(str(tmp_path / 'seen.sqlite'))
+    # 同一批次中'24h'和'1w'重叠的URL只保留第一条
+    assert index.filter_new(results('a', 'b', 'a')) == results('a', 'b')
+    assert index.filter_new(results('b', 'c')) == results('c')
+    assert len(index) == 3
+    first_seen, last_seen = index.lookup('b')
+    assert first_seen <= last_seen
+    index.close()
+
+    reopened = SeenIndex(str(tmp_path / 'seen.sqlite'))
+    assert reopened.filter_new(results('a', 'c', 'd')) == results('d')
+    reopened.close()
+
+
+def test_uncommitted_results_stay_new_after_rollback(tmp_path):
+    index = SeenIndex(str(tmp_path / 'seen.sqlite'))
+    index.filter_new(results('a'))
+    # 结果落盘失败时回滚，下次运行仍视为新结果
+    assert index.filter_new(results('a', 'b'), commit=False) == results('b')
+    index.record_poll('games.example', '24h', 2, 1)
+    index.rollback()
+    assert index.filter_new(results('b'), commit=False) == results('b')
+    index.record_poll('games.example', '24h', 1, 1, polled_at=100.0)
+    index.commit()
+    index.close()
+
+    reopened = SeenIndex(str(tmp_path / 'seen.sqlite'))
+    assert len(reopened) == 2
+    assert reopened.poll_history('games.example') == [('24h', 100.0, 1, 1, 1)]
+    assert reopened.first_poll('games.example') == 100.0
+    assert reopened.first_poll('other.example') is None
+    reopened.close()
@@ -0,0 +1,31 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from bench_startup import BUDGET_MS, import_profile
+from conftest import ROOT
+
+MODULES = ['step1_game_monitor', 'step1_game_monitor_gui', 'step2_key_extract', 'daemon']
+HEAVY = ['pandas', 'openai', 'pytrends', 'bs4', 'httpx']
+
+CHECK = '''
+import json, sys
+import {module}
+print(json.dumps(sorted(name for name in {heavy!r} if name in sys.modules)))
+'''
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_import_does_not_load_heavy_modules(module):
+    # 在新进程中导入，避免受本进程已导入模块的影响
+    output = subprocess.run([sys.executable, '-c', CHECK.format(module=module, heavy=HEAVY)],
+                            cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == []
+
+
+@pytest.mark.parametrize('module', MODULES + ['monitor_core'])
+def test_import_time_within_budget(module):
+    # 取三次中最快的一次，排除磁盘缓存等干扰
+    cumulative = min(import_profile(module)[0] for _ in range(3))
+    assert cumulative <= BUDGET_MS, f'import {module} took {cumulative:.1f} ms (budget {BUDGET_MS} ms)'
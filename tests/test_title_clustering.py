@@ -0,0 +1,46 @@
+import math
+
+import pandas as pd
+
+from bench_clustering import synthetic_titles
+from title_clustering import cluster_results, cluster_titles, title_tokens
+
+
+def test_platform_boilerplate_is_ignored():
+    assert title_tokens('Play Moto Racer Online Free | CrazyGames') == {'moto', 'racer'}
+    assert title_tokens('Moto Racer - Play on itch.io') == {'moto', 'racer'}
+    assert title_tokens('《原神》攻略合集') == {'原神'}
+    assert title_tokens('Play Online Free') == frozenset()
+
+
+def test_labels_point_at_the_first_title_of_each_cluster():
+    titles = [
+        'Play Moto Racer Online Free | CrazyGames',
+        'Zombie Farm | Coolmath Games',
+        'Moto Racer - Play on itch.io',
+        # 相似但不同的游戏不合并
+        'Moto Racer Extreme Edition 2 | Poki',
+        # 只有套话的标题只与完全相同的标题合并，NaN按空标题处理
+        'Play Online Free',
+        'Play  online free',
+        'Free Online Game',
+        math.nan,
+        '',
+    ]
+    assert cluster_titles(pd.Series(titles)).tolist() == [0, 1, 0, 3, 4, 4, 6, 7, 7]
+
+
+def test_clusters_do_not_mix_games():
+    titles, truth = synthetic_titles(5000, 500)
+    clusters = {}
+    for label, game in zip(cluster_titles(titles), truth):
+        clusters.setdefault(label, set()).add(game)
+    assert all(len(games) == 1 for games in clusters.values())
+    assert len(clusters) == len(set(truth))
+
+
+def test_cluster_results_returns_one_representative_per_cluster():
+    results = [{'title': title} for title in ['Moto Racer | Poki', 'Zombie Farm', 'Play Moto Racer unblocked']]
+    representatives = cluster_results(results)
+    assert [result['title'] for result in representatives] == ['Moto Racer | Poki', 'Zombie Farm']
+    assert [result['cluster_id'] for result in results] == [0, 1, 0]
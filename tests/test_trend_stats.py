@@ -0,0 +1,22 @@
+import numpy as np
+import pandas as pd
+
+from step3_trends_analyse import calculate_trend_increase
+
+
+def trends_frame(days):
+    index = pd.date_range('2026-09-01', periods=days, freq='D', name='date')
+    return pd.DataFrame({'alpha': np.arange(1, days + 1), 'beta': np.full(days, 5)}, index=index)
+
+
+def test_ratio_column_is_named_after_the_requested_window():
+    full = calculate_trend_increase(trends_frame(30), ['a.example', 'b.example'])
+    # 数据只有3天时窗口缩小到3天，但列名不变，两批结果可以直接合并
+    short = calculate_trend_increase(trends_frame(3), ['a.example', 'b.example'])
+    assert list(full.columns) == list(short.columns)
+    assert 'last7_first7_ratio' in short.columns
+
+    ratios = dict(zip(short['topic'], short['last7_first7_ratio']))
+    assert ratios == {'alpha': 1.0, 'beta': 1.0}
+    ratios = dict(zip(full['topic'], full['last7_first7_ratio']))
+    assert ratios['alpha'] == np.mean(range(24, 31)) / np.mean(range(1, 8))
@@ -0,0 +1,28 @@
+import pandas as pd
+
+from trends_store import TrendsStore
+
+INDEX = pd.date_range('2026-09-01', periods=5, freq='D', name='date')
+
+
+def test_keywords_with_newlines_keep_their_ids(tmp_path):
+    store = TrendsStore(str(tmp_path))
+    store.append(pd.DataFrame({'bad\nkw': [1, 2, 3, 4, 5], 'good': [10, 20, 30, 40, 50]}, index=INDEX))
+
+    reopened = TrendsStore(str(tmp_path))
+    assert reopened.keywords == ['bad\nkw', 'good']
+    assert reopened.load(['good'])['good'].tolist() == [10, 20, 30, 40, 50]
+    assert reopened.load(['bad\nkw'])['bad\nkw'].tolist() == [1, 2, 3, 4, 5]
+
+
+def test_legacy_keyword_file_is_migrated(tmp_path):
+    store = TrendsStore(str(tmp_path))
+    store.append(pd.DataFrame({'alpha': [1, 2, 3, 4, 5], 'beta': [5, 4, 3, 2, 1]}, index=INDEX))
+    # 模拟旧版仓库：每行一个未转义的关键词
+    (tmp_path / 'keywords.jsonl').unlink()
+    (tmp_path / 'keywords.txt').write_text('alpha\nbeta\n', encoding='utf-8')
+
+    reopened = TrendsStore(str(tmp_path))
+    assert reopened.keywords == ['alpha', 'beta']
+    assert reopened.load(['beta'])['beta'].tolist() == [5, 4, 3, 2, 1]
+    assert not (tmp_path / 'keywords.txt').exists()
@@ -0,0 +1,97 @@
+import logging
+
+import pandas as pd
+
+from fake_trends import FakeTrendReq
+from trends_scheduler import TrendsScheduler
+from trends_store import TrendsStore
+from trends_warehouse import TrendsWarehouse
+
+logging.disable(logging.ERROR)
+
+OLD_KEYWORDS = [f'old keyword {i}' for i in range(20)]
+NEW_KEYWORDS = [f'new keyword {i}' for i in range(6)]
+
+
+class RecordingScheduler(TrendsScheduler):
+    """记录每个不带锚点词的请求"""
+
+    def __init__(self, today):
+        super().__init__(max_workers=1, delay_range=(0, 0),
+                         trendreq_factory=lambda: FakeTrendReq(latency=0, today=today))
+        self.payloads = []
+
+    def fetch_payloads(self, payloads, timeframe=None):
+        self.payloads.extend(payloads)
+        return super().fetch_payloads(payloads, timeframe)
+
+
+def history_ratio(store, keyword):
+    """存储的历史与真实热度之比的均值，尺度一致的关键词之间应相同"""
+    history = store.load([keyword])[keyword].dropna()
+    return (history / FakeTrendReq.true_values(keyword, history.index)).mean()
+
+
+def test_new_keywords_are_bridged_to_stored_keywords(tmp_path):
+    store = TrendsStore(str(tmp_path / 'store'))
+    first_day = pd.Timestamp('2026-09-01')
+    raw, factors = RecordingScheduler(first_day).fetch_raw(OLD_KEYWORDS, 'today 1-m')
+    # 历史存储在另一条尺度上，新关键词必须经过换算才能与之一致
+    store.append(raw, {keyword: factor * 3 for keyword, factor in factors.items()})
+
+    # step3和流水线大多只传入新关键词，桥接词从仓库中挑选
+    today = first_day + pd.Timedelta(days=10)
+    scheduler = RecordingScheduler(today)
+    TrendsWarehouse(store, scheduler).update(NEW_KEYWORDS, today=today)
+
+    assert scheduler.payloads
+    for payload in scheduler.payloads:
+        assert len([keyword for keyword in payload if keyword in OLD_KEYWORDS]) == 1
+        assert scheduler.anchor not in payload
+    segments = store.segments()
+    scales = dict(zip([store.keywords[i] for i in segments['keyword']], segments['scale']))
+    for keyword in NEW_KEYWORDS:
+        # 换算系数来自桥接词的重叠日期，不是未缩放的原始值
+        assert scales[keyword] > 2
+
+    ratios = [history_ratio(store, keyword) for keyword in OLD_KEYWORDS + NEW_KEYWORDS]
+    assert max(ratios) / min(ratios) < 1.05
+
+
+def test_daily_updates_use_fewer_requests_than_full_refetch(tmp_path):
+    days = pd.date_range('2026-09-01', periods=10, freq='D')
+    FakeTrendReq.reset()
+    for today in days:
+        RecordingScheduler(today).fetch_raw(OLD_KEYWORDS, 'today 1-m')
+    full_requests = FakeTrendReq.request_count
+
+    store = TrendsStore(str(tmp_path / 'store'))
+    FakeTrendReq.reset()
+    for today in days:
+        TrendsWarehouse(store, RecordingScheduler(today)).update(OLD_KEYWORDS, today=today)
+    # 有历史的关键词不需要锚点词，每个请求多放一个关键词
+    assert FakeTrendReq.request_count < full_requests
+
+    FakeTrendReq.reset()
+    weekly = TrendsStore(str(tmp_path / 'weekly'))
+    for today in days:
+        TrendsWarehouse(weekly, RecordingScheduler(today), refresh_days=7).update(OLD_KEYWORDS, today=today)
+    assert FakeTrendReq.request_count <= full_requests / 4
+
+
+def test_plan_fills_payloads_without_the_anchor(tmp_path):
+    store = TrendsStore(str(tmp_path / 'store'))
+    first_day = pd.Timestamp('2026-09-01')
+    TrendsWarehouse(store, RecordingScheduler(first_day)).update(OLD_KEYWORDS, today=first_day)
+
+    today = first_day + pd.Timedelta(days=1)
+    warehouse = TrendsWarehouse(store, RecordingScheduler(today))
+    groups, new_keywords, skipped = warehouse.plan(OLD_KEYWORDS + NEW_KEYWORDS, today)
+    (start, payloads), = groups.items()
+    # 只抓取最后存储日期之后的日期，外加用于对齐的重叠天数
+    assert start == first_day - pd.Timedelta(days=warehouse.overlap_days)
+    assert [len(payload) for payload in payloads] == [5, 5, 5, 5]
+    assert new_keywords == NEW_KEYWORDS and skipped == 0
+
+    _, _, skipped = warehouse.plan(OLD_KEYWORDS, first_day)
+    assert skipped == len(OLD_KEYWORDS)
@@ -0,0 +1,144 @@
+import re
+import zlib
+
+import numpy as np
+
+from game_name import GameNameExtractor
+
+# 标题中与具体游戏无关的常见词：平台名、"在线免费玩"之类的套话
+STOPWORDS = {
+    'a', 'an', 'and', 'at', 'by', 'for', 'in', 'of', 'on', 'the', 'to', 'with', 'now', 'your',
+    'play', 'playing', 'online', 'free', 'game', 'games', 'unblocked', 'browser', 'html5',
+    'mobile', 'pc', 'download', 'fullscreen', 'new', 'best', 'top',
+    'crazygames', 'crazy', 'itch', 'io', 'poki', 'coolmath', 'coolmathgames', 'addictinggames',
+    'addicting', 'gamedistribution', 'playhop', 'dictionary', 'com', 'www', 'net', 'org',
+}
+CJK_STOPWORDS = re.compile('|'.join(GameNameExtractor.KEYWORDS + ['游戏', '在线', '免费', '小游戏', '玩']))
+TOKEN = re.compile(r'[0-9a-z]+|[\u3040-\u30ff\u4e00-\u9fff\uac00-\ud7af]+')
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def title_tokens(title):
+    """
+    将标题归一为与游戏本身相关的词集合
+    :param title: 页面标题
+    :return: frozenset(词)
+    """
+    tokens = set()
+    for token in TOKEN.findall(title.lower()):
+        if token[0] >= '\u3040':
+            token = CJK_STOPWORDS.sub('', token)
+            if token:
+                tokens.add(token)
+        elif token not in STOPWORDS:
+            tokens.add(token)
+    return frozenset(tokens)
+
+
+class TitleClusterer:
+    def __init__(self, num_perm=16, band_rows=2, threshold=0.7, seed=7):
+        """
+        近似重复标题聚类：先按归一化词集合精确分组，再用MinHash/LSH合并相似的组
+        :param num_perm: MinHash签名长度
+        :param band_rows: LSH每个band包含的签名行数
+        :param threshold: 合并两个组所需的最小Jaccard相似度
+        :param seed: 哈希函数的随机种子
+        """
+        if num_perm % band_rows:
+            raise ValueError("num_perm must be a multiple of band_rows")
+        self.num_perm = num_perm
+        self.band_rows = band_rows
+        self.threshold = threshold
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.int64)
+        self.b = rng.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.int64)
+
+    def _signatures(self, token_sets):
+        """向量化计算每个词集合的MinHash签名"""
+        lengths = np.fromiter((max(len(s), 1) for s in token_sets), dtype=np.int64, count=len(token_sets))
+        hashes = np.fromiter(
+            (zlib.crc32(t.encode('utf-8')) & MERSENNE_PRIME for s in token_sets for t in (s or ('',))),
+            dtype=np.int64, count=int(lengths.sum())
+        )
+        starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        permuted = (hashes[:, None] * self.a + self.b) % MERSENNE_PRIME
+        return np.minimum.reduceat(permuted, starts, axis=0)
+
+    def fit(self, titles):
+        """
+        对标题聚类
+        :param titles: 标题列表或pandas Series
+        :return: 每个标题的簇编号(簇中第一次出现的标题的位置)，numpy数组
+        """
+        titles = list(titles)
+        if not titles:
+            return np.zeros(0, dtype=np.int64)
+
+        # 第一阶段：相同词集合直接归为一组
+        group_of_key = {}
+        group_ids = np.empty(len(titles), dtype=np.int64)
+        for i, title in enumerate(titles):
+            title = title if isinstance(title, str) else ''
+            # 没有有效词的标题(例如只有套话)只与完全相同的标题归为一组
+            key = title_tokens(title) or ('', ' '.join(title.lower().split()))
+            group_ids[i] = group_of_key.setdefault(key, len(group_of_key))
+        keys = [key if isinstance(key, frozenset) else frozenset() for key in group_of_key]
+
+        # 第二阶段：LSH分桶，每个组只与桶内第一个组比较，保持线性复杂度
+        parent = np.arange(len(keys))
+
+        def find(x):
+            while parent[x] != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        signatures = self._signatures(keys)
+        for band in range(self.num_perm // self.band_rows):
+            rows = signatures[:, band * self.band_rows:(band + 1) * self.band_rows]
+            bucket_first = {}
+            for group, band_key in enumerate(map(bytes, rows)):
+                if not keys[group]:
+                    continue
+                first = bucket_first.setdefault(band_key, group)
+                if first == group:
+                    continue
+                a, b = keys[first], keys[group]
+                if len(a & b) / len(a | b) >= self.threshold:
+                    root_a, root_b = find(first), find(group)
+                    if root_a != root_b:
+                        parent[max(root_a, root_b)] = min(root_a, root_b)
+
+        # 簇编号取簇内第一次出现的标题位置
+        roots = np.array([find(g) for g in range(len(keys))])
+        cluster_of_title = roots[group_ids]
+        first_seen = {}
+        labels = np.empty(len(titles), dtype=np.int64)
+        for i, root in enumerate(cluster_of_title):
+            labels[i] = first_seen.setdefault(root, i)
+        return labels
+
+
+def cluster_titles(titles, **kwargs):
+    """
+    对标题做近似重复聚类
+    :param titles: 标题列表或pandas Series
+    :return: 每个标题的簇编号，簇编号等于簇代表(第一次出现的标题)的位置
+    """
+    return TitleClusterer(**kwargs).fit(titles)
+
+
+def cluster_results(results, **kwargs):
+    """
+    为extract_search_results的输出添加cluster_id字段
+    :param results: 结果字典列表
+    :return: 代表结果列表(每个簇一条)
+    """
+    labels = cluster_titles([result['title'] for result in results], **kwargs)
+    representatives = []
+    for i, (result, label) in enumerate(zip(results, labels)):
+        result['cluster_id'] = int(label)
+        if label == i:
+            representatives.append(result)
+    return representatives
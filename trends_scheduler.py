@@ -0,0 +1,209 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from metrics import metrics
+
+
+# Trends每个请求最多比较的关键词数
+MAX_TERMS = 5
+
+
+def default_trendreq_factory():
+    """创建TrendReq；重试交由调度器处理(pytrends自带的Retry参数与urllib3 2.x不兼容)"""
+    from pytrends.request import TrendReq
+    return TrendReq(hl='en-US', tz=360, timeout=(5, 10))
+
+
+def is_rate_limited(error):
+    """判断异常是否为Google Trends的429限流"""
+    response = getattr(error, 'response', None)
+    if getattr(response, 'status_code', None) == 429:
+        return True
+    return type(error).__name__ == 'TooManyRequestsError' or '429' in str(error)
+
+
+class TrendsScheduler:
+    def __init__(self, anchor='online games', terms_per_payload=4, max_workers=2, timeframe='today 1-m',
+                 delay_range=(2, 6), max_retries=5, base_backoff=10, max_backoff=300,
+                 trendreq_factory=default_trendreq_factory):
+        """
+        Google Trends抓取调度器：每个请求打包4个新词和1个共享锚点词，
+        并按锚点把各批次的数据缩放到同一尺度，使不同批次的结果可以直接比较
+        :param anchor: 每个请求都包含的锚点关键词
+        :param terms_per_payload: 每个请求中新关键词的数量(Trends最多5个词，需为锚点留1个)
+        :param max_workers: 同时进行的最大请求数
+        :param timeframe: Trends时间范围
+        :param delay_range: 每个线程两次请求之间的随机等待区间(秒)
+        :param max_retries: 单个批次遇到429时的最大重试次数
+        :param base_backoff: 429后的初始退避时间(秒)，连续限流时翻倍
+        :param max_backoff: 最大退避时间(秒)
+        :param trendreq_factory: 创建TrendReq实例的函数，可替换为本地模拟实现
+        """
+        if not 1 <= terms_per_payload <= MAX_TERMS - 1:
+            raise ValueError(f"terms_per_payload must be between 1 and {MAX_TERMS - 1}")
+        self.anchor = anchor
+        self.terms_per_payload = terms_per_payload
+        self.max_workers = max(1, int(max_workers))
+        self.timeframe = timeframe
+        self.delay_range = delay_range
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.trendreq_factory = trendreq_factory
+        self.request_count = 0
+        self.rate_limited_count = 0
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.backoff = base_backoff
+        self.pause_until = 0.0
+        # 每个时间范围第一个有效批次的锚点总量，之后的抓取都缩放到这个基准
+        self.references = {}
+
+    def _client(self):
+        """每个线程使用独立的TrendReq(其内部保存了payload状态，不能跨线程共享)"""
+        if not hasattr(self.local, 'client'):
+            self.local.client = self.trendreq_factory()
+        return self.local.client
+
+    def _wait_for_backoff(self):
+        with self.lock:
+            delay = self.pause_until - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _on_rate_limited(self):
+        """429后所有线程共同暂停，连续限流时退避时间翻倍"""
+        with self.lock:
+            self.rate_limited_count += 1
+            self.pause_until = max(self.pause_until, time.monotonic() + self.backoff * random.uniform(0.8, 1.2))
+            self.backoff = min(self.max_backoff, self.backoff * 2)
+
+    def _on_success(self):
+        """请求成功后逐步缩短退避时间"""
+        with self.lock:
+            self.backoff = max(self.base_backoff, self.backoff / 2)
+
+    def fetch_batch(self, keywords, timeframe=None, anchor=True):
+        """
+        抓取一个批次(新关键词 + 锚点)
+        :param keywords: 不超过terms_per_payload个关键词(不加锚点时最多MAX_TERMS个)
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :param anchor: 是否在请求中加入锚点词；调用方自行对齐尺度时可以不加，多放一个关键词
+        :return: interest_over_time DataFrame(加锚点时包含锚点列)；失败时返回None
+        """
+        payload = list(keywords) + [self.anchor] if anchor else list(keywords)
+        for attempt in range(self.max_retries + 1):
+            self._wait_for_backoff()
+            try:
+                with self.lock:
+                    self.request_count += 1
+                client = self._client()
+                start = time.perf_counter()
+                try:
+                    client.build_payload(payload, timeframe=timeframe or self.timeframe)
+                    interest_over_time = client.interest_over_time()
+                finally:
+                    metrics.observe('trends_request', time.perf_counter() - start)
+                metrics.inc('trends_requests', outcome='ok')
+                self._on_success()
+                low, high = self.delay_range
+                if high > 0:
+                    time.sleep(random.uniform(low, high))  # 增加延迟以避免被封禁
+                if 'isPartial' in interest_over_time.columns:
+                    interest_over_time = interest_over_time.drop(columns=['isPartial'])
+                return interest_over_time
+            except Exception as e:
+                metrics.inc('trends_requests', outcome='rate_limited' if is_rate_limited(e) else 'error')
+                if is_rate_limited(e) and attempt < self.max_retries:
+                    logging.warning(f"Rate limited fetching trends for {keywords}, backing off")
+                    self._on_rate_limited()
+                    continue
+                logging.error(f"Error fetching trends for {keywords}: {e}")
+                return None
+
+    def scale_factors(self, batches, timeframe=None):
+        """
+        以该时间范围第一个有效批次的锚点为基准，计算每个批次相对基准的缩放系数
+        基准在调度器的多次抓取之间保持不变，分多次抓取的关键词之间也可以直接比较
+        :param batches: (关键词列表, DataFrame或None) 列表
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :return: (关键词列(不含锚点)的原始DataFrame, 缩放系数) 列表
+        """
+        timeframe = timeframe or self.timeframe
+        reference = self.references.get(timeframe)
+        scaled = []
+        for keywords, frame in batches:
+            if frame is None or frame.empty:
+                continue
+            anchor_total = frame[self.anchor].sum()
+            if reference is None and anchor_total > 0:
+                reference = self.references.setdefault(timeframe, anchor_total)
+            columns = [k for k in keywords if k in frame.columns and k != self.anchor]
+            if reference is None or anchor_total <= 0:
+                logging.warning(f"Anchor '{self.anchor}' is zero in batch {keywords}, values left unscaled")
+                scaled.append((frame[columns], 1.0))
+            else:
+                scaled.append((frame[columns], reference / anchor_total))
+        return scaled
+
+    def rescale(self, batches, timeframe=None):
+        """
+        把每个批次按锚点总量之比缩放到基准批次的尺度
+        :param batches: (关键词列表, DataFrame或None) 列表
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :return: 缩放后的关键词列(不含锚点)的列表
+        """
+        return [frame * factor for frame, factor in self.scale_factors(batches, timeframe)]
+
+    def _fetch_batches(self, keywords, timeframe):
+        """并发抓取全部批次，返回 (关键词列表, DataFrame或None) 列表"""
+        unique = [k for k in dict.fromkeys(keywords) if k and k != self.anchor]
+        chunks = [unique[i:i + self.terms_per_payload] for i in range(0, len(unique), self.terms_per_payload)]
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='trends') as executor:
+            frames = list(executor.map(lambda chunk: self.fetch_batch(chunk, timeframe), chunks))
+        logging.info(f"Fetched {len(unique)} keywords with {self.request_count} requests "
+                     f"({self.rate_limited_count} rate limited)")
+        return list(zip(chunks, frames))
+
+    def fetch_payloads(self, payloads, timeframe=None):
+        """
+        并发抓取调用方已组好的请求，不加入锚点词，返回Trends的0-100原始值
+        :param payloads: 关键词列表的列表，每个不超过MAX_TERMS个关键词
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :return: (关键词列表, DataFrame或None) 列表，顺序与payloads相同
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='trends') as executor:
+            frames = list(executor.map(lambda payload: self.fetch_batch(payload, timeframe, anchor=False), payloads))
+        return list(zip(payloads, frames))
+
+    def fetch_raw(self, keywords, timeframe=None):
+        """
+        抓取全部关键词，保留Trends返回的0-100原始值和每个关键词的缩放系数
+        :param keywords: 关键词列表(重复项和锚点词会被忽略)
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :return: (以日期为索引、每个关键词一列的原始值DataFrame, {关键词: 缩放系数})
+        """
+        scaled = self.scale_factors(self._fetch_batches(keywords, timeframe), timeframe)
+        if not scaled:
+            return pd.DataFrame(), {}
+        factors = {keyword: factor for frame, factor in scaled for keyword in frame.columns}
+        # 所有批次收集完后一次性拼接
+        return pd.concat([frame for frame, _ in scaled], axis=1), factors
+
+    def fetch(self, keywords, timeframe=None):
+        """
+        抓取全部关键词并缩放到统一尺度
+        :param keywords: 关键词列表(重复项和锚点词会被忽略)
+        :param timeframe: 时间范围，默认使用调度器的设置
+        :return: 以日期为索引、每个关键词一列的DataFrame
+        """
+        scaled = self.rescale(self._fetch_batches(keywords, timeframe), timeframe)
+        if not scaled:
+            return pd.DataFrame()
+        # 所有批次收集完后一次性拼接
+        return pd.concat(scaled, axis=1)
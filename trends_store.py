@@ -0,0 +1,211 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# 一个写入段是一次抓取中一个关键词的等间隔连续序列；段表按列存放元数据，值单独存成uint8(Trends原始值只有0-100)
+SEGMENT_DTYPE = np.dtype([('keyword', '<u4'), ('first_day', '<i4'), ('step', '<u2'), ('length', '<u2'),
+                          ('scale', '<f4'), ('offset', '<u8')])
+VALUE_DTYPE = np.dtype('u1')
+MISSING = 255
+EPOCH = pd.Timestamp('1970-01-01')
+
+
+def to_day(date):
+    """日期转为距1970-01-01的天数"""
+    return (pd.Timestamp(date).normalize() - EPOCH).days
+
+
+class TrendsStore:
+    def __init__(self, directory=os.path.join('data', 'trends_store')):
+        """
+        追加写入的Trends历史仓库，读取时直接内存映射，不需要逐个解析CSV
+        目录下包含三个文件：
+        segments.bin - SEGMENT_DTYPE定长记录
+        values.bin   - 所有写入段的原始值，按段依次排列
+        keywords.jsonl - 关键词编号表，每行一个JSON字符串，关键词中的换行等字符被转义
+        同一(关键词, 日期)被多次写入时，读取时以最后一次为准
+        :param directory: 仓库目录
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.segments_path = os.path.join(directory, 'segments.bin')
+        self.values_path = os.path.join(directory, 'values.bin')
+        self.keywords_path = os.path.join(directory, 'keywords.jsonl')
+        self._migrate_keywords(os.path.join(directory, 'keywords.txt'))
+        self.keywords = []
+        if os.path.exists(self.keywords_path):
+            with open(self.keywords_path, encoding='utf-8') as f:
+                # 不完整的最后一行是中断写入留下的，忽略
+                self.keywords = [json.loads(line) for line in f if line.endswith('\n')]
+        self.keyword_index = {keyword: i for i, keyword in enumerate(self.keywords)}
+        self._recover()
+
+    def _migrate_keywords(self, legacy_path):
+        """把旧版每行一个、未转义的keywords.txt转换为keywords.jsonl"""
+        if os.path.exists(self.keywords_path) or not os.path.exists(legacy_path):
+            return
+        with open(legacy_path, encoding='utf-8') as f:
+            keywords = [line.rstrip('\n') for line in f if line.endswith('\n')]
+        temp_path = self.keywords_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(keyword, ensure_ascii=False) + '\n' for keyword in keywords)
+        os.replace(temp_path, self.keywords_path)
+        os.remove(legacy_path)
+
+    def _recover(self):
+        """中断写入可能留下不完整的段记录或没有段引用的值，截掉"""
+        if os.path.exists(self.segments_path):
+            size = os.path.getsize(self.segments_path)
+            if size % SEGMENT_DTYPE.itemsize:
+                with open(self.segments_path, 'r+b') as f:
+                    f.truncate(size - size % SEGMENT_DTYPE.itemsize)
+        segments = self.segments()
+        values_end = int(segments['offset'][-1]) + int(segments['length'][-1]) if len(segments) else 0
+        if os.path.exists(self.values_path) and os.path.getsize(self.values_path) > values_end:
+            with open(self.values_path, 'r+b') as f:
+                f.truncate(values_end)
+
+    @staticmethod
+    def _memmap(path, dtype):
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def segments(self):
+        """全部写入段的只读内存映射"""
+        return self._memmap(self.segments_path, SEGMENT_DTYPE)
+
+    def values(self):
+        """全部原始值的只读内存映射"""
+        return self._memmap(self.values_path, VALUE_DTYPE)
+
+    def nbytes(self):
+        """仓库占用的磁盘空间(字节)"""
+        return sum(os.path.getsize(path) for path in (self.segments_path, self.values_path, self.keywords_path)
+                   if os.path.exists(path))
+
+    def _keyword_ids(self, keywords):
+        """返回关键词编号，新关键词追加到编号表"""
+        new = [k for k in dict.fromkeys(keywords) if k not in self.keyword_index]
+        if new:
+            with open(self.keywords_path, 'a', encoding='utf-8') as f:
+                for keyword in new:
+                    self.keyword_index[keyword] = len(self.keywords)
+                    self.keywords.append(keyword)
+                    f.write(json.dumps(keyword, ensure_ascii=False) + '\n')
+        return np.array([self.keyword_index[k] for k in keywords], dtype=SEGMENT_DTYPE['keyword'])
+
+    def append(self, raw, factors=None):
+        """
+        追加一次抓取的结果，每个关键词一段
+        :param raw: 以等间隔日期为索引、每个关键词一列的Trends原始值(0-100)DataFrame
+        :param factors: {关键词: 缩放系数}，缺省为1
+        :return: 写入的段数
+        """
+        raw = raw.drop(columns=['isPartial'], errors='ignore')
+        if raw.empty:
+            return 0
+        factors = factors or {}
+        days = (pd.DatetimeIndex(raw.index).normalize() - EPOCH).days.to_numpy()
+        steps = np.unique(np.diff(days))
+        if len(steps) > 1 or (len(steps) == 1 and steps[0] <= 0):
+            raise ValueError("trends index must be evenly spaced and increasing")
+        step = int(steps[0]) if len(steps) else 1
+
+        values = raw.to_numpy(dtype=float)
+        stored = np.where(np.isnan(values), MISSING, np.clip(np.rint(np.nan_to_num(values)), 0, MISSING - 1))
+
+        existing = self.segments()
+        values_end = int(existing['offset'][-1]) + int(existing['length'][-1]) if len(existing) else 0
+        segments = np.empty(len(raw.columns), dtype=SEGMENT_DTYPE)
+        segments['keyword'] = self._keyword_ids([str(column) for column in raw.columns])
+        segments['first_day'] = days[0]
+        segments['step'] = step
+        segments['length'] = len(days)
+        segments['scale'] = [factors.get(column, 1.0) for column in raw.columns]
+        segments['offset'] = values_end + np.arange(len(raw.columns), dtype=np.uint64) * len(days)
+
+        # 先写值再写段记录，段记录落盘后数据才可见
+        with open(self.values_path, 'ab') as f:
+            stored.T.astype(VALUE_DTYPE).tofile(f)
+        with open(self.segments_path, 'ab') as f:
+            segments.tofile(f)
+        return len(segments)
+
+    def last_days(self, keywords=None):
+        """
+        每个关键词已存储的最后日期
+        :param keywords: 关键词列表，默认全部
+        :return: {关键词: Timestamp}，没有数据的关键词不包含在内
+        """
+        segments = self.segments()
+        if len(segments) == 0:
+            return {}
+        latest = np.full(len(self.keywords), -1, dtype=np.int64)
+        np.maximum.at(latest, segments['keyword'], self._segment_last_days(segments))
+        if keywords is None:
+            keywords = self.keywords
+        ids = [(k, self.keyword_index[k]) for k in keywords if k in self.keyword_index]
+        return {k: EPOCH + pd.Timedelta(days=int(latest[i])) for k, i in ids if latest[i] >= 0}
+
+    @staticmethod
+    def _segment_last_days(segments):
+        """每个写入段最后一天的天数"""
+        return segments['first_day'] + (segments['length'].astype(np.int64) - 1) * segments['step']
+
+    def load(self, keywords=None, start=None, end=None):
+        """
+        读取缩放后的时间序列
+        :param keywords: 关键词列表，默认全部
+        :param start: 起始日期(含)
+        :param end: 结束日期(含)
+        :return: 以日期为索引、每个关键词一列的float32 DataFrame
+        """
+        segments = self.segments()
+        mask = np.ones(len(segments), dtype=bool)
+        if keywords is not None:
+            ids = [self.keyword_index[k] for k in keywords if k in self.keyword_index]
+            mask &= np.isin(segments['keyword'], ids)
+        if start is not None:
+            mask &= self._segment_last_days(segments) >= to_day(start)
+        if end is not None:
+            mask &= segments['first_day'] <= to_day(end)
+        selected = np.nonzero(mask)[0]
+        if len(selected) == 0:
+            return pd.DataFrame(dtype=np.float32)
+
+        # 展开为(关键词, 日期, 段序号, 值)的长格式
+        lengths = segments['length'][selected].astype(np.int64)
+        segment_of = np.repeat(selected, lengths)
+        position = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        keyword = segments['keyword'][segment_of]
+        day = segments['first_day'][segment_of] + position * segments['step'][segment_of]
+        value = self.values()[segments['offset'][segment_of].astype(np.int64) + position]
+
+        keep = value != MISSING
+        if start is not None:
+            keep &= day >= to_day(start)
+        if end is not None:
+            keep &= day <= to_day(end)
+        keyword, day, segment_of, value = keyword[keep], day[keep], segment_of[keep], value[keep]
+
+        # 同一(关键词, 日期)只保留最后写入的一段
+        order = np.lexsort((segment_of, day, keyword))
+        keyword, day, segment_of, value = keyword[order], day[order], segment_of[order], value[order]
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = (keyword[1:] != keyword[:-1]) | (day[1:] != day[:-1])
+        keyword, day, segment_of, value = keyword[last], day[last], segment_of[last], value[last]
+
+        days, day_pos = np.unique(day, return_inverse=True)
+        keyword_ids, keyword_pos = np.unique(keyword, return_inverse=True)
+        matrix = np.full((len(days), len(keyword_ids)), np.nan, dtype=np.float32)
+        matrix[day_pos, keyword_pos] = value * segments['scale'][segment_of]
+
+        index = pd.DatetimeIndex(EPOCH + pd.to_timedelta(days, unit='D'), name='date')
+        frame = pd.DataFrame(matrix, index=index, columns=[self.keywords[i] for i in keyword_ids])
+        if keywords is not None:
+            # 按调用方给出的顺序排列列
+            frame = frame[[k for k in dict.fromkeys(keywords) if k in frame.columns]]
+        return frame
@@ -0,0 +1,200 @@
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from trends_scheduler import MAX_TERMS, TrendsScheduler
+from trends_store import TrendsStore
+
+
+class TrendsWarehouse:
+    def __init__(self, store=None, scheduler=None, initial_days=30, overlap_days=7, max_days=180, refresh_days=1):
+        """
+        增量更新的Trends历史数据：每个关键词只抓取仓库中还没有的日期，
+        并与已存储的重叠日期对齐尺度后追加
+        :param store: TrendsStore，默认data/trends_store
+        :param scheduler: TrendsScheduler
+        :param initial_days: 新关键词第一次抓取的天数
+        :param overlap_days: 增量抓取时与已有数据重叠的天数，用于对齐尺度
+        :param max_days: 单次抓取的最大天数(Trends超过约270天就不再返回按天的数据)
+        :param refresh_days: 最后存储日期距今不足这么多天的关键词不更新，1表示每天更新
+        """
+        self.store = store or TrendsStore()
+        self.scheduler = scheduler or TrendsScheduler()
+        self.initial_days = initial_days
+        self.overlap_days = overlap_days
+        self.max_days = max_days
+        self.refresh_days = max(1, int(refresh_days))
+
+    def plan(self, keywords, today):
+        """
+        把需要更新的有历史关键词组成请求
+        它们各自按重叠日期对齐尺度，请求中不需要锚点词，每个请求可以放满MAX_TERMS个词；
+        组内按近期热度排序，热度相近的词放在同一请求中，避免小词被归一成0
+        :param keywords: 关键词列表
+        :param today: 本次更新的截止日期
+        :return: ({起始日期: [请求的关键词列表]}, 仓库中还没有的新关键词, 不需要更新而跳过的关键词数)
+        """
+        last_days = self.store.last_days(keywords)
+        earliest = today - pd.Timedelta(days=self.max_days - 1)
+        fresh = today - pd.Timedelta(days=self.refresh_days)
+        starts = {}
+        new_keywords = []
+        skipped = 0
+        for keyword in dict.fromkeys(keywords):
+            last_day = last_days.get(keyword)
+            if last_day is None:
+                new_keywords.append(keyword)
+            elif last_day > fresh:
+                skipped += 1
+            else:
+                start = max(last_day - pd.Timedelta(days=self.overlap_days), earliest)
+                starts.setdefault(start, []).append(keyword)
+        groups = {}
+        for start, group in starts.items():
+            levels = self.store.load(group, start=start, end=today).mean().reindex(group).fillna(0)
+            group = sorted(group, key=levels.get)
+            groups[start] = [group[i:i + MAX_TERMS] for i in range(0, len(group), MAX_TERMS)]
+        return groups, new_keywords, skipped
+
+    def pick_bridge(self, start, today):
+        """
+        从仓库中选择桥接关键词，与新关键词放在同一请求中，用来把新词换算到历史尺度
+        候选词在抓取范围内至少有overlap_days天历史；取近期热度最接近中位数的一个，
+        既不会把新词压成0，自己也不容易被压成0
+        :param start: 新关键词的抓取起始日期
+        :param today: 截止日期
+        :return: 桥接关键词；仓库中没有合适的词时返回None
+        """
+        min_last_day = start + pd.Timedelta(days=self.overlap_days)
+        candidates = [keyword for keyword, last_day in self.store.last_days().items() if last_day >= min_last_day]
+        if not candidates:
+            return None
+        levels = self.store.load(candidates, start=start, end=today).mean()
+        levels = levels[levels > 0]
+        if levels.empty:
+            return None
+        return (levels - levels.median()).abs().idxmin()
+
+    @staticmethod
+    def _payload_scale(frame, stored, positions, last_days):
+        """
+        同一请求中的值由Trends按同一个最大值归一，整个请求只需要一个缩放系数：
+        取请求中有历史的关键词在重叠日期上(已存储值之和/抓取值之和)的中位数
+        :param frame: 一个请求的原始值DataFrame
+        :param stored: 按frame的日期对齐的已存储值数组(日期 × 关键词)
+        :param positions: {关键词: stored中的列号}
+        :param last_days: {关键词: 已存储的最后日期}
+        :return: 缩放系数；请求中没有可对齐的关键词时返回None
+        """
+        columns = [i for i, k in enumerate(frame.columns) if k in positions and k in last_days]
+        if not columns:
+            return None
+        keywords = frame.columns[columns]
+        stored = stored[:, [positions[k] for k in keywords]]
+        fetched = frame.to_numpy(dtype=float)[:, columns]
+        # 历史的最后一天可能是当时尚未完整的数据，不参与对齐
+        before = frame.index.to_numpy()[:, None] < np.array([last_days[k] for k in keywords], dtype='datetime64[ns]')
+        common = before & ~np.isnan(stored) & ~np.isnan(fetched)
+        fetched_sums = np.where(common, fetched, 0).sum(axis=0)
+        stored_sums = np.where(common, stored, 0).sum(axis=0)
+        valid = (fetched_sums > 0) & (stored_sums > 0)
+        if not valid.any():
+            return None
+        return float(np.median(stored_sums[valid] / fetched_sums[valid]))
+
+    def _fetch_aligned(self, payloads, start, today):
+        """
+        抓取一组请求，每个请求按其中有历史的关键词对齐到历史尺度后写入仓库
+        :return: 写入的原始值DataFrame(没有数据时为空)
+        """
+        timeframe = f"{start:%Y-%m-%d} {today:%Y-%m-%d}"
+        batches = self.scheduler.fetch_payloads(payloads, timeframe)
+        requested = list(dict.fromkeys(keyword for payload in payloads for keyword in payload))
+        history = self.store.load(requested, start=start, end=today)
+        positions = {keyword: i for i, keyword in enumerate(history.columns)}
+        last_days = self.store.last_days(requested)
+        index = stored = None
+        frames = []
+        scales = {}
+        for payload, frame in batches:
+            if frame is None or frame.empty:
+                continue
+            # 同一时间范围的请求返回相同的日期，历史只需对齐一次
+            if index is None or not frame.index.equals(index):
+                index = frame.index
+                stored = history.reindex(index=index).to_numpy(dtype=float)
+            scale = self._payload_scale(frame, stored, positions, last_days)
+            if scale is None:
+                logging.warning(f"请求 {payload} 中没有可与历史对齐的关键词，本次不保存")
+                continue
+            # 桥接词出现在多个请求中，只保存一次
+            columns = [k for k in frame.columns if k not in scales]
+            frames.append(frame[columns])
+            scales.update(dict.fromkeys(columns, scale))
+        if not frames:
+            return pd.DataFrame()
+        raw = pd.concat(frames, axis=1)
+        self.store.append(raw, scales)
+        return raw
+
+    def update(self, keywords, today=None):
+        """
+        把关键词的历史数据更新到today
+        有历史的关键词先更新，再从(已更新的)仓库中选桥接词抓取新关键词；
+        仓库为空时新关键词的尺度由调度器的锚点词定义
+        :param keywords: 关键词列表
+        :param today: 截止日期，默认今天
+        :return: {'fetched': 抓取的关键词数, 'skipped': 跳过的关键词数, 'days': 抓取的关键词-天数}
+        """
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        groups, new_keywords, skipped = self.plan(keywords, today)
+        stats = {'fetched': 0, 'skipped': skipped, 'days': 0}
+
+        def record(raw):
+            stats['fetched'] += len(raw.columns)
+            stats['days'] += raw.size
+
+        for start, payloads in sorted(groups.items()):
+            record(self._fetch_aligned(payloads, start, today))
+
+        if new_keywords:
+            start = today - pd.Timedelta(days=self.initial_days - 1)
+            bridge = self.pick_bridge(start, today)
+            if bridge is None:
+                raw, factors = self.scheduler.fetch_raw(new_keywords, f"{start:%Y-%m-%d} {today:%Y-%m-%d}")
+                if not raw.empty:
+                    self.store.append(raw, factors)
+                record(raw)
+            else:
+                size = MAX_TERMS - 1
+                payloads = [[bridge] + new_keywords[i:i + size] for i in range(0, len(new_keywords), size)]
+                record(self._fetch_aligned(payloads, start, today))
+        logging.info(f"趋势历史更新完成: 抓取 {stats['fetched']} 个关键词, 跳过 {stats['skipped']} 个已是最新")
+        return stats
+
+    def growth(self, keywords=None, horizons=(90, 365), window=7, today=None):
+        """
+        根据历史数据计算长期增长率
+        :param keywords: 关键词列表，默认全部
+        :param horizons: 比较的天数
+        :param window: 取平均的天数
+        :param today: 截止日期，默认今天
+        :return: 以关键词为索引、每个天数一列(growth_90d等)的增长率(%)DataFrame；历史不足时为NaN
+        """
+        today = pd.Timestamp(today or datetime.now()).normalize()
+        history = self.store.load(keywords, start=today - pd.Timedelta(days=max(horizons) + window), end=today)
+        growth = pd.DataFrame(index=pd.Index(history.columns, name='topic'))
+        if history.empty:
+            return growth
+
+        def window_mean(end):
+            rows = history[(history.index > end - pd.Timedelta(days=window)) & (history.index <= end)]
+            return rows.mean()
+
+        current = window_mean(today)
+        for horizon in horizons:
+            past = window_mean(today - pd.Timedelta(days=horizon))
+            growth[f'growth_{horizon}d'] = ((current - past) / past.where(past > 0)) * 100
+        return growth